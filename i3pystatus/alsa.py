@@ -141,23 +141,25 @@ class ALSA(IntervalModule):
 
         return volNew
 
-    def increase_volume(self, delta=None):
+    def increase_volume(self, delta=None, count=1):
         if self.map_volume:
-            vol = self.get_new_volume("inc")
+            for i in range(count):
+                vol = self.get_new_volume("inc")
 
-            self.alsamixer.setvolume(vol)
+                self.alsamixer.setvolume(vol)
         else:
             vol = self.alsamixer.getvolume()[self.channel]
-            self.alsamixer.setvolume(min(100, vol + (delta if delta else self.increment)))
+            self.alsamixer.setvolume(min(100, vol + (delta if delta else self.increment) * count))
 
-    def decrease_volume(self, delta=None):
+    def decrease_volume(self, delta=None, count=1):
         if self.map_volume:
-            vol = self.get_new_volume("dec")
+            for i in range(count):
+                vol = self.get_new_volume("dec")
 
-            self.alsamixer.setvolume(vol)
+                self.alsamixer.setvolume(vol)
         else:
             vol = self.alsamixer.getvolume()[self.channel]
-            self.alsamixer.setvolume(max(0, vol - (delta if delta else self.increment)))
+            self.alsamixer.setvolume(max(0, vol - (delta if delta else self.increment) * count))
 
     def get_db(self):
         db = (((self.dbMax - self.dbMin) / 100) * self.alsamixer.getvolume()[self.channel]) + self.dbMin
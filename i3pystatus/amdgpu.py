@@ -1,6 +1,7 @@
 import os
 
 from i3pystatus import IntervalModule
+from i3pystatus.core import sysfs
 
 
 class Amdgpu(IntervalModule):
@@ -55,11 +56,12 @@ class Amdgpu(IntervalModule):
         for gatherer in self.info_gatherers:
             gatherer()
 
-        self.output = {
+        output = {
             'full_text': self.format.format(**self.data)
         }
         if self.color:
-            self.output['color'] = self.color
+            output['color'] = self.color
+        self.output = output
 
     @staticmethod
     def parse_clk_reading(reading):
@@ -68,21 +70,16 @@ class Amdgpu(IntervalModule):
                 return l.split(' ')[1]
 
     def get_mclk(self):
-        with open(self.dev_path + 'pp_dpm_mclk') as f:
-            self.data['mclk'] = self.parse_clk_reading(f.read())
+        self.data['mclk'] = self.parse_clk_reading(sysfs.read(self.dev_path + 'pp_dpm_mclk'))
 
     def get_sclk(self):
-        with open(self.dev_path + 'pp_dpm_sclk') as f:
-            self.data['sclk'] = self.parse_clk_reading(f.read())
+        self.data['sclk'] = self.parse_clk_reading(sysfs.read(self.dev_path + 'pp_dpm_sclk'))
 
     def get_temp(self):
-        with open(self.hwmon_path + 'temp1_input') as f:
-            self.data['temp'] = float(f.read()) / 1000
+        self.data['temp'] = float(sysfs.read(self.hwmon_path + 'temp1_input')) / 1000
 
     def get_fan_speed(self):
-        with open(self.hwmon_path + 'fan1_input') as f:
-            self.data['fan_speed'] = f.read().strip()
+        self.data['fan_speed'] = sysfs.read(self.hwmon_path + 'fan1_input').strip()
 
     def get_gpu_usage(self):
-        with open(self.dev_path + 'gpu_busy_percent') as f:
-            self.data['gpu_usage'] = f.read().strip()
+        self.data['gpu_usage'] = sysfs.read(self.dev_path + 'gpu_busy_percent').strip()
@@ -1,5 +1,6 @@
 from i3pystatus.file import File
 from i3pystatus import Module
+from i3pystatus.core import sysfs
 from i3pystatus.core.command import run_through_shell
 import glob
 import shutil
@@ -60,12 +61,11 @@ class Backlight(File):
         if self.has_xbacklight:
             parsefunc = self.components['max_brightness'][0]
             maxbfile = self.components['max_brightness'][1]
-            with open(self.base_path + maxbfile, "r") as f:
-                max_steps = parsefunc(f.read().strip())
-                if max_steps:
-                    self.step_size = 100 // max_steps + 1
-                else:
-                    self.step_size = 5  # default?
+            max_steps = parsefunc(sysfs.read(self.base_path + maxbfile).strip())
+            if max_steps:
+                self.step_size = 100 // max_steps + 1
+            else:
+                self.step_size = 5  # default?
         super().init()
 
     def run_no_backlight(self):
@@ -85,10 +85,10 @@ class Backlight(File):
             "color": self.color
         }
 
-    def lighter(self):
+    def lighter(self, count=1):
         if self.has_xbacklight:
-            run_through_shell(["xbacklight", "-inc", str(self.step_size)])
+            run_through_shell(["xbacklight", "-inc", str(self.step_size * count)])
 
-    def darker(self):
+    def darker(self, count=1):
         if self.has_xbacklight:
-            run_through_shell(["xbacklight", "-dec", str(self.step_size)])
+            run_through_shell(["xbacklight", "-dec", str(self.step_size * count)])
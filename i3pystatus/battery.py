@@ -1,30 +1,54 @@
 import bisect
-import configparser
 import os
-import re
+import threading
 
 from i3pystatus import IntervalModule, formatp
+from i3pystatus.core import sysfs, uevent
 from i3pystatus.core.command import run_through_shell
 from i3pystatus.core.desktop import DesktopNotification
+from i3pystatus.core.threading import ExceptionWrapper
 from i3pystatus.core.util import lchop, TimeWrapper, make_bar, make_glyph, make_vertical_bar
 
 
-class UEventParser(configparser.ConfigParser):
-    @staticmethod
-    def parse_file(file):
-        parser = UEventParser()
-        with open(file, "r") as file:
-            parser.read_string(file.read())
-        return dict(parser.items("id10t"))
+def micro(value):
+    return float(value) / 1000000.0
 
-    def __init__(self):
-        super().__init__(default_section="id10t")
 
-    def optionxform(self, key):
-        return lchop(key, "POWER_SUPPLY_")
+class UEventParser:
+    """
+    Parses the fields of a power supply uevent file used by :py:class:`Battery`
 
-    def read_string(self, string):
-        super().read_string("[id10t]\n" + string)
+    Only the fields in :py:attr:`FIELDS` are kept, values in micro units
+    (µV, µA, µW, µAh and µWh) are converted to base units.
+    """
+
+    FIELDS = {
+        "STATUS": str,
+        "VOLTAGE_NOW": micro,
+        "CURRENT_NOW": micro,
+        "POWER_NOW": micro,
+        "CHARGE_NOW": micro,
+        "CHARGE_FULL": micro,
+        "CHARGE_FULL_DESIGN": micro,
+        "ENERGY_NOW": micro,
+        "ENERGY_FULL": micro,
+        "ENERGY_FULL_DESIGN": micro,
+    }
+
+    @staticmethod
+    def parse_file(file):
+        return UEventParser.parse(sysfs.read(file))
+
+    @classmethod
+    def parse(cls, string):
+        battery_info = {}
+        for line in string.splitlines():
+            key, _, value = line.partition("=")
+            key = lchop(key.strip(), "POWER_SUPPLY_")
+            convert = cls.FIELDS.get(key)
+            if convert is not None:
+                battery_info[key] = convert(value.strip())
+        return battery_info
 
 
 class Battery:
@@ -38,12 +62,6 @@ class Battery:
 
     def __init__(self, battery_info):
         self.battery_info = battery_info
-        self.normalize_micro()
-
-    def normalize_micro(self):
-        for key, micro_value in self.battery_info.items():
-            if re.match(r"(VOLTAGE|CHARGE|CURRENT|POWER|ENERGY)_(NOW|FULL|MIN)(_DESIGN)?", key):
-                self.battery_info[key] = float(micro_value) / 1000000.0
 
     def percentage(self, design=False):
         return self._percentage("_DESIGN" if design else "") * 100
@@ -209,7 +227,9 @@ class BatteryChecker(IntervalModule):
          "The text to display when the battery is not present. Provides {battery_ident} as formatting option"),
         ("no_text_full", "Don't display text when battery is full - 100%"),
         ("glyphs", "Arbitrarily long string of characters (or array of strings) to represent battery charge percentage"),
-        ("use_design_percentage", "Use design percentage rather then absolute percentage for alerts")
+        ("use_design_percentage", "Use design percentage rather then absolute percentage for alerts"),
+        ("uevent", "Listen for power supply uevents from the kernel and update immediately when the "
+                   "charger is plugged in or removed, so that a long interval can be used (Linux only)"),
     )
 
     battery_ident = "ALL"
@@ -238,6 +258,7 @@ class BatteryChecker(IntervalModule):
     no_text_full = False
     glyphs = "▁▂▃▄▅▆▇█"
     use_design_percentage = False
+    uevent = False
 
     battery_prefix = 'BAT'
     base_path = '/sys/class/power_supply'
@@ -302,8 +323,20 @@ class BatteryChecker(IntervalModule):
                     self.paths.append(os.path.join(bat_dir, bat, 'uevent'))
             if self.path:
                 self.paths = [self.path]
+        self.update_lock = threading.Lock()
+        if self.uevent:
+            uevent.get_monitor().subscribe("power_supply", self.power_supply_changed)
+
+    def power_supply_changed(self, event):
+        """ Called by the uevent monitor for every power supply event, sends the status line right away. """
+        ExceptionWrapper(self)()
+        self.send_output()
 
     def run(self):
+        with self.update_lock:
+            self._run()
+
+    def _run(self):
         urgent = False
         color = self.color
         batteries = []
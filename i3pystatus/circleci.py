@@ -136,14 +136,15 @@ class CircleCI(IntervalModule):
         if self.repo_status_map:
             self.repo_status = self.repo_status_map.get(self.repo_status, self.repo_status)
 
+        if self.status_color_map:
+            color = self.status_color_map.get(self.repo_status, self.color)
+        else:
+            color = self.color
         self.output = dict(
             full_text=formatp(self.format, **vars(self)),
             short_text=self.short_format.format(**vars(self)),
+            color=color,
         )
-        if self.status_color_map:
-            self.output['color'] = self.status_color_map.get(self.repo_status, self.color)
-        else:
-            self.output['color'] = self.color
 
     def open_build_webpage(self):
         if self.repo_summary.get('workflows'):
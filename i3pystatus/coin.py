@@ -85,6 +85,7 @@ class Coin(IntervalModule):
 
         self.data = fdict
 
-        self.output = {"full_text": self.format.format(**fdict)}
+        output = {"full_text": self.format.format(**fdict)}
         if self.color is not None:
-            self.output['color'] = self.color
+            output['color'] = self.color
+        self.output = output
@@ -1,12 +1,14 @@
 import logging
 import os
+import signal
 import sys
 from threading import Thread
 
-from i3pystatus.core import io, util
+from i3pystatus.core import datasource, io, stats, util
 from i3pystatus.core.exceptions import ConfigError
 from i3pystatus.core.imputil import ClassFinder
-from i3pystatus.core.modules import Module
+from i3pystatus.core.modules import Module, IntervalModule
+from i3pystatus.core.threading import SerialDispatcher, WorkerPool
 
 DEFAULT_LOG_FORMAT = '%(asctime)s [%(levelname)-8s][%(name)s %(lineno)d] %(message)s'
 log = logging.getLogger(__name__)
@@ -16,19 +18,27 @@ class CommandEndpoint:
     """
     Endpoint for i3bar click events: http://i3wm.org/docs/i3bar-protocol.html#_click_events
 
+    Clicks are handled by a pool of worker threads. Clicks on the same module
+    are handled one after another, clicks on different modules concurrently,
+    so a slow callback only delays further clicks on its own module.
+
     :param modules: dict-like object with item access semantics via .get()
     :param io_handler_factory: function creating a file-like object returning a JSON generator on .read()
+    :param workers: Number of threads handling clicks
     """
 
-    def __init__(self, modules, io_handler_factory, io):
+    def __init__(self, modules, io_handler_factory, io, workers=2):
         self.modules = modules
         self.io_handler_factory = io_handler_factory
         self.io = io
+        self.pool = WorkerPool(workers, "click")
+        self.dispatcher = SerialDispatcher(self.pool)
         self.thread = Thread(target=self._command_endpoint)
         self.thread.daemon = True
 
     def start(self):
-        """Starts the background thread"""
+        """Starts the background threads"""
+        self.pool.start()
         self.thread.start()
 
     def _command_endpoint(self):
@@ -44,9 +54,16 @@ class CommandEndpoint:
                 continue
 
             if target_module:
-                target_module.on_click(button, **kwargs)
-                target_module.run()
-                self.io.async_refresh()
+                self.dispatcher.submit(target_module, self._click,
+                                       target_module, button, kwargs)
+
+    def _click(self, module, button, kwargs):
+        module.on_click(button, **kwargs)
+        if module.coalesces(button):
+            # the module runs and refreshes once the coalesced events are handled
+            return
+        module.run()
+        self.io.async_refresh()
 
 
 class Status:
@@ -61,12 +78,32 @@ class Status:
     :param tuple internet_check: Address of server that will be used to check for internet connection by :py:class:`.internet`.
     :param keep_alive: If True, modules that define the keep_alive flag will not be put to sleep when the status bar is hidden.
     :param dictionary default_hints: Dictionary of default hints to apply to all modules. Can be overridden at a module level.
+    :param int workers: Number of threads shared by all interval modules for their updates.
+    :param int click_workers: Number of threads handling click events. Clicks on different modules are handled
+        concurrently, up to this number of slow click callbacks at a time.
+    :param int max_backoff: Maximum interval in seconds of modules that keep raising exceptions.
+        Each consecutive failure doubles the interval up to this value. 0 disables backoff.
+    :param str stats_socket: Path of a UNIX socket serving update statistics of all interval modules as JSON.
+    :param int stats_signal: Signal (e.g. ``signal.SIGRTMIN``) that writes the update statistics to the log.
+    :param bool emit_on_change: If True, the status line is only sent to i3bar when the output of a module changed,
+        instead of every `interval` seconds.
+    :param float min_emit_interval: Minimum time in seconds between two status lines if `emit_on_change` is True.
+    :param float heartbeat: If `emit_on_change` is True, additionally send the status line every `heartbeat` seconds.
+    :param float refresh_window: Time in seconds during which immediate refresh requests (e.g. after clicks) are
+        collected into a single status line.
+    :param float datasource_period: Minimum time in seconds between two samples of data shared by several modules,
+        e.g. CPU and memory usage. Modules with a shorter interval sample more often.
+    :param dict datasource_periods: Periods of individual data sources by name (``procstat``, ``meminfo``,
+        ``nvidia``), overriding `datasource_period`.
     """
 
     def __init__(self, standalone=True, click_events=True, interval=1,
                  input_stream=None, logfile=None, internet_check=None,
                  keep_alive=False, logformat=DEFAULT_LOG_FORMAT,
-                 default_hints=None):
+                 default_hints=None, workers=4, click_workers=2, max_backoff=300,
+                 stats_socket=None, stats_signal=None, emit_on_change=False,
+                 min_emit_interval=0.1, heartbeat=None, refresh_window=0.02,
+                 datasource_period=datasource.DEFAULT_PERIOD, datasource_periods=None):
         self.standalone = standalone
         self.default_hints = default_hints
         self.click_events = standalone and click_events
@@ -84,15 +121,24 @@ class Status:
                 logger.handlers[index].setFormatter(logging.Formatter(logformat))
         if internet_check:
             util.internet.address = internet_check
+        IntervalModule.scheduler.workers = workers
+        IntervalModule.scheduler.max_backoff = max_backoff
+        datasource.configure(datasource_period, datasource_periods)
+        if stats_socket:
+            stats.StatsServer(stats_socket, IntervalModule.scheduler).start()
+        if stats_signal:
+            signal.signal(stats_signal, lambda signo, frame: stats.log_stats(IntervalModule.scheduler))
 
         self.modules = util.ModuleList(self, ClassFinder(Module))
         if self.standalone:
-            self.io = io.StandaloneIO(self.click_events, self.modules, keep_alive, interval)
+            self.io = io.StandaloneIO(self.click_events, self.modules, keep_alive, interval,
+                                      emit_on_change, min_emit_interval, heartbeat,
+                                      refresh_window)
             if self.click_events:
                 self.command_endpoint = CommandEndpoint(
                     self.modules,
                     lambda: io.JSONIO(io=io.IOHandler(sys.stdin, open(os.devnull, "w")), skiplines=1),
-                    self.io)
+                    self.io, click_workers)
         else:
             self.io = io.IOHandler(input_stream)
 
@@ -137,6 +183,9 @@ class Status:
         """
         if self.click_events:
             self.command_endpoint.start()
+        if self.standalone:
+            io.StatusLineIO(self.io, self.modules).run()
+            return
         for j in io.JSONIO(self.io).read():
             for module in self.modules:
                 module.inject(j)
@@ -1,11 +1,85 @@
-from colour import Color
+import colorsys
+import functools
+
+# Common color names, so that the usual palettes work without the colour
+# package. Other names are resolved by colour.
+COLOR_NAMES = {
+    "black": "#000000",
+    "blue": "#0000ff",
+    "cyan": "#00ffff",
+    "gray": "#808080",
+    "green": "#008000",
+    "grey": "#808080",
+    "lime": "#00ff00",
+    "magenta": "#ff00ff",
+    "maroon": "#800000",
+    "navy": "#000080",
+    "olive": "#808000",
+    "orange": "#ffa500",
+    "purple": "#800080",
+    "red": "#ff0000",
+    "silver": "#c0c0c0",
+    "white": "#ffffff",
+    "yellow": "#ffff00",
+}
+
+
+def parse_color(color):
+    """
+    Converts a Hex or plain English color to a tuple of red, green and blue
+    floats between 0 and 1.
+    """
+    color = COLOR_NAMES.get(color.lower(), color) if isinstance(color, str) else color
+    if isinstance(color, str) and color.startswith("#") and len(color) in (4, 7):
+        digits = color[1:]
+        if len(digits) == 3:
+            digits = "".join(c * 2 for c in digits)
+        try:
+            return tuple(int(digits[i:i + 2], 16) / 255 for i in (0, 2, 4))
+        except ValueError:
+            pass
+    from colour import Color
+    return Color(color).rgb
+
+
+@functools.lru_cache(maxsize=64)
+def get_gradient_table(start_color, end_color, quantity):
+    """
+    Generates a tuple of quantity Hex colors from start_color to end_color,
+    interpolated in the HSL color space (like the `colour` package does).
+
+    Tables are cached and shared by all modules using the same colors, so
+    they must not be modified.
+
+    :param start_color: Hex or plain English color for start of range
+    :param end_color: Hex or plain English color for end of range
+    :param quantity: Number of colours to return
+    :return: A tuple of Hex color values
+    """
+    start = _rgb_to_hsl(parse_color(start_color))
+    end = _rgb_to_hsl(parse_color(end_color))
+    intervals = quantity - 1
+    steps = [(e - s) / intervals if intervals > 0 else 0 for s, e in zip(start, end)]
+    colors = []
+    for i in range(quantity):
+        h, s, l = (s + step * i for s, step in zip(start, steps))
+        rgb = colorsys.hls_to_rgb(h, l, s)
+        # i3bar expects the full Hex value
+        colors.append("#" + "".join("%02x" % int(c * 255 + 0.5 - 0.0000005) for c in rgb))
+    return tuple(colors)
+
+
+def _rgb_to_hsl(rgb):
+    h, l, s = colorsys.rgb_to_hls(*rgb)
+    return h, s, l
 
 
 class ColorRangeModule(object):
     """
     Class to dynamically generate and select colors.
 
-    Requires the PyPI package `colour`
+    Requires the PyPI package `colour` for colors given by a name other
+    than the common ones in :py:data:`COLOR_NAMES`.
     """
 
     start_color = "#00FF00"
@@ -14,28 +88,21 @@ class ColorRangeModule(object):
     @staticmethod
     def get_hex_color_range(start_color, end_color, quantity):
         """
-        Generates a list of quantity Hex colors from start_color to end_color.
+        Generates a tuple of quantity Hex colors from start_color to end_color.
+
+        The result is shared with other modules using the same colors (see
+        :py:func:`get_gradient_table`), so it is immutable.
 
         :param start_color: Hex or plain English color for start of range
         :param end_color: Hex or plain English color for end of range
         :param quantity: Number of colours to return
-        :return: A list of Hex color values
+        :return: A tuple of Hex color values
         """
-        raw_colors = [c.hex for c in list(Color(start_color).range_to(Color(end_color), quantity))]
-        colors = []
-        for color in raw_colors:
-
-            # i3bar expects the full Hex value but for some colors the colour
-            # module only returns partial values. So we need to convert these colors to the full
-            # Hex value.
-            if len(color) == 4:
-                fixed_color = "#"
-                for c in color[1:]:
-                    fixed_color += c * 2
-                colors.append(fixed_color)
-            else:
-                colors.append(color)
-        return colors
+        try:
+            return get_gradient_table(start_color, end_color, quantity)
+        except TypeError:
+            # unhashable color objects can't be cached
+            return get_gradient_table.__wrapped__(start_color, end_color, quantity)
 
     def get_gradient(self, value, colors, upper_limit=100):
         """
@@ -0,0 +1,119 @@
+import time
+from collections import namedtuple
+from threading import Lock
+
+Snapshot = namedtuple("Snapshot", ["data", "timestamp"])
+Snapshot.__doc__ = """
+Result of a :py:class:`DataSource` sample
+
+`timestamp` is the :py:func:`time.monotonic` time the sample was taken at.
+`data` is shared by all readers of the source and must not be modified.
+"""
+
+#: Period of sources without a period of their own, see :py:func:`configure`
+DEFAULT_PERIOD = 0.5
+
+_sources = {}
+_periods = {}
+_default_period = DEFAULT_PERIOD
+_lock = Lock()
+
+
+class DataSource:
+    """
+    Named sampler shared between modules
+
+    Several modules often display the same subsystem (e.g. CPU usage as
+    text, bar and graph). Instead of each of them reading it on its own,
+    they ask a data source, which calls `sampler` at most once per `period`
+    seconds and hands out the cached snapshot otherwise. Callers that update
+    more often than that pass their own interval to :py:meth:`get`.
+
+    Exceptions raised by `sampler` are passed on to the caller and nothing
+    is cached, so the next call samples again.
+
+    :param name: Name of the source
+    :param sampler: Callable without arguments returning the data
+    :param period: Minimum time in seconds between two samples
+    """
+
+    def __init__(self, name, sampler, period=DEFAULT_PERIOD):
+        self.name = name
+        self.sampler = sampler
+        self.period = period
+        self.snapshot = None
+        self.lock = Lock()
+
+    def get(self, max_age=None):
+        """
+        Return a :py:class:`Snapshot` no older than the period of the
+        source, or `max_age` seconds if that is shorter, sampling again if
+        necessary.
+
+        :param max_age: Maximum age accepted by the caller, usually its
+            update interval
+        """
+        if max_age is None or max_age > self.period:
+            max_age = self.period
+        with self.lock:
+            now = time.monotonic()
+            if self.snapshot is None or now - self.snapshot.timestamp >= max_age:
+                self.snapshot = Snapshot(self.sampler(), now)
+            return self.snapshot
+
+    def invalidate(self):
+        """ Drop the cached snapshot, the next :py:meth:`get` samples again. """
+        with self.lock:
+            self.snapshot = None
+
+    def __repr__(self):
+        return "<DataSource {} period={}>".format(self.name, self.period)
+
+
+def configure(period=None, periods=None):
+    """
+    Set the periods of the data sources, both of the ones registered already
+    and of the ones registered later.
+
+    :param period: Period of all sources that are not in `periods`
+    :param periods: Dictionary mapping names of sources to their period
+    """
+    global _default_period
+    with _lock:
+        if period is not None:
+            _default_period = period
+        if periods:
+            _periods.update(periods)
+        for name, source in _sources.items():
+            source.period = _periods.get(name, _default_period)
+
+
+def register(name, sampler):
+    """
+    Register `sampler` under `name` and return its :py:class:`DataSource`.
+    Its period is set through :py:func:`configure`.
+
+    Registering the same sampler under the same name again returns the
+    existing source, so modules can register the sources they use on
+    import. A different sampler under a name already in use is an error.
+    """
+    with _lock:
+        source = _sources.get(name)
+        if source is None:
+            source = _sources[name] = DataSource(name, sampler, _periods.get(name, _default_period))
+        elif source.sampler is not sampler:
+            raise ValueError("Data source '{}' is already registered with {!r}".format(name, source.sampler))
+        return source
+
+
+def get_source(name):
+    """ Return the :py:class:`DataSource` registered under `name`. """
+    try:
+        return _sources[name]
+    except KeyError:
+        raise KeyError("No data source named '{}'".format(name)) from None
+
+
+def sample(name, max_age=None):
+    """ Shortcut for ``get_source(name).get(max_age)``. """
+    return get_source(name).get(max_age)
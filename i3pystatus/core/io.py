@@ -1,11 +1,13 @@
 import json
 import signal
 import sys
+import time
 
 from contextlib import contextmanager
 from threading import Condition
 from threading import Thread
 from i3pystatus.core.modules import IntervalModule
+from i3pystatus.core.util import convert_position
 
 
 class IOHandler:
@@ -13,6 +15,9 @@ class IOHandler:
         self.inp = inp
         self.out = out
 
+    def output_changed(self):
+        """Called when the output of a module has changed."""
+
     def write_line(self, message):
         """Unbuffered printing to stdout."""
 
@@ -62,17 +67,33 @@ class StandaloneIO(IOHandler):
         }, "[", "[]", ",[]",
     ]
 
-    def __init__(self, click_events, modules, keep_alive, interval=1):
+    def __init__(self, click_events, modules, keep_alive, interval=1,
+                 emit_on_change=False, min_emit_interval=0.1, heartbeat=None,
+                 refresh_window=0.02):
         """
         StandaloneIO instance must be created in main thread to be able to set
         the SIGUSR1 signal handler.
+
+        If `emit_on_change` is set, the status line is only written when the
+        output of a module changed, but not more often than every
+        `min_emit_interval` seconds. Additionally it is written every
+        `heartbeat` seconds, if that is not None. Otherwise the status line
+        is written every `interval` seconds.
+
+        Refresh requests arriving within `refresh_window` seconds of the
+        first pending request are written as a single status line.
         """
 
         super().__init__()
         self.interval = interval
         self.modules = modules
+        self.emit_on_change = emit_on_change
+        self.min_emit_interval = min_emit_interval
+        self.heartbeat = heartbeat
+        self.refresh_window = refresh_window
 
-        self.proto[0]['click_events'] = click_events
+        self.proto = list(self.proto)
+        self.proto[0] = dict(self.proto[0], click_events=click_events)
 
         if keep_alive:
             self.proto[0].update(dict(stop_signal=signal.SIGUSR2,
@@ -83,6 +104,9 @@ class StandaloneIO(IOHandler):
 
         self.refresh_cond = Condition()
         self.treshold_interval = 20.0
+        self.changed = False
+        self.requested_at = 0
+        self.last_emit = 0
 
         self.stopped = False
         signal.signal(signal.SIGUSR1, self.refresh_signal_handler)
@@ -91,15 +115,35 @@ class StandaloneIO(IOHandler):
         self.compute_treshold_interval()
         self.refresh_cond.acquire()
 
+        timeout = self.heartbeat if self.emit_on_change else self.interval
         while True:
             try:
-                self.refresh_cond.wait(timeout=self.interval)
+                self.refresh_cond.wait_for(lambda: self.changed, timeout=timeout)
+                self.wait_for_emit()
             except KeyboardInterrupt:
                 self.refresh_cond.release()
                 return
 
             yield self.read_line()
 
+    def wait_for_emit(self):
+        """
+        Delay a requested refresh until `refresh_window` seconds after the
+        first request, absorbing further requests, and in `emit_on_change`
+        mode until at least `min_emit_interval` seconds passed since the last
+        status line. Must be called with `refresh_cond` held.
+        """
+
+        now = time.perf_counter()
+        deadline = self.requested_at + self.refresh_window if self.changed else now
+        if self.emit_on_change:
+            deadline = max(deadline, self.last_emit + self.min_emit_interval)
+        while now < deadline:
+            self.refresh_cond.wait(deadline - now)
+            now = time.perf_counter()
+        self.changed = False
+        self.last_emit = now
+
     def read_line(self):
         self.n += 1
 
@@ -116,14 +160,21 @@ class StandaloneIO(IOHandler):
 
     def async_refresh(self):
         """
-        Calling this method will send the status line to i3bar immediately
-        without waiting for timeout (1s by default).
+        Calling this method will send the status line to i3bar within
+        `refresh_window` seconds without waiting for timeout (1s by default).
         """
 
         self.refresh_cond.acquire()
-        self.refresh_cond.notify()
+        if not self.changed:
+            self.changed = True
+            self.requested_at = time.perf_counter()
+            self.refresh_cond.notify()
         self.refresh_cond.release()
 
+    def output_changed(self):
+        if self.emit_on_change:
+            self.async_refresh()
+
     def refresh_signal_handler(self, signo, frame):
         """
         This callback is called when SIGUSR1 signal is received.
@@ -163,17 +214,17 @@ class StandaloneIO(IOHandler):
         and "cont_signal" key/value pairs in the header to allow sending a custom signal when these events occur.
 
         Here we use SIGUSR2 for both "stop_signal" and "cont_signal" and maintain a toggle to determine whether
-        we have just been stopped or continued. When we have been stopped, notify the IntervalModule managers
-        that they should suspend any module that does not set the keep_alive flag to a truthy value, and when we
-        have been continued, notify the IntervalModule managers that they can resume execution of all modules.
+        we have just been stopped or continued. When we have been stopped, notify the IntervalModule scheduler
+        that it should suspend any module that does not set the keep_alive flag to a truthy value, and when we
+        have been continued, notify the IntervalModule scheduler that it can resume execution of all modules.
         """
         if signo != signal.SIGUSR2:
             return
         self.stopped = not self.stopped
         if self.stopped:
-            [m.suspend() for m in IntervalModule.managers.values()]
+            IntervalModule.scheduler.suspend()
         else:
-            [m.resume() for m in IntervalModule.managers.values()]
+            IntervalModule.scheduler.resume()
 
 
 class JSONIO:
@@ -201,3 +252,29 @@ class JSONIO:
         j = json.loads(line)
         yield j
         self.io.write_line(prefix + json.dumps(j))
+
+
+class StatusLineIO(JSONIO):
+    """
+    Writes status lines assembled from the cached, serialized output of each
+    module (see :py:meth:`.Module.render`) instead of building and
+    serializing the whole line. Used in standalone mode, where every input
+    line is an empty JSON array.
+    """
+
+    def __init__(self, io, modules, skiplines=2):
+        super().__init__(io, skiplines)
+        self.modules = modules
+
+    def run(self):
+        for line in self.io.read():
+            prefix = "," if line.startswith(",") else ""
+            self.io.write_line(prefix + self.render())
+
+    def render(self):
+        blocks = []
+        for module in self.modules:
+            block = module.render()
+            if block:
+                blocks.insert(convert_position(module.position, blocks), block)
+        return "[" + ", ".join(blocks) + "]"
@@ -1,9 +1,12 @@
+import functools
 import inspect
+import json
 import traceback
 
 from i3pystatus.core.settings import SettingsBase
-from i3pystatus.core.threading import Manager
+from i3pystatus.core.threading import Scheduler
 from i3pystatus.core.util import (convert_position,
+                                  EventCoalescer,
                                   MultiClickHandler)
 from i3pystatus.core.command import execute
 
@@ -20,6 +23,29 @@ def is_method_of(method, object):
     return False
 
 
+def _get_callback_arguments(callback):
+    try:
+        spec = inspect.getfullargspec(callback)
+    except Exception:
+        return (), False
+    return tuple(spec.args + spec.kwonlyargs), spec.varkw is not None
+
+
+_cached_callback_arguments = functools.lru_cache(maxsize=256)(_get_callback_arguments)
+
+
+def get_callback_arguments(callback):
+    """
+    Returns a tuple of the argument names of ``callback`` and whether it
+    accepts arbitrary keyword arguments. Results are cached per callback.
+    """
+    try:
+        return _cached_callback_arguments(callback)
+    except TypeError:
+        # unhashable callable
+        return _get_callback_arguments(callback)
+
+
 class Module(SettingsBase):
     position = 0
 
@@ -39,6 +65,8 @@ class Module(SettingsBase):
         ('on_doubleotherclick', "Callback called on double other click (see :ref:`callbacks`)"),
         ('on_change', "Callback called when output is changed (see :ref:`callbacks`)"),
         ('multi_click_timeout', "Time (in seconds) before a single click is executed."),
+        ('scroll_coalesce_timeout', "Time (in seconds) during which scroll events are combined into a single "
+                                    "callback, 0 disables combining (see :ref:`callbacks`)"),
         ('hints', "Additional output blocks for module output (see :ref:`hints`)"),
     )
 
@@ -58,58 +86,110 @@ class Module(SettingsBase):
     on_doubleotherclick = None
 
     multi_click_timeout = 0.25
+    scroll_coalesce_timeout = 0
 
     hints = {"markup": "none"}
 
     def __init__(self, *args, **kwargs):
         self._output = None
+        self.__last_output = None
+        self.__rendered_output = None
+        self.__rendered = None
+        self.__instance = str(id(self))
+        self.__status_handler = None
         super(Module, self).__init__(*args, **kwargs)
         self.__multi_click = MultiClickHandler(self.__button_callback_handler,
                                                self.multi_click_timeout)
+        self.__scroll_coalescer = EventCoalescer(self.__coalesced_callback_handler,
+                                                 self.scroll_coalesce_timeout)
 
     @property
     def output(self):
+        """
+        The output of the module, a dict like ``{"full_text": ..., "color": ...}``.
+
+        Changes are detected when a new value is assigned, so modules must
+        assign a new dict instead of modifying the current one in place
+        (e.g. ``self.output = dict(self.output, color=color)``), otherwise
+        the change isn't sent in ``emit_on_change`` mode until another module
+        changes or the heartbeat. For the same reason, modules must not
+        define ``output`` as a class attribute.
+        """
         return self._output
 
     @output.setter
     def output(self, value):
         self._output = value
+        # inject() modifies the output in place, so compare against a copy
+        if value != self.__last_output:
+            self.__last_output = dict(value) if isinstance(value, dict) else value
+            self.__output_changed()
         if self.on_change:
             self.on_change()
 
+    def __output_changed(self):
+        io = getattr(self.__status_handler, "io", None)
+        if io:
+            io.output_changed()
+
     def registered(self, status_handler):
         """Called when this module is registered with a status handler"""
         self.__status_handler = status_handler
 
     def inject(self, json):
         if self.output:
-            if "name" not in self.output:
-                self.output["name"] = self.__name__
-            self.output["instance"] = str(id(self))
-            if (self.output.get("color", "") or "").lower() == "#ffffff":
-                del self.output["color"]
-            if self.hints:
-                for key, val in self.hints.items():
-                    if key not in self.output:
-                        self.output.update({key: val})
-            if self.output.get("markup") == "pango":
-                self.text_to_pango()
-
-            json.insert(convert_position(self.position, json), self.output)
+            json.insert(convert_position(self.position, json),
+                        self.prepare_output(self.output))
+
+    def prepare_output(self, output):
+        """
+        Completes `output` in place with the fields i3bar expects (name,
+        instance, hints) and returns it.
+        """
+        if "name" not in output:
+            output["name"] = self.__name__
+        output["instance"] = self.__instance
+        if (output.get("color", "") or "").lower() == "#ffffff":
+            del output["color"]
+        if self.hints:
+            for key, val in self.hints.items():
+                if key not in output:
+                    output[key] = val
+        if output.get("markup") == "pango":
+            self.text_to_pango(output)
+        return output
+
+    def render(self):
+        """
+        Returns the prepared output serialized as JSON object, or None if
+        there is no output.
+
+        The serialized output is cached until the output changes, so
+        unchanged modules cost only a comparison per status line.
+        """
+        output = self.output
+        if not output:
+            return None
+        if output != self.__rendered_output:
+            self.__rendered_output = dict(output)
+            self.__rendered = json.dumps(self.prepare_output(dict(output)))
+        return self.__rendered
 
     def run(self):
         pass
 
     def send_output(self):
         """Send a status update with the current module output"""
-        self.__status_handler.io.async_refresh()
+        io = getattr(self.__status_handler, "io", None)
+        if io:
+            io.async_refresh()
 
     def __log_button_event(self, button, cb, args, action, **kwargs):
         msg = "{}: button={}, cb='{}', args={}, kwargs={}, type='{}'".format(
             self.__name__, button, cb, args, kwargs, action)
         self.logger.debug(msg)
 
-    def __button_callback_handler(self, button, cb, **kwargs):
+    def __button_callback_handler(self, button, cb, refresh=True, **kwargs):
 
         def call_callback(cb, *args, **kwargs):
             # Recover the function if wrapped (with get_module for example)
@@ -120,16 +200,13 @@ class Module(SettingsBase):
             else:
                 tmp_cb = cb
 
-            try:
-                args_spec = inspect.getargspec(tmp_cb)
-            except Exception:
-                args_spec = inspect.ArgSpec([], None, None, None)
+            arg_names, keywords = get_callback_arguments(tmp_cb)
 
             # Remove all variables present in kwargs that are not used in the
             # callback, except if there is a keyword argument.
-            if not args_spec.keywords:
+            if not keywords:
                 kwargs = {k: v for k, v in kwargs.items()
-                          if k in args_spec.args}
+                          if k in arg_names}
             cb(*args, **kwargs)
 
         if not cb:
@@ -175,12 +252,38 @@ class Module(SettingsBase):
                                  "callback: {!r}".format(e))
             self.logger.critical(traceback.format_exc())
 
+        if not refresh:
+            return
+
         # Notify status handler
         try:
             self.__status_handler.io.async_refresh()
         except:
             pass
 
+    def __coalesced_callback_handler(self, button, cb, **kwargs):
+        # Called on the coalescer's timer thread. Hand the callback over to
+        # the click dispatcher, so it doesn't run concurrently with another
+        # click on this module.
+        endpoint = getattr(self.__status_handler, "command_endpoint", None)
+        if endpoint:
+            endpoint.dispatcher.submit(self, self.__run_coalesced_callback, button, cb, kwargs)
+        else:
+            self.__run_coalesced_callback(button, cb, kwargs)
+
+    def __run_coalesced_callback(self, button, cb, kwargs):
+        self.__button_callback_handler(button, cb, refresh=False, **kwargs)
+        # CommandEndpoint skips run() and the refresh for coalesced events
+        self.run()
+        self.send_output()
+
+    def coalesces(self, button):
+        """
+        Whether click events of `button` are coalesced (see
+        ``scroll_coalesce_timeout``) instead of handled right away.
+        """
+        return bool(self.scroll_coalesce_timeout) and button in (4, 5)  # scroll up, scroll down
+
     def on_click(self, button, **kwargs):
         """
         Maps a click event with its associated callback.
@@ -198,6 +301,12 @@ class Module(SettingsBase):
         Others        on_otherclick     > 5
         ============  ================  =========
 
+        If ``scroll_coalesce_timeout`` is set, scroll events of the same
+        direction arriving within that time are combined into a single call
+        of the callback, which receives the number of events as ``count``
+        argument (if it accepts one). Double scroll callbacks are not used
+        in this case.
+
         The action is determined by the nature (type and value) of the callback
         setting in the following order:
 
@@ -227,6 +336,11 @@ class Module(SettingsBase):
             self.__log_button_event(button, None, None, "Other button")
             action = "otherclick"
 
+        if self.coalesces(button):
+            cb = getattr(self, 'on_%s' % action, None)
+            self.__scroll_coalescer.add(button, cb, **kwargs)
+            return
+
         m_click = self.__multi_click
 
         with m_click.lock:
@@ -251,10 +365,10 @@ class Module(SettingsBase):
         self.position = position
         return self
 
-    def text_to_pango(self):
+    def text_to_pango(self, output=None):
         """
         Replaces all ampersands in `full_text` and `short_text` attributes of
-        `self.output` with `&amp;`.
+        `output` (`self.output` by default) with `&amp;`.
 
         It is called internally when pango markup is used.
 
@@ -270,28 +384,34 @@ class Module(SettingsBase):
                     out += "&amp;" + s[i + 1]
             return out
 
-        if "full_text" in self.output.keys():
-            self.output["full_text"] = replace(self.output["full_text"])
-        if "short_text" in self.output.keys():
-            self.output["short_text"] = replace(self.output["short_text"])
+        if output is None:
+            output = self.output
+        if "full_text" in output.keys():
+            output["full_text"] = replace(output["full_text"])
+        if "short_text" in output.keys():
+            output["short_text"] = replace(output["short_text"])
 
 
 class IntervalModule(Module):
     settings = (
         ("interval", "interval in seconds between module updates"),
+        ("update_timeout", "time in seconds after which a running update is considered hung "
+                           "and the output is marked as stale (None disables the timeout)"),
+        ("stale_indicator", "text appended to the output while it is stale"),
+        ("max_backoff", "maximum interval in seconds between updates while the module keeps "
+                        "raising exceptions (0 disables backoff, None uses the default of Status)"),
     )
     interval = 5  # seconds
-    managers = {}
+    update_timeout = None
+    stale_indicator = " (stale)"
+    max_backoff = None
+    scheduler = Scheduler()
 
     def registered(self, status_handler):
         super(IntervalModule, self).registered(status_handler)
-        if self.interval in IntervalModule.managers:
-            IntervalModule.managers[self.interval].append(self)
-        else:
-            am = Manager(self.interval)
-            am.append(self)
-            IntervalModule.managers[self.interval] = am
-            am.start()
+        IntervalModule.scheduler.append(self, self.interval, self.update_timeout,
+                                        self.max_backoff)
+        IntervalModule.scheduler.start()
 
     def __call__(self):
         self.run()
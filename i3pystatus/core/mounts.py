@@ -0,0 +1,226 @@
+"""
+Mount table and statvfs cache
+
+:py:class:`MountMonitor` keeps the mount table from
+/proc/self/mountinfo in memory. The kernel flags the file with POLLPRI
+whenever something is mounted or unmounted, so it is only parsed again
+after a change instead of asking the filesystem for every lookup.
+
+:py:func:`statvfs` caches the results of :py:func:`os.statvfs` and can
+call it with a timeout, so that a hanging network filesystem only blocks
+a helper thread instead of the caller.
+
+Linux only.
+"""
+
+import logging
+import os
+import re
+import select
+import threading
+import time
+from collections import namedtuple
+
+from i3pystatus.core import procfs
+
+log = logging.getLogger(__name__)
+
+#: Types of filesystems that may hang when their server is unreachable,
+#: in addition to all FUSE filesystems
+NETWORK_FILESYSTEMS = frozenset((
+    "9p", "afs", "ceph", "cifs", "coda", "davfs", "glusterfs", "ncpfs", "nfs", "nfs4", "smb3", "smbfs",
+))
+
+Mount = namedtuple("Mount", ["mount_point", "fstype", "source"])
+
+
+def is_network_filesystem(fstype):
+    return fstype in NETWORK_FILESYSTEMS or fstype == "fuse" or fstype.startswith("fuse.")
+
+
+def _unescape(field):
+    # mountinfo escapes space, tab, newline and backslash as octal
+    return re.sub(r"\\([0-7]{3})", lambda match: chr(int(match.group(1), 8)), field)
+
+
+def parse_mountinfo(text):
+    """ Return a dictionary of mount points to :py:class:`Mount` for the content of a mountinfo file. """
+    mounts = {}
+    for line in text.splitlines():
+        fields = line.split(" ")
+        try:
+            separator = fields.index("-", 6)
+            mount_point = _unescape(fields[4])
+            mounts[mount_point] = Mount(mount_point, fields[separator + 1], _unescape(fields[separator + 2]))
+        except (ValueError, IndexError):
+            continue
+    return mounts
+
+
+class MountMonitor:
+    """
+    Keeps the mount table up to date
+
+    Use :py:func:`get_monitor` to get the shared instance.
+
+    :param path: Path of the mountinfo file
+    """
+
+    def __init__(self, path="/proc/self/mountinfo"):
+        self.file = procfs.ProcFile(path)
+        # polled for changes; never reopened, unlike the descriptor of file
+        self.poll_fd = None
+        self.mounts = {}
+        self.callbacks = []
+        self.thread = threading.Thread(target=self.watch, name="mounts")
+        self.thread.daemon = True
+
+    def subscribe(self, callback):
+        """ Call `callback` without arguments after every change of the mount table. """
+        self.callbacks.append(callback)
+
+    def start(self):
+        self.poll_fd = os.open(self.file.path, os.O_RDONLY | os.O_CLOEXEC)
+        self.update()
+        self.thread.start()
+
+    def update(self):
+        with self.file.lock:
+            self.mounts = parse_mountinfo(self.file.buffer[:self.file.read()].decode(errors="replace"))
+
+    def watch(self):
+        poller = select.poll()
+        poller.register(self.poll_fd, select.POLLPRI | select.POLLERR)
+        while True:
+            poller.poll()
+            self.update()
+            for callback in self.callbacks:
+                try:
+                    callback()
+                except Exception:
+                    log.exception("Mount table subscriber failed")
+
+    def is_mounted(self, path):
+        """ Whether `path` is a mount point. """
+        return os.path.abspath(path) in self.mounts
+
+    def find_mount(self, path):
+        """ Return the :py:class:`Mount` containing `path`, or None. """
+        path = os.path.abspath(path)
+        mounts = self.mounts
+        while True:
+            if path in mounts:
+                return mounts[path]
+            parent = os.path.dirname(path)
+            if parent == path:
+                return None
+            path = parent
+
+
+class CachedStatvfs:
+    """
+    The last result of :py:func:`os.statvfs` for a path
+
+    :param path: Path passed to statvfs
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.result = None
+        self.error = None
+        self.timestamp = None
+        self.pending = None
+        self.started = None
+        self.lock = threading.Lock()
+
+    def refresh(self):
+        try:
+            result, error = os.statvfs(self.path), None
+        except OSError as e:
+            result, error = None, e
+        with self.lock:
+            self.result, self.error = result, error
+            self.timestamp = time.monotonic()
+            pending, self.pending = self.pending, None
+        if pending:
+            pending.set()
+
+    def invalidate(self):
+        """ Make the next :py:meth:`get` call statvfs again, unless a call is still pending. """
+        with self.lock:
+            self.timestamp = None
+
+    def get(self, max_age=0, timeout=None):
+        """
+        Return the result of statvfs, calling it again if the last result
+        is older than `max_age` seconds.
+
+        :param timeout: Call statvfs in a separate thread and raise
+            :py:exc:`TimeoutError` if it doesn't return within `timeout`
+            seconds. Only one thread per path is started; while it hangs,
+            later calls wait for the same thread, but no longer than
+            `timeout` seconds after it started. Once it has hung that long,
+            they raise right away.
+        """
+        with self.lock:
+            now = time.monotonic()
+            fresh = self.timestamp is not None and now - self.timestamp <= max_age
+            if not fresh and timeout is not None and self.pending is None:
+                self.pending = threading.Event()
+                self.started = now
+                thread = threading.Thread(target=self.refresh, name="statvfs")
+                thread.daemon = True
+                thread.start()
+            pending, started = self.pending, self.started
+        if not fresh:
+            if timeout is None:
+                self.refresh()
+            else:
+                remaining = started + timeout - now
+                if remaining <= 0 or not pending.wait(remaining):
+                    raise TimeoutError("statvfs({}) timed out".format(self.path))
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+_monitor = None
+_monitor_lock = threading.Lock()
+_cache = {}
+
+
+def get_monitor():
+    """
+    Return the shared :py:class:`MountMonitor`, starting it on first use.
+
+    :raises OSError: if the mount table can't be read
+    """
+    global _monitor
+    with _monitor_lock:
+        if _monitor is None:
+            monitor = MountMonitor()
+            monitor.start()
+            monitor.subscribe(_invalidate_cache)
+            _monitor = monitor
+        return _monitor
+
+
+def _invalidate_cache():
+    # entries are kept, so that a call hanging on a dead mount isn't started again
+    for entry in list(_cache.values()):
+        entry.invalidate()
+
+
+def statvfs(path, max_age=0, timeout=None):
+    """
+    Return :py:func:`os.statvfs` of `path`, from the cache if the cached
+    result is at most `max_age` seconds old. Cached results are discarded
+    whenever the mount table changes.
+
+    See :py:meth:`CachedStatvfs.get` for `timeout`.
+    """
+    try:
+        entry = _cache[path]
+    except KeyError:
+        entry = _cache.setdefault(path, CachedStatvfs(path))
+    return entry.get(max_age, timeout)
@@ -0,0 +1,335 @@
+"""
+Network state from rtnetlink
+
+:py:class:`NetlinkMonitor` subscribes to the kernel's link, address and
+route notifications and keeps the state of all interfaces in memory, so
+that it can be queried without any system calls. Subscribers are called
+whenever the state changed.
+
+Linux only.
+"""
+
+import errno
+import ipaddress
+import logging
+import socket
+import struct
+import threading
+import time
+from collections import namedtuple
+
+log = logging.getLogger(__name__)
+
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+
+RTM_NEWLINK = 16
+RTM_DELLINK = 17
+RTM_GETLINK = 18
+RTM_NEWADDR = 20
+RTM_DELADDR = 21
+RTM_GETADDR = 22
+RTM_NEWROUTE = 24
+RTM_DELROUTE = 25
+RTM_GETROUTE = 26
+
+NLM_F_REQUEST = 0x1
+NLM_F_DUMP = 0x300
+
+RTMGRP_LINK = 0x1
+RTMGRP_IPV4_IFADDR = 0x10
+RTMGRP_IPV4_ROUTE = 0x40
+RTMGRP_IPV6_IFADDR = 0x100
+RTMGRP_IPV6_ROUTE = 0x400
+
+IFLA_ADDRESS = 1
+IFLA_IFNAME = 3
+IFLA_OPERSTATE = 16
+IFA_ADDRESS = 1
+IFA_LOCAL = 2
+RTA_OIF = 4
+RTA_PRIORITY = 6
+RTA_TABLE = 15
+
+RT_TABLE_MAIN = 254
+RTN_UNICAST = 1
+
+#: Operational states as in /sys/class/net/<interface>/operstate
+OPERSTATES = ("unknown", "notpresent", "down", "lowerlayerdown", "testing", "dormant", "up")
+
+#: Seconds to wait before requesting the state again after an error
+RETRY_DELAY = 5
+
+NLMSGHDR = struct.Struct("=LHHLL")
+IFINFOMSG = struct.Struct("=BxHiII")
+IFADDRMSG = struct.Struct("=BBBBi")
+RTMSG = struct.Struct("=BBBBBBBBI")
+RTATTR = struct.Struct("=HH")
+
+Link = namedtuple("Link", ["index", "name", "operstate", "mac"])
+Address = namedtuple("Address", ["index", "family", "address", "prefixlen"])
+Route = namedtuple("Route", ["family", "oif", "priority"])
+
+
+def _align(length):
+    return (length + 3) & ~3
+
+
+def parse_attributes(data, offset, end):
+    """ Return the rtattrs in ``data[offset:end]`` as dictionary of type to raw value. """
+    attributes = {}
+    while offset + RTATTR.size <= end:
+        length, kind = RTATTR.unpack_from(data, offset)
+        if length < RTATTR.size:
+            break
+        attributes[kind] = bytes(data[offset + RTATTR.size:offset + length])
+        offset += _align(length)
+    return attributes
+
+
+def parse_message(kind, data, offset, end):
+    """
+    Decode the payload of a single rtnetlink message.
+
+    :returns: :py:class:`Link`, :py:class:`Address` or :py:class:`Route`,
+        or None for messages that are not of interest (e.g. routes other
+        than default routes of the main table)
+    """
+    if kind in (RTM_NEWLINK, RTM_DELLINK):
+        _, _, index, _, _ = IFINFOMSG.unpack_from(data, offset)
+        attributes = parse_attributes(data, offset + IFINFOMSG.size, end)
+        name = attributes.get(IFLA_IFNAME, b"").rstrip(b"\0").decode()
+        operstate = attributes.get(IFLA_OPERSTATE, b"\0")[0]
+        mac = ":".join("%02x" % byte for byte in attributes.get(IFLA_ADDRESS, b""))
+        return Link(index, name, OPERSTATES[operstate] if operstate < len(OPERSTATES) else "unknown", mac)
+    elif kind in (RTM_NEWADDR, RTM_DELADDR):
+        family, prefixlen, _, _, index = IFADDRMSG.unpack_from(data, offset)
+        attributes = parse_attributes(data, offset + IFADDRMSG.size, end)
+        # IFA_ADDRESS is the peer on point-to-point links, IFA_LOCAL the own address
+        raw = attributes.get(IFA_LOCAL) or attributes.get(IFA_ADDRESS)
+        if raw is None or family not in (socket.AF_INET, socket.AF_INET6):
+            return None
+        return Address(index, family, socket.inet_ntop(family, raw), prefixlen)
+    elif kind in (RTM_NEWROUTE, RTM_DELROUTE):
+        family, dst_len, _, _, table, _, _, route_type, _ = RTMSG.unpack_from(data, offset)
+        attributes = parse_attributes(data, offset + RTMSG.size, end)
+        if RTA_TABLE in attributes:
+            table = struct.unpack("=I", attributes[RTA_TABLE])[0]
+        if dst_len != 0 or table != RT_TABLE_MAIN or route_type != RTN_UNICAST or RTA_OIF not in attributes:
+            return None
+        priority = struct.unpack("=I", attributes[RTA_PRIORITY])[0] if RTA_PRIORITY in attributes else 0
+        return Route(family, struct.unpack("=i", attributes[RTA_OIF])[0], priority)
+    return None
+
+
+def parse_messages(data):
+    """
+    Split a datagram received from a netlink socket into messages.
+
+    :returns: List of ``(type, seq, payload)`` tuples, payload being the
+        result of :py:func:`parse_message`, or the error code for
+        NLMSG_ERROR messages.
+    """
+    messages = []
+    offset = 0
+    while offset + NLMSGHDR.size <= len(data):
+        length, kind, _, seq, _ = NLMSGHDR.unpack_from(data, offset)
+        if length < NLMSGHDR.size or offset + length > len(data):
+            break
+        start = offset + NLMSGHDR.size
+        if kind == NLMSG_ERROR:
+            payload = -struct.unpack_from("=i", data, start)[0]
+        else:
+            payload = parse_message(kind, data, start, offset + length)
+        messages.append((kind, seq, payload))
+        offset += _align(length)
+    return messages
+
+
+class NetlinkState:
+    """
+    Links, addresses and default routes known from rtnetlink messages
+    """
+
+    def __init__(self):
+        self.links = {}
+        self.addresses = {}
+        self.routes = set()
+        self.lock = threading.Lock()
+
+    def apply(self, kind, payload):
+        """ Update the state with a parsed message, returns whether anything changed. """
+        if payload is None:
+            return False
+        with self.lock:
+            if kind == RTM_NEWLINK:
+                changed = self.links.get(payload.index) != payload
+                self.links[payload.index] = payload
+            elif kind == RTM_DELLINK:
+                changed = self.links.pop(payload.index, None) is not None
+                self.addresses.pop(payload.index, None)
+            elif kind == RTM_NEWADDR:
+                addresses = self.addresses.setdefault(payload.index, [])
+                changed = payload not in addresses
+                if changed:
+                    addresses.append(payload)
+            elif kind == RTM_DELADDR:
+                addresses = self.addresses.get(payload.index, [])
+                changed = payload in addresses
+                if changed:
+                    addresses.remove(payload)
+            elif kind == RTM_NEWROUTE:
+                changed = payload not in self.routes
+                self.routes.add(payload)
+            elif kind == RTM_DELROUTE:
+                changed = payload in self.routes
+                self.routes.discard(payload)
+            else:
+                changed = False
+        return changed
+
+    def find_link(self, name):
+        for link in list(self.links.values()):
+            if link.name == name:
+                return link
+
+    def interfaces(self):
+        """ Names of all interfaces, ordered by index. """
+        return [link.name for index, link in sorted(self.links.items())]
+
+    def operstate(self, name):
+        """ Operational state of the interface `name`, or None if it doesn't exist. """
+        link = self.find_link(name)
+        return link.operstate if link else None
+
+    def ifaddresses(self, name):
+        """
+        Addresses of the interface `name` in the format of
+        :py:func:`netifaces.ifaddresses`.
+        """
+        link = self.find_link(name)
+        if link is None:
+            return {}
+        info = {}
+        if link.mac:
+            info[socket.AF_PACKET] = [{"addr": link.mac}]
+        for address in list(self.addresses.get(link.index, ())):
+            if address.family == socket.AF_INET:
+                netmask = str(ipaddress.IPv4Network((0, address.prefixlen)).netmask)
+            else:
+                netmask = "{}/{}".format(ipaddress.IPv6Network((0, address.prefixlen)).netmask, address.prefixlen)
+            info.setdefault(address.family, []).append({"addr": address.address, "netmask": netmask})
+        return info
+
+    def default_interface(self, family):
+        """ Interface of the default route of `family` with the lowest metric, or None. """
+        routes = [route for route in list(self.routes) if route.family == family]
+        for route in sorted(routes, key=lambda route: route.priority):
+            link = self.links.get(route.oif)
+            if link:
+                return link.name
+
+
+class NetlinkMonitor:
+    """
+    Keeps a :py:class:`NetlinkState` up to date from rtnetlink notifications
+
+    Use :py:func:`get_monitor` to get the shared instance.
+    """
+
+    groups = RTMGRP_LINK | RTMGRP_IPV4_IFADDR | RTMGRP_IPV6_IFADDR | RTMGRP_IPV4_ROUTE | RTMGRP_IPV6_ROUTE
+
+    def __init__(self):
+        self.state = NetlinkState()
+        self.callbacks = []
+        self.seq = 0
+        self.sock = None
+        self.thread = threading.Thread(target=self.listen, name="netlink")
+        self.thread.daemon = True
+
+    def subscribe(self, callback):
+        """ Call `callback` without arguments after every change of the state. """
+        self.callbacks.append(callback)
+
+    def start(self):
+        self.sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+        self.sock.bind((0, self.groups))
+        self.state = self.dump()
+        self.thread.start()
+
+    def dump(self):
+        """
+        Request the complete state from the kernel, returns it as a new
+        :py:class:`NetlinkState` so that readers keep the old state meanwhile.
+
+        Notifications received in between the replies are applied after the
+        dump, in the order they arrived.
+        """
+        state = NetlinkState()
+        notifications = []
+        for kind in (RTM_GETLINK, RTM_GETADDR, RTM_GETROUTE):
+            self.seq += 1
+            # struct rtgenmsg, padded to four bytes
+            payload = struct.pack("=Bxxx", socket.AF_UNSPEC)
+            self.sock.send(NLMSGHDR.pack(NLMSGHDR.size + len(payload), kind, NLM_F_REQUEST | NLM_F_DUMP,
+                                         self.seq, 0) + payload)
+            done = False
+            while not done:
+                for message_kind, seq, payload in parse_messages(self.sock.recv(65536)):
+                    if seq != self.seq:
+                        notifications.append((message_kind, payload))
+                    elif message_kind in (NLMSG_DONE, NLMSG_ERROR):
+                        done = True
+                    else:
+                        state.apply(message_kind, payload)
+        for message_kind, payload in notifications:
+            state.apply(message_kind, payload)
+        return state
+
+    def listen(self):
+        resync = False
+        while True:
+            try:
+                if resync:
+                    self.state = self.dump()
+                    resync = False
+                    self.notify()
+                self.receive()
+            except Exception as e:
+                if isinstance(e, OSError) and e.errno == errno.ENOBUFS:
+                    # notifications were lost, start over
+                    log.warning("Lost netlink notifications, requesting full state")
+                else:
+                    log.exception("Reading netlink notifications failed, retrying in {}s".format(RETRY_DELAY))
+                    time.sleep(RETRY_DELAY)
+                resync = True
+
+    def receive(self):
+        changed = False
+        for kind, seq, payload in parse_messages(self.sock.recv(65536)):
+            changed |= self.state.apply(kind, payload)
+        if changed:
+            self.notify()
+
+    def notify(self):
+        for callback in self.callbacks:
+            try:
+                callback()
+            except Exception:
+                log.exception("Netlink subscriber failed")
+
+
+_monitor = None
+_monitor_lock = threading.Lock()
+
+
+def get_monitor():
+    """ Return the shared :py:class:`NetlinkMonitor`, starting it on first use. """
+    global _monitor
+    with _monitor_lock:
+        if _monitor is None:
+            monitor = NetlinkMonitor()
+            monitor.start()
+            _monitor = monitor
+        return _monitor
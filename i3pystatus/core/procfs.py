@@ -0,0 +1,293 @@
+"""
+Readers for files in /proc
+
+Files are opened once and kept open. Every read re-reads the file from the
+start with :py:func:`os.preadv` into a buffer owned by the file, which is
+reused (and only grown when the file does not fit into it anymore), and the
+parsers only extract the fields they need from that buffer.
+
+All functions take the path of the file as an optional argument, so that
+modules can keep offering a setting for it and tests can point them to
+fixtures.
+
+Linux only.
+"""
+
+import os
+import re
+from array import array
+from collections import namedtuple
+from threading import Lock, RLock
+
+CpuTotals = namedtuple("CpuTotals", ["names", "total", "busy"])
+LoadAvg = namedtuple("LoadAvg", ["avg1", "avg5", "avg15", "tasks"])
+VirtualMemory = namedtuple("VirtualMemory", ["total", "available", "percent", "used", "free"])
+SwapMemory = namedtuple("SwapMemory", ["total", "used", "free", "percent"])
+MemInfo = namedtuple("MemInfo", ["memory", "swap"])
+NetCounters = namedtuple("NetCounters", ["bytes_recv", "packets_recv", "bytes_sent", "packets_sent"])
+DiskStats = namedtuple("DiskStats", ["names", "counters"])
+
+#: Counters per device returned by :py:func:`diskstats`: reads completed,
+#: sectors read, milliseconds spent reading, writes completed, sectors
+#: written, milliseconds spent writing and milliseconds spent doing I/O
+DISKSTATS_FIELDS = 7
+
+
+class ProcFile:
+    """
+    Persistent handle on a file in /proc
+
+    Use :py:func:`get_file` instead of creating instances directly, so that
+    all readers of a file share one descriptor and buffer.
+
+    The content of the buffer is only valid while :py:attr:`lock` is held.
+
+    :param path: Path of the file
+    :param size: Initial size of the buffer
+    """
+
+    def __init__(self, path, size=4096):
+        self.path = path
+        self.fd = None
+        self.buffer = bytearray(size)
+        self.lock = RLock()
+
+    def open(self):
+        self.fd = os.open(self.path, os.O_RDONLY | os.O_CLOEXEC)
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def grow(self):
+        self.buffer.extend(bytes(len(self.buffer)))
+
+    def pread(self):
+        if hasattr(os, "preadv"):
+            return os.preadv(self.fd, [self.buffer], 0)
+        data = os.pread(self.fd, len(self.buffer), 0)
+        self.buffer[:len(data)] = data
+        return len(data)
+
+    def read(self, partial=False):
+        """
+        Re-read the file into :py:attr:`buffer`.
+
+        The descriptor is reopened once if reading fails, e.g. because the
+        file was replaced.
+
+        :param partial: Only read as much as fits into the buffer instead of
+            growing it until the whole file fits.
+        :returns: Number of valid bytes in the buffer
+        """
+        if self.fd is None:
+            self.open()
+        try:
+            length = self.pread()
+        except OSError:
+            self.close()
+            self.open()
+            length = self.pread()
+        while not partial and length == len(self.buffer):
+            self.grow()
+            length = self.pread()
+        return length
+
+    def read_bytes(self):
+        """ Return the whole content of the file as bytes. """
+        with self.lock:
+            return bytes(self.buffer[:self.read()])
+
+    def __repr__(self):
+        return "<ProcFile {}>".format(self.path)
+
+
+_files = {}
+_files_lock = Lock()
+
+
+def get_file(path):
+    """ Return the shared :py:class:`ProcFile` for `path`. """
+    try:
+        return _files[path]
+    except KeyError:
+        with _files_lock:
+            return _files.setdefault(path, ProcFile(path))
+
+
+def _find_line(buffer, key, end):
+    """ Return the index right after `key` at the start of a line, or -1. """
+    index = buffer.find(key, 0, end)
+    while index > 0 and buffer[index - 1] != 0x0A:
+        index = buffer.find(key, index + 1, end)
+    return -1 if index < 0 else index + len(key)
+
+
+def cpu_times(path="/proc/stat"):
+    """
+    Return the times of the ``cpu*`` lines of /proc/stat as a dictionary
+    mapping the name of the line ("cpu", "cpu0", ...) to a tuple of ints
+    in USER_HZ.
+
+    Only the beginning of the file holding these lines is read.
+    """
+    file = get_file(path)
+    with file.lock:
+        while True:
+            end = file.read(partial=True)
+            buffer = file.buffer
+            times = {}
+            position = 0
+            while buffer.startswith(b"cpu", position, end):
+                newline = buffer.find(b"\n", position, end)
+                if newline < 0:
+                    break
+                fields = buffer[position:newline].split()
+                times[fields[0].decode()] = tuple(map(int, fields[1:]))
+                position = newline + 1
+            else:
+                if end - position >= len(b"cpu"):
+                    # reached the first line after the cpu lines
+                    return times
+            if end < len(buffer):
+                return times
+            file.grow()
+
+
+def cpu_totals(path="/proc/stat"):
+    """
+    Return the ``cpu*`` lines of /proc/stat as :py:class:`CpuTotals`: a
+    tuple of their names in file order (the aggregate "cpu" line first)
+    and signed 64 bit arrays of their total and busy (everything but idle
+    and iowait) time in the same order.
+    """
+    times = cpu_times(path)
+    total = array("q", map(sum, times.values()))
+    busy = array("q", (line_total - sum(line[3:5]) for line_total, line in zip(total, times.values())))
+    return CpuTotals(tuple(times), total, busy)
+
+
+def meminfo(path="/proc/meminfo"):
+    """
+    Return memory and swap usage in bytes as :py:class:`MemInfo`, using
+    the same formulas as psutil.
+    """
+    file = get_file(path)
+    with file.lock:
+        end = file.read()
+        buffer = file.buffer
+
+        def field(key):
+            index = _find_line(buffer, key, end)
+            if index < 0:
+                return None
+            return int(buffer[index:buffer.find(b"k", index, end)]) * 1024
+
+        total = field(b"MemTotal:")
+        free = field(b"MemFree:")
+        available = field(b"MemAvailable:")
+        if not available:
+            # kernels before 3.14 don't have MemAvailable
+            available = free + (field(b"Buffers:") or 0) + (field(b"Cached:") or 0)
+        swap_total = field(b"SwapTotal:") or 0
+        swap_free = field(b"SwapFree:") or 0
+
+    if available < 0:
+        available = 0
+    elif available > total:
+        # running in a container with distorted values
+        available = free
+
+    swap_used = swap_total - swap_free
+    return MemInfo(
+        VirtualMemory(total, available, _percent(total - available, total), total - available, free),
+        SwapMemory(swap_total, swap_used, swap_free, _percent(swap_used, swap_total)),
+    )
+
+
+def _percent(used, total):
+    try:
+        return round(used / total * 100, 1)
+    except ZeroDivisionError:
+        return 0.0
+
+
+def loadavg(path="/proc/loadavg"):
+    """ Return the load averages and task counts as strings in a :py:class:`LoadAvg`. """
+    avg1, avg5, avg15, tasks = get_file(path).read_bytes().decode().split(" ", 4)[:4]
+    return LoadAvg(avg1, avg5, avg15, tasks)
+
+
+def uptime(path="/proc/uptime"):
+    """ Return the uptime in seconds as float. """
+    file = get_file(path)
+    with file.lock:
+        end = file.read()
+        return float(file.buffer[:file.buffer.find(b" ", 0, end)])
+
+
+def file_nr(path="/proc/sys/fs/file-nr"):
+    """ Return the number of allocated, unused and maximum file handles. """
+    file = get_file(path)
+    with file.lock:
+        end = file.read()
+        return tuple(map(int, file.buffer[:end].split()[:3]))
+
+
+def cpu_mhz(path="/proc/cpuinfo"):
+    """ Return the current frequency of all cores in /proc/cpuinfo in MHz. """
+    file = get_file(path)
+    values = []
+    with file.lock:
+        end = file.read()
+        buffer = file.buffer
+        index = _find_line(buffer, b"cpu MHz", end)
+        while index >= 0:
+            colon = buffer.find(b":", index, end)
+            newline = buffer.find(b"\n", colon, end)
+            values.append(float(buffer[colon + 1:newline if newline >= 0 else end]))
+            if newline < 0:
+                break
+            index = buffer.find(b"\ncpu MHz", newline, end)
+            if index >= 0:
+                index += len(b"\ncpu MHz")
+    return values
+
+
+def diskstats_pattern(devices):
+    """
+    Compile the regular expression `devices` matching whole device names
+    into a pattern for :py:func:`diskstats`.
+    """
+    # major minor name, then the counters; only the ones in DISKSTATS_FIELDS are captured
+    return re.compile(rb"^ *\d+ +\d+ ((?:" + devices.encode() + rb")) (\d+) \d+ (\d+) (\d+) (\d+) \d+ (\d+) (\d+) \d+ (\d+)",
+                      re.MULTILINE)
+
+
+def diskstats(pattern, counters=None, path="/proc/diskstats"):
+    """
+    Return the counters of the devices in /proc/diskstats matching the
+    compiled `pattern` (see :py:func:`diskstats_pattern`) as
+    :py:class:`DiskStats`: a tuple of the device names in file order and
+    an array with :py:data:`DISKSTATS_FIELDS` counters per device.
+
+    The lines of other devices are skipped by the regular expression engine
+    without being split or converted.
+
+    :param counters: Array to store the counters in, reused if it has the
+        right size.
+    """
+    file = get_file(path)
+    with file.lock:
+        end = file.read()
+        matches = list(pattern.finditer(file.buffer, 0, end))
+        size = len(matches) * DISKSTATS_FIELDS
+        if counters is None or len(counters) != size:
+            counters = array("q", bytes(size * 8))
+        index = 0
+        for match in matches:
+            for value in match.groups()[-DISKSTATS_FIELDS:]:
+                counters[index] = int(value)
+                index += 1
+        return DiskStats(tuple(match.group(1).decode() for match in matches), counters)
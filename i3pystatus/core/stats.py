@@ -0,0 +1,142 @@
+import errno
+import json
+import logging
+import os
+import socket
+import stat
+from threading import Lock, Thread
+
+log = logging.getLogger(__name__)
+
+
+class Histogram:
+    """
+    Fixed-size histogram of durations in seconds
+
+    Values are counted in exponentially growing buckets, the first one
+    covering everything up to `base` seconds and each following bucket
+    doubling the bound of its predecessor. Memory usage does not depend on
+    the number of recorded values, percentiles are accurate to the bucket
+    bounds.
+
+    :param base: Upper bound of the first bucket
+    :param buckets: Number of buckets
+    """
+
+    def __init__(self, base=0.0001, buckets=24):
+        self.bounds = [base * 2 ** i for i in range(buckets)]
+        self.counts = [0] * buckets
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.lock = Lock()
+
+    def add(self, value):
+        index = 0
+        last = len(self.bounds) - 1
+        while index < last and value > self.bounds[index]:
+            index += 1
+        with self.lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += value
+            self.max = max(self.max, value)
+
+    def percentile(self, percent):
+        """
+        :returns: Upper bound of the bucket containing the given percentile,
+            but never more than the largest recorded value
+        """
+        with self.lock:
+            if not self.count:
+                return 0.0
+            rank = self.count * percent / 100
+            seen = 0
+            for bound, count in zip(self.bounds, self.counts):
+                seen += count
+                if seen >= rank:
+                    return min(bound, self.max)
+            return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "max": self.max,
+        }
+
+
+def format_stats(stats):
+    """
+    Format the statistics returned by :py:meth:`.Scheduler.stats` as a
+    human readable table, one module per line, slowest first.
+    """
+
+    def ms(seconds):
+        return "%.1fms" % (seconds * 1000)
+
+    lines = []
+    for job in sorted(stats, key=lambda job: job["duration"]["p95"], reverse=True):
+        lines.append(
+            "{module} interval={interval}s runs={runs} errors={errors} overruns={overruns} "
+            "p50={p50} p95={p95} max={max} delay_p95={delay}{backoff}{stale_flag}".format(
+                p50=ms(job["duration"]["p50"]),
+                p95=ms(job["duration"]["p95"]),
+                max=ms(job["duration"]["max"]),
+                delay=ms(job["queue_delay"]["p95"]),
+                backoff=" backoff=%ss" % job["effective_interval"] if job["failures"] else "",
+                stale_flag=" stale" if job["stale"] else "",
+                **job))
+    return "\n".join(lines)
+
+
+def log_stats(scheduler):
+    """ Write the statistics of `scheduler` to the log. """
+    log.critical("Scheduler statistics:\n%s", format_stats(scheduler.stats()))
+
+
+class StatsServer:
+    """
+    Serves scheduler statistics as JSON on a UNIX socket
+
+    Every connection receives a single JSON document followed by a newline,
+    after which the connection is closed, e.g.::
+
+        socat - UNIX-CONNECT:/run/user/1000/i3pystatus.sock
+
+    :param path: Path of the socket, an existing socket file is replaced
+    :raises FileExistsError: on :py:meth:`start` if `path` exists and isn't a socket
+    :param scheduler: :py:class:`.Scheduler` to report on
+    """
+
+    def __init__(self, path, scheduler):
+        self.path = os.path.expandvars(os.path.expanduser(path))
+        self.scheduler = scheduler
+        self.thread = Thread(target=self.serve, name="stats")
+        self.thread.daemon = True
+
+    def start(self):
+        try:
+            mode = os.lstat(self.path).st_mode
+        except FileNotFoundError:
+            pass
+        else:
+            if not stat.S_ISSOCK(mode):
+                raise FileExistsError(errno.EEXIST, "Not a socket, refusing to replace it", self.path)
+            os.unlink(self.path)
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.bind(self.path)
+        self.sock.listen(4)
+        self.thread.start()
+
+    def serve(self):
+        while True:
+            conn, _ = self.sock.accept()
+            try:
+                conn.sendall(json.dumps(self.scheduler.stats()).encode() + b"\n")
+            except OSError:
+                log.exception("Failed to send statistics")
+            finally:
+                conn.close()
@@ -0,0 +1,149 @@
+"""
+Reader for sysfs attributes
+
+Attributes are opened once and re-read with :py:func:`os.pread`, which
+regenerates the value of a sysfs attribute without reopening it. Reads of
+an attribute are serialized, so that its descriptor isn't closed and
+reused by another thread while it is being read.
+
+When the device of an attribute goes away, reading its descriptor fails
+with ENODEV. The attribute is then reopened, which picks up a device that
+was plugged in again under the same path, or raises
+:py:exc:`FileNotFoundError` if there is none (yet). In that case the
+descriptor is closed and the attribute dropped from the shared ones. Paths outside of /sys
+and /proc are checked for having been replaced on every read, so ordinary
+files can be read through this module as well. Only sysfs attributes are
+limited to :py:data:`PAGE_SIZE`, everything else is read up to its end.
+"""
+
+import errno
+import os
+from threading import Lock
+
+#: Maximum size of a sysfs attribute
+PAGE_SIZE = 4096
+
+_RAISE = object()
+
+
+class Attribute:
+    """
+    Persistent handle on a sysfs attribute
+
+    Use :py:func:`get_attribute` instead of creating instances directly,
+    so that all readers of an attribute share one descriptor.
+
+    :param path: Path of the attribute
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.fd = None
+        self.inode = None
+        self.lock = Lock()
+        realpath = os.path.realpath(path)
+        self.check_replaced = not realpath.startswith(("/sys/", "/proc/"))
+        self.sysfs = realpath.startswith("/sys/")
+
+    def reopen(self):
+        """ Open the attribute again. Caller must hold :py:attr:`lock`. """
+        self.close()
+        self.fd = os.open(self.path, os.O_RDONLY | os.O_CLOEXEC)
+        if self.check_replaced:
+            self.inode = os.fstat(self.fd).st_ino
+
+    def close(self):
+        """ Close the descriptor. Caller must hold :py:attr:`lock`. """
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def read(self):
+        """ Return the current content of the attribute as string. """
+        # the descriptor is only used with the lock held, otherwise another
+        # thread could close it and its number be reused for a different file
+        with self.lock:
+            try:
+                if self.fd is None or self.check_replaced and os.stat(self.path).st_ino != self.inode:
+                    self.reopen()
+                try:
+                    data = self.pread(self.fd)
+                except OSError as e:
+                    if e.errno not in (errno.ENODEV, errno.EBADF):
+                        raise
+                    self.reopen()
+                    data = self.pread(self.fd)
+            except OSError as e:
+                if e.errno in (errno.ENOENT, errno.ENODEV):
+                    # the device is gone, don't keep its descriptor open
+                    self.close()
+                    _discard(self)
+                raise
+        return data.decode()
+
+    def pread(self, fd):
+        if self.sysfs:
+            return os.pread(fd, PAGE_SIZE, 0)
+        # Ordinary files report their size and are read at once, a short
+        # read means end of file. Files in /proc report 0 and return at most
+        # a page per read, possibly less before the end, so they are read
+        # until nothing is left.
+        reported = os.fstat(fd).st_size
+        size = max(reported + 1, PAGE_SIZE)
+        chunks = []
+        offset = 0
+        while True:
+            chunk = os.pread(fd, size, offset)
+            chunks.append(chunk)
+            offset += len(chunk)
+            if not chunk or reported and len(chunk) < size:
+                return b"".join(chunks)
+
+    def __repr__(self):
+        return "<Attribute {}>".format(self.path)
+
+
+_attributes = {}
+_attributes_lock = Lock()
+
+
+def _discard(attribute):
+    """ Remove `attribute` from the shared attributes, a later :py:func:`get_attribute` creates a new one. """
+    with _attributes_lock:
+        if _attributes.get(attribute.path) is attribute:
+            del _attributes[attribute.path]
+
+
+def get_attribute(path):
+    """ Return the shared :py:class:`Attribute` for `path`. """
+    try:
+        return _attributes[path]
+    except KeyError:
+        with _attributes_lock:
+            return _attributes.setdefault(path, Attribute(path))
+
+
+def read(path, default=_RAISE):
+    """
+    Return the content of the attribute at `path` as string.
+
+    :param default: Returned instead of raising :py:exc:`FileNotFoundError`
+        if the attribute doesn't exist
+    """
+    try:
+        return get_attribute(path).read()
+    except FileNotFoundError:
+        if default is _RAISE:
+            raise
+        return default
+
+
+def read_many(paths, default=_RAISE):
+    """
+    Return the contents of all attributes in `paths` as list of strings, in
+    the same order.
+
+    :param default: Used for attributes that don't exist instead of raising
+        :py:exc:`FileNotFoundError`
+    """
+    return [read(path, default) for path in paths]
@@ -1,9 +1,15 @@
+import collections
+import heapq
+import itertools
+import logging
+import queue
 import threading
 import time
 import sys
-from i3pystatus.core.util import partition
+from i3pystatus.core.stats import Histogram
 
 timer = time.perf_counter if hasattr(time, "perf_counter") else time.clock
+log = logging.getLogger(__name__)
 
 
 def unwrap_workload(workload):
@@ -13,40 +19,209 @@ def unwrap_workload(workload):
     return workload
 
 
-class Thread(threading.Thread):
-    def __init__(self, target_interval, workloads=None, start_barrier=1):
-        super().__init__()
-        self.workloads = workloads or []
-        self.target_interval = target_interval
-        self.start_barrier = start_barrier
-        self._suspended = threading.Event()
-        self.daemon = True
+class WorkerPool:
+    """
+    A fixed number of daemon threads executing tasks from a shared queue.
 
-    def __iter__(self):
-        return iter(self.workloads)
+    :param workers: Number of threads
+    :param name: Prefix for the thread names
+    """
 
-    def __len__(self):
-        return len(self.workloads)
+    def __init__(self, workers, name="worker"):
+        self.workers = workers
+        self.name = name
+        self.tasks = queue.Queue()
+        self.threads = []
+        self.retiring = set()
+        self.lock = threading.Lock()
+        self.counter = itertools.count()
 
-    def pop(self):
-        return self.workloads.pop()
+    def start(self):
+        while len(self.threads) < self.workers:
+            self.spawn()
+
+    def spawn(self):
+        thread = threading.Thread(target=self.work,
+                                  name="%s-%d" % (self.name, next(self.counter)))
+        thread.daemon = True
+        with self.lock:
+            self.threads.append(thread)
+        thread.start()
 
-    def append(self, workload):
-        self.workloads.append(workload)
+    def replace(self, thread):
+        """
+        Start a new worker in place of `thread`, which is busy with a task
+        that hangs. `thread` exits once that task returns.
+        """
+        with self.lock:
+            if thread not in self.threads or thread in self.retiring:
+                return
+            self.retiring.add(thread)
+        self.spawn()
+
+    def submit(self, task, *args):
+        self.tasks.put((task, args))
+
+    def work(self):
+        current = threading.current_thread()
+        while True:
+            task, args = self.tasks.get()
+            try:
+                task(*args)
+            except Exception:
+                log.exception("Exception in {}".format(current.name))
+            with self.lock:
+                if current in self.retiring:
+                    self.retiring.remove(current)
+                    self.threads.remove(current)
+                    return
+
+
+class SerialDispatcher:
+    """
+    Runs tasks on a :py:class:`WorkerPool` so that tasks submitted with the
+    same key run one after another in submission order, while tasks with
+    different keys run concurrently.
+
+    :param pool: The pool executing the tasks
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def submit(self, key, task, *args):
+        with self.lock:
+            if key in self.pending:
+                self.pending[key].append((task, args))
+                return
+            self.pending[key] = collections.deque()
+        self.pool.submit(self.drain, key, task, args)
+
+    def drain(self, key, task, args):
+        while True:
+            try:
+                task(*args)
+            except Exception:
+                log.exception("Exception in task for {!r}".format(key))
+            with self.lock:
+                if not self.pending[key]:
+                    del self.pending[key]
+                    return
+                task, args = self.pending[key].popleft()
+
+
+class Scheduler:
+    """
+    Runs all interval workloads from a single deadline-ordered queue.
+
+    A dispatcher thread sleeps until the earliest deadline and hands due
+    workloads to a :py:class:`WorkerPool`, so the number of threads does not
+    depend on the number of different intervals. A workload is only
+    rescheduled after its current run has finished.
+
+    A workload running longer than its timeout is marked stale and its worker
+    is replaced, so a hanging module does not take capacity away from the
+    other modules.
+
+    Consecutive failures of a workload double its interval, up to
+    `max_backoff` seconds, until it succeeds again.
+
+    :param workers: Number of threads executing workloads
+    :param max_backoff: Default upper bound of the interval of failing workloads (0 disables backoff)
+    """
+
+    def __init__(self, workers=4, max_backoff=300):
+        self.max_backoff = max_backoff
+        self.pool = WorkerPool(workers, "scheduler")
+        self.jobs = []
+        self.queue = []
+        self.counter = itertools.count()
+        self.cond = threading.Condition()
+        self.dispatcher = None
+        self._suspended = threading.Event()
+
+    def __repr__(self):
+        return "Scheduler"
 
     @property
-    def time(self):
-        return sum(map(lambda workload: workload.time, self))
+    def workers(self):
+        return self.pool.workers
+
+    @workers.setter
+    def workers(self, workers):
+        self.pool.workers = workers
+
+    def append(self, workload, interval, timeout=None, max_backoff=None):
+        if max_backoff is None:
+            max_backoff = self.max_backoff
+        job = Job(workload, interval, timeout, max_backoff)
+        with self.cond:
+            self.jobs.append(job)
+            self.schedule(job, timer())
+        return job
+
+    def call_at(self, deadline, function, *args):
+        """ Call function from the dispatcher at deadline. Caller must hold self.cond. """
+        heapq.heappush(self.queue, (deadline, next(self.counter), function, args))
+        self.cond.notify()
+
+    def schedule(self, job, deadline):
+        """ Queue job to be run at deadline. Caller must hold self.cond. """
+        self.call_at(deadline, self.dispatch, job, deadline)
 
-    def wait_for_start_barrier(self):
-        while len(self) <= self.start_barrier:
-            time.sleep(0.4)
+    def start(self):
+        if self.dispatcher is not None:
+            return
+        self.pool.start()
+        self.dispatcher = threading.Thread(target=self.run, name="scheduler")
+        self.dispatcher.daemon = True
+        self.dispatcher.start()
 
-    def execute_workloads(self):
-        for workload in self:
-            if self.should_execute(workload):
-                workload()
-        self.workloads.sort(key=lambda workload: workload.time)
+    def run(self):
+        with self.cond:
+            while True:
+                if not self.queue:
+                    self.cond.wait()
+                    continue
+                delay = self.queue[0][0] - timer()
+                if delay > 0:
+                    self.cond.wait(delay)
+                    continue
+                _, _, function, args = heapq.heappop(self.queue)
+                function(*args)
+
+    def dispatch(self, job, deadline):
+        if self.should_execute(job):
+            self.pool.submit(self.execute, job, deadline)
+        else:
+            self.schedule(job, deadline + job.interval)
+
+    def execute(self, job, deadline):
+        start = timer()
+        job.queue_delay.add(max(start - deadline, 0.0))
+        with self.cond:
+            job.begin()
+            if job.timeout:
+                self.call_at(start + job.timeout, self.check_timeout, job, job.runs)
+        job()
+        job.finish()
+        with self.cond:
+            self.schedule(job, start + job.effective_interval)
+
+    def stats(self):
+        """ :returns: A list with the statistics of every job """
+        with self.cond:
+            jobs = list(self.jobs)
+        return [job.stats() for job in jobs]
+
+    def check_timeout(self, job, run):
+        thread = job.expire(run)
+        if thread is not None:
+            self.pool.replace(thread)
+            # changing the output runs callbacks, which must not run under self.cond
+            self.pool.submit(job.mark_stale, run)
 
     def should_execute(self, workload):
         """
@@ -58,19 +233,6 @@ class Thread(threading.Thread):
         workload = unwrap_workload(workload)
         return hasattr(workload, 'keep_alive') and getattr(workload, 'keep_alive')
 
-    def run(self):
-        while self:
-            self.execute_workloads()
-            filltime = self.target_interval - self.time
-            if filltime > 0:
-                time.sleep(filltime)
-
-    def branch(self, vtime, bound):
-        if len(self) > 1 and vtime > bound:
-            remove = self.pop()
-            return [remove] + self.branch(vtime - remove.time, bound)
-        return []
-
     def suspend(self):
         self._suspended.set()
 
@@ -88,8 +250,10 @@ class Wrapper:
 
 class ExceptionWrapper(Wrapper):
     def __call__(self):
+        """ :returns: False if the workload raised an exception, True otherwise """
         try:
             self.workload()
+            return True
         except:
             message = "Exception in {thread} at {time}, module {name}".format(
                 thread=threading.current_thread().name,
@@ -102,6 +266,7 @@ class ExceptionWrapper(Wrapper):
                 "full_text": self.format_exception(),
                 "color": "#FF0000",
             }
+            return False
 
     def format_exception(self):
         type, value, _ = sys.exc_info()
@@ -124,54 +289,129 @@ class WorkloadWrapper(Wrapper):
 
     def __call__(self):
         tp1 = timer()
-        self.workload()
+        result = self.workload()
         self.time = timer() - tp1
-
-
-class Manager:
-    def __init__(self, target_interval):
-        self.target_interval = target_interval
-        self.upper_bound = target_interval * 1.1
-        self.lower_bound = target_interval * 0.7
-
-        initial_thread = Thread(target_interval, [self.wrap(self)])
-        self.threads = [initial_thread]
+        return result
+
+
+class Job(WorkloadWrapper):
+    """
+    A workload scheduled by :py:class:`Scheduler` every `interval` seconds.
+
+    If a run takes longer than `timeout` seconds the job is marked stale
+    and the `stale_indicator` of the workload is appended to its output
+    until that run returns. After consecutive failures the interval is
+    doubled per failure, but not beyond `max_backoff` seconds.
+    """
+
+    runs = 0
+    errors = 0
+    failures = 0
+    overruns = 0
+    running = False
+    stale = False
+    thread = None
+    replaced = None
+
+    def __init__(self, workload, interval, timeout=None, max_backoff=0):
+        super().__init__(ExceptionWrapper(workload))
+        self.lock = threading.Lock()
+        self.interval = interval
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self.durations = Histogram()
+        self.queue_delay = Histogram()
 
     def __call__(self):
-        separate = []
-        for thread in self.threads:
-            separate.extend(thread.branch(thread.time, self.upper_bound))
-        self.create_threads(self.partition_workloads(separate))
-
-    def __repr__(self):
-        return "Manager"
-
-    def wrap(self, workload):
-        return WorkloadWrapper(ExceptionWrapper(workload))
-
-    def partition_workloads(self, workloads):
-        return partition(workloads, self.lower_bound, lambda workload: workload.time)
-
-    def create_threads(self, threads):
-        for workloads in threads:
-            self.create_thread(workloads)
-
-    def create_thread(self, workloads):
-        thread = Thread(self.target_interval, workloads, start_barrier=0)
-        thread.start()
-        self.threads.append(thread)
-
-    def append(self, workload):
-        self.threads[0].append(self.wrap(workload))
-
-    def start(self):
-        for thread in self.threads:
-            thread.start()
-
-    def suspend(self):
-        for thread in self.threads:
-            thread.suspend()
+        if super().__call__():
+            self.failures = 0
+        else:
+            self.errors += 1
+            self.failures += 1
+            if self.effective_interval > self.interval:
+                self.show_backoff()
+        self.durations.add(self.time)
+        if self.time > self.interval:
+            self.overruns += 1
 
-    def resume(self):
-        for thread in self.threads:
-            thread.resume()
+    @property
+    def effective_interval(self):
+        """ The interval until the next run, taking backoff into account. """
+        if not self.failures or not self.max_backoff:
+            return self.interval
+        backoff = self.interval * 2 ** min(self.failures, 32)
+        return min(backoff, max(self.max_backoff, self.interval))
+
+    def stats(self):
+        workload = unwrap_workload(self)
+        return {
+            "module": getattr(workload, "__name__", workload.__class__.__name__),
+            "instance": str(id(workload)),
+            "interval": self.interval,
+            "effective_interval": self.effective_interval,
+            "runs": self.runs,
+            "errors": self.errors,
+            "failures": self.failures,
+            "overruns": self.overruns,
+            "stale": self.stale,
+            "duration": self.durations.summary(),
+            "queue_delay": self.queue_delay.summary(),
+        }
+
+    def show_backoff(self):
+        workload = unwrap_workload(self)
+        output = workload.output
+        workload.output = dict(output, full_text="{} (retry in {:.0f}s)".format(
+            output["full_text"], self.effective_interval))
+
+    def begin(self):
+        with self.lock:
+            self.runs += 1
+            self.running = True
+            self.thread = threading.current_thread()
+
+    def finish(self):
+        with self.lock:
+            self.running = False
+            self.stale = False
+            self.thread = None
+            replaced, self.replaced = self.replaced, None
+        if replaced:
+            self.restore(*replaced)
+
+    def expire(self, run):
+        """ Mark `run` stale if it is still running, returns the thread running it or None. """
+        with self.lock:
+            if not self.running or self.runs != run:
+                return None
+            self.stale = True
+            return self.thread
+
+    def mark_stale(self, run):
+        """
+        Flag the output of the hanging workload as outdated. The output is
+        restored by :py:meth:`finish` unless the run replaces it.
+        """
+        workload = unwrap_workload(self)
+        if hasattr(workload, "logger"):
+            workload.logger.warning("Module {name} exceeded its timeout of {timeout}s".format(
+                name=workload.__class__.__name__, timeout=self.timeout))
+        output = getattr(workload, "output", None)
+        stale_output = output or {"full_text": workload.__class__.__name__}
+        stale_output = dict(stale_output, full_text=stale_output.get("full_text", "") +
+                            getattr(workload, "stale_indicator", ""))
+        with self.lock:
+            if not self.stale or self.runs != run:
+                return
+            self.replaced = (output, stale_output)
+        workload.output = stale_output
+        with self.lock:
+            finished = self.replaced is None
+        if finished:
+            # the run finished before the stale output was shown
+            self.restore(output, stale_output)
+
+    def restore(self, output, stale_output):
+        workload = unwrap_workload(self)
+        if workload.output is stale_output:
+            workload.output = output
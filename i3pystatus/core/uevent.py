@@ -0,0 +1,109 @@
+"""
+Kernel uevents from NETLINK_KOBJECT_UEVENT
+
+The kernel broadcasts a uevent whenever a device is added, removed or
+changes, e.g. when a power supply is plugged in or a battery starts
+charging. :py:class:`UeventMonitor` listens to them and calls the
+subscribers of the event's subsystem.
+
+Linux only.
+"""
+
+import errno
+import logging
+import socket
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+NETLINK_KOBJECT_UEVENT = 15
+#: Multicast group of events sent by the kernel (as opposed to udev)
+KERNEL_GROUP = 1
+
+#: Seconds to wait before reading again after an error
+RETRY_DELAY = 5
+
+
+def parse_message(data):
+    """
+    Parse a kernel uevent (``ACTION@DEVPATH`` followed by NUL separated
+    ``KEY=VALUE`` pairs) into a dictionary.
+
+    :returns: The dictionary, or None for messages that are not kernel
+        uevents, e.g. ones sent by udev.
+    """
+    header, _, body = data.partition(b"\0")
+    if b"@" not in header or header.startswith(b"libudev"):
+        return None
+    event = {}
+    for field in body.split(b"\0"):
+        key, sep, value = field.partition(b"=")
+        if sep:
+            event[key.decode(errors="replace")] = value.decode(errors="replace")
+    return event
+
+
+class UeventMonitor:
+    """
+    Calls subscribers for kernel uevents of their subsystem
+
+    Use :py:func:`get_monitor` to get the shared instance.
+    """
+
+    def __init__(self):
+        self.callbacks = {}
+        self.sock = None
+        self.thread = threading.Thread(target=self.listen, name="uevent")
+        self.thread.daemon = True
+
+    def subscribe(self, subsystem, callback):
+        """ Call `callback` with the event dictionary for every uevent of `subsystem`. """
+        self.callbacks.setdefault(subsystem, []).append(callback)
+
+    def start(self):
+        self.sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_KOBJECT_UEVENT)
+        self.sock.bind((0, KERNEL_GROUP))
+        self.thread.start()
+
+    def listen(self):
+        while True:
+            try:
+                data = self.sock.recv(16384)
+            except OSError as e:
+                if e.errno == errno.ENOBUFS:
+                    # the socket buffer overflowed, the events are gone
+                    log.warning("Lost uevents")
+                else:
+                    log.exception("Reading uevents failed, retrying in {}s".format(RETRY_DELAY))
+                    time.sleep(RETRY_DELAY)
+                continue
+            try:
+                self.dispatch(data)
+            except Exception:
+                log.exception("Dispatching uevent failed")
+
+    def dispatch(self, data):
+        event = parse_message(data)
+        if event is None:
+            return
+        for callback in self.callbacks.get(event.get("SUBSYSTEM"), ()):
+            try:
+                callback(event)
+            except Exception:
+                log.exception("Uevent subscriber failed")
+
+
+_monitor = None
+_monitor_lock = threading.Lock()
+
+
+def get_monitor():
+    """ Return the shared :py:class:`UeventMonitor`, starting it on first use. """
+    global _monitor
+    with _monitor_lock:
+        if _monitor is None:
+            monitor = UeventMonitor()
+            monitor.start()
+            _monitor = monitor
+        return _monitor
@@ -1,3 +1,4 @@
+import array
 import collections
 import functools
 import re
@@ -65,9 +66,19 @@ def round_dict(dic, places):
 
 
 class ModuleList(collections.UserList):
+    """
+    List of registered modules
+
+    Keeps an index from the instance id of every module, including the
+    modules of nested lists (e.g. of a :py:class:`.Group`), to the module,
+    so click events are routed without scanning the list.
+    """
+
     def __init__(self, status_handler, class_finder):
         self.status_handler = status_handler
         self.finder = class_finder
+        self.index = {}
+        self.parent = None
         super().__init__()
 
     def append(self, module, *args, **kwargs):
@@ -75,13 +86,37 @@ class ModuleList(collections.UserList):
             module, *args, **kwargs)
         module.registered(self.status_handler)
         super().append(module)
+        self.add_to_index(module)
+        nested = getattr(module, "modules", None)
+        if isinstance(nested, ModuleList):
+            nested.parent = self
+            for instance, nested_module in nested.index.items():
+                self.add_to_index(nested_module, instance)
         return module
 
+    def remove(self, module):
+        super().remove(module)
+        self.remove_from_index(module)
+        nested = getattr(module, "modules", None)
+        if isinstance(nested, ModuleList) and nested.parent is self:
+            nested.parent = None
+            for instance in nested.index:
+                self.remove_from_index(None, instance)
+
+    def add_to_index(self, module, instance=None):
+        instance = instance or str(id(module))
+        self.index[instance] = module
+        if self.parent is not None:
+            self.parent.add_to_index(module, instance)
+
+    def remove_from_index(self, module, instance=None):
+        instance = instance or str(id(module))
+        self.index.pop(instance, None)
+        if self.parent is not None:
+            self.parent.remove_from_index(module, instance)
+
     def get(self, find_id):
-        find_id = int(find_id)
-        for module in self:
-            if id(module) == find_id:
-                return module
+        return self.index.get(str(find_id))
 
 
 class KeyConstraintDict(collections.UserDict):
@@ -187,11 +222,61 @@ def formatp(string, **kwargs):
 
     Escaped brackets, i.e. \\\\[ and \\\\] are copied verbatim to output.
 
+    Format strings are parsed only once, recently used ones are kept in a
+    cache. Use ``formatp.compile(string)`` to parse a format string into a
+    :py:class:`FormatpTemplate` explicitly.
+
     :param string: Format string
     :param kwargs: keyword arguments providing data for the format string
     :returns: Formatted string
     """
+    return compile_formatp(string).format(**kwargs)
+
+
+@functools.lru_cache(maxsize=256)
+def compile_formatp(string):
+    """
+    Parses a format string for :py:func:`formatp` once.
+
+    Results are cached, so repeatedly compiling the same string is cheap.
+
+    :param string: Format string
+    :returns: :py:class:`FormatpTemplate`
+    """
+    return FormatpTemplate(string)
+
+
+formatp.compile = compile_formatp
+
+
+class FormatpTemplate:
+    """
+    A parsed :py:func:`formatp` format string
+
+    The format string is parsed into a tree of groups, where every string
+    inside a group knows the names of its fields in advance. Formatting only
+    walks this tree.
+
+    :param string: Format string
+    """
+
+    def __init__(self, string):
+        self.string = string
+        self.tree = self.build_tree(self.build_stack(string))
 
+    def __repr__(self):
+        return "FormatpTemplate(%r)" % self.string
+
+    def format(self, **kwargs):
+        """
+        :param kwargs: keyword arguments providing data for the format string
+        :returns: Formatted string
+        """
+        out = []
+        self.evaluate(self.tree, 0, kwargs, out)
+        return "".join(out).replace(r"\]", "]").replace(r"\[", "[")
+
+    @staticmethod
     def build_stack(string):
         """
         Builds a stack with OpeningBracket, ClosingBracket and String tokens.
@@ -252,11 +337,12 @@ def formatp(string, **kwargs):
                     stack.append(token)
         return stack
 
-    def build_tree(items, level=0):
+    @classmethod
+    def build_tree(cls, items, level=0):
         """
-        Builds a list-of-lists tree (in forward order) from a stack (reversed order),
-        and formats the elements on the fly, discarding everything not eligible for
-        inclusion.
+        Builds a list-of-lists tree (in forward order) from a stack (reversed
+        order). Nested lists are groups, strings are stored as tuples of the
+        string and the names of its fields.
         """
         subtree = []
 
@@ -265,31 +351,32 @@ def formatp(string, **kwargs):
             while items[0].level > level:
                 nested.append(items.pop(0))
             if nested:
-                subtree.append(build_tree(nested, level + 1))
+                subtree.append(cls.build_tree(nested, level + 1))
 
             item = items.pop(0)
             if item.string:
-                string = item.string
-                if level == 0:
-                    subtree.append(string.format(**kwargs))
-                else:
-                    fields = re.findall(r"({(\w+)[^}]*})", string)
-                    successful_fields = 0
-                    for fieldspec, fieldname in fields:
-                        if kwargs.get(fieldname, False):
-                            successful_fields += 1
-                    if successful_fields == len(fields):
-                        subtree.append(string.format(**kwargs))
-                    else:
-                        return []
+                fields = tuple(name for _, name in re.findall(r"({(\w+)[^}]*})", item.string))
+                subtree.append((item.string, fields))
         return subtree
 
-    def merge_tree(items):
-        return "".join(flatten(items)).replace(r"\]", "]").replace(r"\[", "[")
-
-    stack = build_stack(string)
-    tree = build_tree(stack, 0)
-    return merge_tree(tree)
+    @classmethod
+    def evaluate(cls, tree, level, kwargs, out):
+        """
+        Appends the formatted strings of `tree` to `out`, discarding groups
+        that are not eligible for inclusion.
+        """
+        start = len(out)
+        for node in tree:
+            if isinstance(node, list):
+                cls.evaluate(node, level + 1, kwargs, out)
+                continue
+            string, fields = node
+            if level:
+                for fieldname in fields:
+                    if not kwargs.get(fieldname, False):
+                        del out[start:]
+                        return
+            out.append(string.format(**kwargs))
 
 
 class TimeWrapper:
@@ -500,6 +587,146 @@ def make_graph(values, lower_limit=0.0, upper_limit=100.0, style="blocks"):
     return graph
 
 
+# style: (values per glyph, levels per value, bits of each value per level)
+HEATMAP_STYLES = {
+    # one row of a braille cell per value, 0-2 dots lit
+    'braille': (4, 3, [[0, 0x01, 0x09], [0, 0x02, 0x12], [0, 0x04, 0x24], [0, 0x40, 0xC0]]),
+    # one braille dot per value, lit from half of the range
+    'braille-dots': (8, 2, [[0, bit] for bit in (0x01, 0x08, 0x02, 0x10, 0x04, 0x20, 0x40, 0x80)]),
+    # one quadrant of a block per value, filled from half of the range
+    'blocks': (4, 2, [[0, bit] for bit in (1, 2, 4, 8)]),
+}
+QUADRANTS = ' ▘▝▀▖▌▞▛▗▚▐▜▄▙▟█'
+
+
+def make_heatmap(values, lower_limit=0.0, upper_limit=100.0, style="braille"):
+    """
+    Draws a heatmap packing several values into each unicode character,
+    e.g. the usage of all cores of a CPU.
+
+    Values are drawn in order, left to right and top to bottom within a
+    character.
+
+    :param values: An array of values to draw.
+    :param lower_limit: Value drawn as empty.
+    :param upper_limit: Value drawn as full.
+    :param style: Drawing style, 'braille' (four values per character, three
+        levels each), 'braille-dots' (eight values per character, on or off)
+        or 'blocks' (four values per character, on or off).
+    :returns: Heatmap as a string
+    """
+    try:
+        per_glyph, levels, bits = HEATMAP_STYLES[style]
+    except KeyError:
+        raise NotImplementedError("Heatmap drawing style '%s' unimplemented." % style) from None
+
+    extent = float(upper_limit - lower_limit)
+    top = levels - 1
+    glyphs = []
+    for start in range(0, len(values), per_glyph):
+        cell = 0
+        for position, value in enumerate(values[start:start + per_glyph]):
+            level = int((value - lower_limit) / extent * levels) if extent else 0
+            cell |= bits[position][top if level > top else level if level > 0 else 0]
+        glyphs.append(QUADRANTS[cell] if style == 'blocks' else chr(0x2800 + cell))
+    return ''.join(glyphs)
+
+
+class GraphBuffer:
+    """
+    Ring buffer of the last `width` values of a graph drawn by
+    :py:func:`make_graph`.
+
+    Adding a value and reading the running minimum and maximum are O(1).
+    :py:meth:`render` only draws the glyphs of values added since the last
+    call, as long as the range of the y axis did not change (always the case
+    with fixed limits and values inside them) and the style is 'blocks'.
+    Otherwise the whole graph is drawn again.
+
+    :param width: Number of values in the graph.
+    :param lower_limit: Minimum value for the y axis (or None for dynamic).
+    :param upper_limit: Maximum value for the y axis (or None for dynamic).
+    :param style: Drawing style, see :py:func:`make_graph`.
+    :param fill: Initial value of all entries.
+    """
+
+    BLOCKS = '_▁▂▃▄▅▆▇█'
+
+    def __init__(self, width, lower_limit=0.0, upper_limit=100.0, style="blocks", fill=0.0):
+        self.width = width
+        self.lower_limit = lower_limit
+        self.upper_limit = upper_limit
+        self.style = style
+        self.clear(fill)
+
+    def clear(self, fill=0.0):
+        """Sets all entries to `fill`."""
+        self.values = array.array("d", [fill] * self.width)
+        # index of the oldest value, which is overwritten next
+        self.head = 0
+        self.added = 0
+        # (sequence number, value) pairs with decreasing/increasing values
+        self._maxima = collections.deque([(0, float(fill))])
+        self._minima = collections.deque([(0, float(fill))])
+        self._graph = None
+        self._range = None
+        self._unrendered = 0
+
+    def __len__(self):
+        return self.width
+
+    def __iter__(self):
+        """Iterates over the values, newest first."""
+        for i in range(1, self.width + 1):
+            yield self.values[(self.head - i) % self.width]
+
+    def append(self, value):
+        value = float(value)
+        self.values[self.head] = value
+        self.head = (self.head + 1) % self.width
+        self.added += 1
+        self._unrendered += 1
+
+        seq = self.added
+        expired = seq - self.width
+        for window, replaces in ((self._maxima, float.__le__), (self._minima, float.__ge__)):
+            while window and replaces(window[-1][1], value):
+                window.pop()
+            window.append((seq, value))
+            while window[0][0] <= expired:
+                window.popleft()
+
+    @property
+    def max(self):
+        return self._maxima[0][1]
+
+    @property
+    def min(self):
+        return self._minima[0][1]
+
+    def render(self):
+        """
+        Draws the values, newest first, like
+        ``make_graph(list(buffer), lower_limit, upper_limit, style)``.
+        """
+        mn = self.min if self.lower_limit is None else min(self.min, float(self.lower_limit))
+        mx = self.max if self.upper_limit is None else max(self.max, float(self.upper_limit))
+        new = self._unrendered
+        self._unrendered = 0
+
+        if self.style != "blocks" or self._range != (mn, mx) or new >= self.width:
+            self._range = (mn, mx)
+            self._graph = make_graph(list(self), self.lower_limit, self.upper_limit, self.style)
+        elif new:
+            extent = mx - mn
+            bar_count = len(self.BLOCKS) - 1
+            glyphs = ''.join(
+                '_' if extent == 0 else self.BLOCKS[int((self.values[(self.head - i) % self.width] - mn) / extent * bar_count)]
+                for i in range(1, new + 1))
+            self._graph = glyphs + self._graph[:-new]
+        return self._graph
+
+
 def make_vertical_bar(percentage, width=1, glyphs=None):
     """
     Draws a vertical bar made of unicode characters.
@@ -665,6 +892,64 @@ class MultiClickHandler(object):
         return ret
 
 
+class EventCoalescer(object):
+    """
+    Combines repeated events of the same button, arriving within `timeout`
+    seconds of the first one, into a single call of `callback_handler` with
+    the number of events as additional `count` keyword argument.
+    """
+
+    def __init__(self, callback_handler, timeout):
+        self.callback_handler = callback_handler
+        self.timeout = timeout
+
+        self.lock = RLock()
+
+        self._timer_id = 0
+        self.timer = None
+        self.button = None
+        self.cb = None
+        self.count = 0
+        self.kwargs = None
+
+    def add(self, button, cb, **kwargs):
+        with self.lock:
+            if self.timer is not None and button == self.button:
+                self.count += 1
+                return
+            self.flush()
+
+            self._timer_id += 1
+            self.timer = Timer(self.timeout,
+                               self._timer_function,
+                               args=[self._timer_id])
+            self.button = button
+            self.cb = cb
+            self.count = 1
+            self.kwargs = kwargs
+
+            self.timer.start()
+
+    def flush(self):
+        """Run the pending callback, if any, right away."""
+        with self.lock:
+            if self.timer is None:
+                return
+
+            self._timer_id += 1  # Invalidate existent timer
+            self.timer.cancel()
+            self.timer = None
+
+            self.callback_handler(self.button, self.cb,
+                                  count=self.count, **self.kwargs)
+
+    def _timer_function(self, timer_id):
+        with self.lock:
+            if self._timer_id != timer_id:
+                return
+            self.flush()
+
+
 def get_module(function):
     """Function decorator for retrieving the ``self`` argument from the stack.
 
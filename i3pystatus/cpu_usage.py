@@ -1,14 +1,22 @@
-from collections import defaultdict
+from array import array
+from operator import sub
 from string import Formatter
 import re
 
 from i3pystatus import IntervalModule
+from i3pystatus.core import datasource, procfs
 from i3pystatus.core.color import ColorRangeModule
+from i3pystatus.core.util import make_heatmap
 
 try:
-    from natsort import natsorted as sorted
+    import numpy
 except ImportError:
-    pass
+    numpy = None
+
+#: Below this number of cpu lines the pure Python code is faster than NumPy
+NUMPY_MIN_CPUS = 32
+
+procstat = datasource.register("procstat", procfs.cpu_totals)
 
 
 class CpuUsage(IntervalModule, ColorRangeModule):
@@ -17,19 +25,22 @@ class CpuUsage(IntervalModule, ColorRangeModule):
     The first output will be inacurate.
 
     Linux only
-    Requires the PyPI package 'colour'.
+    Requires the PyPI package 'colour'. Uses NumPy when available on
+    machines with many cores.
 
     .. rubric:: Available formatters
 
     * `{usage}`      — usage average of all cores
     * `{usage_cpu*}` — usage of one specific core. replace "*" by core number starting at 0
-    * `{usage_all}`  — usage of all cores separate. usess natsort when available(relevant for more than 10 cores)
+    * `{usage_all}`  — usage of all cores separate, in core order
+    * `{usage_heatmap}` — usage of all cores as a compact heatmap, several cores per character
 
     """
 
     format = "{usage:02}%"
     format_all = "{core}:{usage:02}%"
     exclude_average = False
+    heatmap_style = 'braille'
     interval = 1
     color = '#FFFFFF'
     dynamic_color = False
@@ -40,6 +51,9 @@ class CpuUsage(IntervalModule, ColorRangeModule):
                         "Available formaters are {core} and {usage}. ")),
         ("exclude_average", ("If True usage average of all cores will "
                              "not be in format_all.")),
+        ("heatmap_style", "Style of {usage_heatmap}: 'braille' (4 cores per character, 3 levels each), "
+                          "'braille-dots' (8 cores per character, busy above 50%) or "
+                          "'blocks' (4 cores per character, busy above 50%)"),
         ("color", "HTML color code #RRGGBB"),
         ("dynamic_color", "Set color dynamically based on CPU usage. Note: this overrides color_up"),
         ("start_color", "Hex or English name for start of color range, eg '#00FF00' or 'green'"),
@@ -47,9 +61,14 @@ class CpuUsage(IntervalModule, ColorRangeModule):
     )
 
     def init(self):
-        self.prev_total = defaultdict(int)
-        self.prev_busy = defaultdict(int)
+        self.names = ()
         self.formatter = Formatter()
+        self.timestamp = None
+
+        # only build the per-core formatters that are actually shown
+        fields = {field for _, field, _, _ in self.formatter.parse(self.format) if field}
+        self.show_all = 'usage_all' in fields
+        self.show_heatmap = 'usage_heatmap' in fields
 
         self.key = re.findall(r'usage_cpu\d+', self.format)
         if len(self.key) == 1:
@@ -62,71 +81,74 @@ class CpuUsage(IntervalModule, ColorRangeModule):
             self.end_color = self.color
         self.colors = self.get_hex_color_range(self.start_color, self.end_color, int(self.upper_limit))
 
-    def get_cpu_timings(self):
+    def set_cpus(self, names):
         """
-        reads and parses /proc/stat
-        returns dictionary with all available cores including global average
+        (re)allocates the per-cpu state for the cpu lines in /proc/stat
         """
-        timings = {}
-        with open('/proc/stat', 'r') as file_obj:
-            for line in file_obj:
-                if 'cpu' in line:
-                    line = line.strip().split()
-                    timings[line[0]] = [int(x) for x in line[1:]]
-
-        return timings
+        self.names = names
+        self.keys = ['usage_' + name for name in names]
+        self.fragments = [{} for name in names]
+        self.use_numpy = numpy is not None and len(names) >= NUMPY_MIN_CPUS
+        if self.use_numpy:
+            self.prev_total = numpy.zeros(len(names), numpy.int64)
+            self.prev_busy = numpy.zeros(len(names), numpy.int64)
+        else:
+            self.prev_total = array('q', bytes(8 * len(names)))
+            self.prev_busy = array('q', bytes(8 * len(names)))
 
-    def calculate_usage(self, cpu, total, busy):
+    def calculate_usages(self, totals):
         """
-        calculates usage
+        calculates the usage of all cpu lines since the last call in one pass,
+        returns list of usages in percent in the order of /proc/stat
         """
-        diff_total = total - self.prev_total[cpu]
-        diff_busy = busy - self.prev_busy[cpu]
-
-        self.prev_total[cpu] = total
-        self.prev_busy[cpu] = busy
-
-        if diff_total == 0:
-            return 0
+        if totals.names != self.names:
+            self.set_cpus(totals.names)
+
+        if self.use_numpy:
+            total = numpy.frombuffer(totals.total, numpy.int64)
+            busy = numpy.frombuffer(totals.busy, numpy.int64)
+            diff_total = total - self.prev_total
+            diff_busy = busy - self.prev_busy
+            usages = numpy.where(diff_total > 0, diff_busy * 100 // numpy.maximum(diff_total, 1), 0).tolist()
+            self.prev_total[:] = total
+            self.prev_busy[:] = busy
         else:
-            return int(diff_busy / diff_total * 100)
+            usages = [diff_busy * 100 // diff_total if diff_total > 0 else 0
+                      for diff_busy, diff_total in zip(map(sub, totals.busy, self.prev_busy),
+                                                       map(sub, totals.total, self.prev_total))]
+            self.prev_total[:] = totals.total
+            self.prev_busy[:] = totals.busy
+
+        return usages
 
-    def gen_format_all(self, usage):
+    def gen_format_all(self, usages):
         """
-        generates string for format all
+        generates string for format all from cached per-core fragments
         """
-        format_string = " "
         core_strings = []
-        for core, usage in usage.items():
-            if core == 'usage_cpu' and self.exclude_average:
-                continue
-            elif core == 'usage':
-                continue
-
-            core = core.replace('usage_', '')
-            string = self.formatter.format(self.format_all,
-                                           core=core,
-                                           usage=usage)
+        first = 1 if self.exclude_average else 0
+        for name, fragments, usage in zip(self.names[first:], self.fragments[first:], usages[first:]):
+            string = fragments.get(usage)
+            if string is None:
+                string = fragments[usage] = self.formatter.format(self.format_all, core=name, usage=usage)
             core_strings.append(string)
 
-        core_strings = sorted(core_strings)
-
-        return format_string.join(core_strings)
+        return " ".join(core_strings)
 
     def get_usage(self):
         """
-        parses /proc/stat and calcualtes total and busy time
+        reads /proc/stat and calculates the usage from total and busy time
         (more specific USER_HZ see man 5 proc for further informations )
-        """
-        usage = {}
-
-        for cpu, timings in self.get_cpu_timings().items():
-            cpu_total = sum(timings)
-            del timings[3:5]
-            cpu_busy = sum(timings)
-            cpu_usage = self.calculate_usage(cpu, cpu_total, cpu_busy)
 
-            usage['usage_' + cpu] = cpu_usage
+        The snapshot of /proc/stat is shared; if it didn't change since the
+        last call (the module runs more often than the period of the
+        source), the last usages are kept instead of computing zero deltas.
+        """
+        snapshot = procstat.get(self.interval)
+        if snapshot.timestamp != self.timestamp:
+            self.timestamp = snapshot.timestamp
+            self.usages = self.calculate_usages(snapshot.data)
+        usage = dict(zip(self.keys, self.usages))
 
         # for backward compatibility
         usage['usage'] = usage['usage_cpu']
@@ -135,7 +157,10 @@ class CpuUsage(IntervalModule, ColorRangeModule):
 
     def run(self):
         usage = self.get_usage()
-        usage['usage_all'] = self.gen_format_all(usage)
+        if self.show_all:
+            usage['usage_all'] = self.gen_format_all(self.usages)
+        if self.show_heatmap:
+            usage['usage_heatmap'] = make_heatmap(self.usages[1:], 0, 100, self.heatmap_style)
 
         color = self.get_gradient(usage[self.key], self.colors, int(self.upper_limit))
 
@@ -1,6 +1,6 @@
 from i3pystatus.core.color import ColorRangeModule
 from i3pystatus.cpu_usage import CpuUsage
-from i3pystatus.core.util import make_graph
+from i3pystatus.core.util import GraphBuffer
 
 
 class CpuUsageGraph(CpuUsage, ColorRangeModule):
@@ -17,7 +17,7 @@ class CpuUsageGraph(CpuUsage, ColorRangeModule):
      * `{cpu_graph}`  — graph of cpu usage.
      * `{usage}`      — usage average of all cores
      * `{usage_cpu*}` — usage of one specific core. replace "*" by core number starting at 0
-     * `{usage_all}`  — usage of all cores separate. usess natsort when available(relevant for more than 10 cores)
+     * `{usage_all}`  — usage of all cores separate, in core order
      """
 
     settings = (
@@ -38,17 +38,15 @@ class CpuUsageGraph(CpuUsage, ColorRangeModule):
 
     def init(self):
         super().init()
-        self.cpu_readings = self.graph_width * [0]
+        self.cpu_readings = GraphBuffer(self.graph_width, 0.0, 100.0, self.graph_style)
         self.colors = self.get_hex_color_range(self.start_color, self.end_color, int(100))
 
     def run(self):
         format_options = self.get_usage()
         core_reading = format_options[self.cpu]
 
-        self.cpu_readings.insert(0, core_reading)
-        self.cpu_readings = self.cpu_readings[:self.graph_width]
-
-        graph = make_graph(self.cpu_readings, 0.0, 100.0, self.graph_style)
+        self.cpu_readings.append(core_reading)
+        graph = self.cpu_readings.render()
 
         if self.direction == "right-to-left":
             graph = graph[::-1]
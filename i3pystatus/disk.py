@@ -1,6 +1,7 @@
 import os
 
 from i3pystatus import IntervalModule
+from .core import mounts
 from .core.util import round_dict
 
 
@@ -10,6 +11,11 @@ class Disk(IntervalModule):
 
     These values can also be expressed as percentages with the ``{percentage_used}``, ``{percentage_free}``
     and ``{percentage_avail}`` formats.
+
+    On Linux, the mount table is watched for changes instead of checking the path on every run, and
+    the space of network filesystems (NFS, CIFS, sshfs and other FUSE filesystems, ...) is queried in
+    a separate thread. If the server doesn't answer within ``statvfs_timeout`` seconds, the last output is kept,
+    and later runs don't wait for it again until it answered.
     """
 
     settings = (
@@ -23,7 +29,10 @@ class Disk(IntervalModule):
         ("round_size", "precision, None for INT"),
         ("mounted_only", "display only if path is a valid mountpoint"),
         "format_not_mounted",
-        "color_not_mounted"
+        "color_not_mounted",
+        ("max_age", "reuse the space reported by the filesystem for this many seconds, "
+                    "shared by all instances for the same path"),
+        ("statvfs_timeout", "seconds to wait for a network filesystem to report its space"),
     )
     required = ("path",)
     color = "#FFFFFF"
@@ -36,6 +45,16 @@ class Disk(IntervalModule):
     critical_limit = 0
     round_size = 2
     mounted_only = False
+    max_age = 0
+    statvfs_timeout = 2
+
+    def init(self):
+        try:
+            self.mounts = mounts.get_monitor()
+        except OSError:
+            self.mounts = None
+        # mount table the last emptiness check was made for, and its result
+        self.empty_checked = (None, False)
 
     def not_mounted(self):
         if self.mounted_only:
@@ -46,14 +65,43 @@ class Disk(IntervalModule):
                 "color": self.color_not_mounted,
             }
 
+    def is_empty_mount_point(self):
+        """ Whether the path is a directory without anything mounted on it and nothing in it. """
+        if self.mounts is None:
+            return os.path.isdir(self.path) and not os.path.ismount(self.path) and not os.listdir(self.path)
+        table = self.mounts.mounts
+        checked, empty = self.empty_checked
+        if checked is not table:
+            # the table is replaced on every change, until then the path stays as it is
+            empty = self.check_empty_mount_point()
+            self.empty_checked = (table, empty)
+        return empty
+
+    def check_empty_mount_point(self):
+        if self.mounts.is_mounted(self.path):
+            return False
+        mount = self.mounts.find_mount(self.path)
+        if mount is None or mounts.is_network_filesystem(mount.fstype):
+            # don't touch a possibly hanging filesystem outside of statvfs
+            return False
+        return os.path.isdir(self.path) and not os.listdir(self.path)
+
+    def statvfs(self):
+        if self.mounts is None:
+            return os.statvfs(self.path)
+        mount = self.mounts.find_mount(self.path)
+        network = mount is not None and mounts.is_network_filesystem(mount.fstype)
+        return mounts.statvfs(self.path, self.max_age, self.statvfs_timeout if network else None)
+
     def run(self):
-        if os.path.isdir(self.path) and not os.path.ismount(self.path):
-            if len(os.listdir(self.path)) == 0:
-                self.not_mounted()
-                return
+        if self.is_empty_mount_point():
+            self.not_mounted()
+            return
 
         try:
-            stat = os.statvfs(self.path)
+            stat = self.statvfs()
+        except TimeoutError:
+            return
         except Exception:
             self.not_mounted()
             return
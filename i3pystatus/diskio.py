@@ -0,0 +1,157 @@
+import time
+
+from i3pystatus import IntervalModule
+from i3pystatus.core import procfs
+from i3pystatus.core.util import GraphBuffer, bytes_info_dict
+
+#: Size of a sector in /proc/diskstats, independent of the device
+SECTOR_SIZE = 512
+
+
+class DiskIO(IntervalModule):
+    """
+    Shows disk throughput, I/O operations per second, average latency and
+    utilization from /proc/diskstats.
+
+    The values are summed up over all devices matching ``devices``, a regular
+    expression matched against whole device names. The default matches whole
+    disks, but no partitions, loop or device mapper devices, so that I/O isn't
+    counted twice. The first output only shows zeroes.
+
+    Linux only
+
+    .. rubric:: Available formatters
+
+    * `{read}` — bytes read per second (divided by divisor | auto calculated if auto_units == True)
+    * `{write}` — bytes written per second (divided by divisor | auto calculated if auto_units == True)
+    * `{read_iops}` — reads completed per second
+    * `{write_iops}` — writes completed per second
+    * `{await}` — average time in milliseconds an I/O request took, including queueing
+    * `{util}` — percentage of time a device was busy, the highest of all devices
+    * `{read_graph}` — graph of the bytes read per second
+    * `{write_graph}` — graph of the bytes written per second
+    * `{devices}` — number of devices matching ``devices``
+
+    All formatters but the graphs are also available per device, e.g.
+    `{read_sda}` or `{await_nvme0n1}`.
+
+    .. code-block:: python
+
+        status.register("diskio",
+                        devices=r"nvme0n1|sda",
+                        format="{read_graph} {read} {write} {await:.1f}ms")
+    """
+
+    settings = (
+        "format",
+        ("devices", "regular expression matching the names of the devices to show"),
+        ("divisor", "divide all byte values by this value"),
+        ("round_size", "defines number of digits in round"),
+        ("auto_units", "automatically select the unit of byte values (overrides divisor)"),
+        ("graph_width", "width of the graphs"),
+        ("graph_style", "graph style ('blocks', 'braille-fill', 'braille-peak', or 'braille-snake')"),
+        ("read_limit", "bytes read per second drawn as full in the graph, None to scale with the maximum"),
+        ("write_limit", "bytes written per second drawn as full in the graph, None to scale with the maximum"),
+        ("util_limit", "utilization above which the module is shown in critical_color"),
+        ("color", "the common color"),
+        ("critical_color", "the critical color"),
+        ("file", "path of the diskstats file"),
+    )
+
+    format = "R {read} W {write}"
+    devices = r"sd[a-z]+|hd[a-z]+|vd[a-z]+|xvd[a-z]+|nvme\d+n\d+|mmcblk\d+"
+    divisor = 1024
+    round_size = 1
+    auto_units = True
+    graph_width = 15
+    graph_style = "blocks"
+    read_limit = None
+    write_limit = None
+    util_limit = 90
+    color = "#FFFFFF"
+    critical_color = "#FF0000"
+    file = "/proc/diskstats"
+
+    def init(self):
+        self.pattern = procfs.diskstats_pattern(self.devices)
+        self.read_graph = GraphBuffer(self.graph_width, 0.0, self.read_limit, self.graph_style)
+        self.write_graph = GraphBuffer(self.graph_width, 0.0, self.write_limit, self.graph_style)
+        self.names = None
+        self.previous = None
+        self.counters = None
+        self.timestamp = None
+
+    def sample(self):
+        """ Read the counters, returns the elapsed seconds since the last sample or 0 for the first sample. """
+        now = time.monotonic()
+        # reuse the array of the sample before the last one
+        names, counters = procfs.diskstats(self.pattern, self.previous, self.file)
+        self.previous, self.counters = self.counters, counters
+        if names != self.names or self.timestamp is None:
+            self.names = names
+            self.timestamp = now
+            self.previous = None
+            return 0
+        elapsed, self.timestamp = now - self.timestamp, now
+        return elapsed
+
+    def calculate(self, elapsed):
+        """ Return a dictionary of the rates, in total and per device. """
+        totals = dict.fromkeys(("read", "write", "read_iops", "write_iops", "await", "util"), 0.0)
+        values = {}
+        total_ios = total_ticks = 0
+        current, previous = self.counters, self.previous
+        for device, name in enumerate(self.names):
+            if not elapsed:
+                reads = sectors_read = read_ticks = writes = sectors_written = write_ticks = io_ticks = 0
+            else:
+                start = device * procfs.DISKSTATS_FIELDS
+                reads, sectors_read, read_ticks, writes, sectors_written, write_ticks, io_ticks = (
+                    max(current[start + i] - previous[start + i], 0) for i in range(procfs.DISKSTATS_FIELDS))
+            ios = reads + writes
+            device_values = {
+                "read": sectors_read * SECTOR_SIZE / elapsed if elapsed else 0.0,
+                "write": sectors_written * SECTOR_SIZE / elapsed if elapsed else 0.0,
+                "read_iops": reads / elapsed if elapsed else 0.0,
+                "write_iops": writes / elapsed if elapsed else 0.0,
+                "await": (read_ticks + write_ticks) / ios if ios else 0.0,
+                "util": min(io_ticks / (elapsed * 10), 100.0) if elapsed else 0.0,
+            }
+            for key, value in device_values.items():
+                values["{}_{}".format(key, name)] = value
+                if key == "util":
+                    totals[key] = max(totals[key], value)
+                elif key != "await":
+                    totals[key] += value
+            total_ios += ios
+            total_ticks += read_ticks + write_ticks
+        totals["await"] = total_ticks / total_ios if total_ios else 0.0
+        values.update(totals)
+        return values
+
+    def format_bytes(self, value):
+        if self.auto_units:
+            return '{value:.{round}f}{unit}'.format(round=self.round_size, **bytes_info_dict(value))
+        return '{:.{round}f}'.format(value / self.divisor, round=self.round_size)
+
+    def run(self):
+        values = self.calculate(self.sample())
+        self.read_graph.append(values["read"])
+        self.write_graph.append(values["write"])
+
+        critical = values["util"] > self.util_limit
+        self.data = dict(values)
+        for key, value in values.items():
+            if key.startswith(("read_iops", "write_iops")):
+                values[key] = round(value, self.round_size)
+            elif key.startswith(("read", "write")):
+                values[key] = self.format_bytes(value)
+        values["read_graph"] = self.read_graph.render()
+        values["write_graph"] = self.write_graph.render()
+        values["devices"] = len(self.names)
+
+        self.output = {
+            "full_text": self.format.format(**values),
+            "color": self.critical_color if critical else self.color,
+            "urgent": critical,
+        }
@@ -1,6 +1,7 @@
 from os.path import join
 
 from i3pystatus import IntervalModule
+from i3pystatus.core import sysfs
 
 
 class File(IntervalModule):
@@ -38,9 +39,10 @@ class File(IntervalModule):
     def run(self):
         cdict = {}
 
-        for key, (component, file) in self.components.items():
-            with open(join(self.base_path, file), "r") as f:
-                cdict[key] = component(f.read().strip())
+        keys = list(self.components)
+        values = sysfs.read_many(join(self.base_path, self.components[key][1]) for key in keys)
+        for key, value in zip(keys, values):
+            cdict[key] = self.components[key][0](value.strip())
 
         for key, transform in self.transforms.items():
             cdict[key] = transform(cdict)
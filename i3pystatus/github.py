@@ -272,7 +272,6 @@ class Github(IntervalModule):
             'unread': 0,
             'unread_count': '',
             'update_error': ''}
-    output = {'full_text': '', 'color': None}
 
     # Click events
     on_leftclick = ['perform_update']
@@ -291,6 +290,7 @@ class Github(IntervalModule):
         user_open(self.notifications_url)
 
     def init(self):
+        self.output = {'full_text': '', 'color': None}
         if self.status != self._default_status:
             new_status = copy.copy(self._default_status)
             new_status.update(self.status)
@@ -415,8 +415,8 @@ class Github(IntervalModule):
 
     @require(internet)
     def perform_update(self):
-        self.output['full_text'] = \
-            self.refresh_icon + self.output.get('full_text', '')
+        self.output = dict(self.output,
+                           full_text=self.refresh_icon + self.output.get('full_text', ''))
         self.failed_update = False
 
         self.update_status()
@@ -6,7 +6,7 @@ class GPUMemory(IntervalModule):
     """
     Shows GPU memory load
 
-    Currently Nvidia only and nvidia-smi required
+    Currently Nvidia only and nvidia-smi or the NVML bindings (pynvml) required
 
     .. rubric:: Available formatters
 
@@ -39,7 +39,7 @@ class GPUMemory(IntervalModule):
     gpu_number = 0
 
     def run(self):
-        info = gpu.query_nvidia_smi(self.gpu_number)
+        info = gpu.query_nvidia_smi(self.gpu_number, self.interval)
 
         if info.used_mem is not None and info.total_mem is not None:
             mem_percent = 100 * info.used_mem / info.total_mem
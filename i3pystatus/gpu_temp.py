@@ -6,7 +6,7 @@ class GPUTemperature(IntervalModule):
     """
     Shows GPU temperature
 
-    Currently Nvidia only and nvidia-smi required
+    Currently Nvidia only and nvidia-smi or the NVML bindings (pynvml) required
 
     .. rubric:: Available formatters
 
@@ -29,7 +29,7 @@ class GPUTemperature(IntervalModule):
     gpu_number = 0
 
     def run(self):
-        temp = gpu.query_nvidia_smi(self.gpu_number).temp
+        temp = gpu.query_nvidia_smi(self.gpu_number, self.interval).temp
         temp_alert = temp is None or temp >= self.alert_temp
 
         if eval(self.display_if):
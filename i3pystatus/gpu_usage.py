@@ -6,7 +6,7 @@ class GPUUsage(IntervalModule):
     """
     Shows GPU load in percent
 
-    Currently Nvidia only and nvidia-smi required
+    Currently Nvidia only and nvidia-smi or the NVML bindings (pynvml) required
 
     .. rubric:: Available formatters
 
@@ -34,7 +34,7 @@ class GPUUsage(IntervalModule):
     gpu_number = 0
 
     def run(self):
-        info = gpu.query_nvidia_smi(self.gpu_number)
+        info = gpu.query_nvidia_smi(self.gpu_number, self.interval)
 
         gpu_percent = info.usage_gpu
 
@@ -1,4 +1,5 @@
 from i3pystatus import IntervalModule
+from i3pystatus.core import procfs
 try:
     from os import cpu_count
 except ImportError:
@@ -31,8 +32,7 @@ class Load(IntervalModule):
     critical_color = "#ff0000"
 
     def run(self):
-        with open(self.file, "r") as f:
-            avg1, avg5, avg15, tasks, lastpid = f.read().split(" ", 5)
+        avg1, avg5, avg15, tasks = procfs.loadavg(self.file)
 
         urgent = float(avg1) > self.critical_limit
 
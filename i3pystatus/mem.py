@@ -1,7 +1,9 @@
 from i3pystatus import IntervalModule
-import psutil
+from .core import datasource, procfs
 from .core.util import round_dict
 
+meminfo = datasource.register("meminfo", procfs.meminfo)
+
 
 class Mem(IntervalModule):
     """
@@ -13,8 +15,6 @@ class Mem(IntervalModule):
     * {percent_used_mem}
     * {used_mem}
     * {total_mem}
-
-    Requires psutil (from PyPI)
     """
 
     format = "{avail_mem} MiB"
@@ -42,7 +42,7 @@ class Mem(IntervalModule):
     )
 
     def run(self):
-        memory_usage = psutil.virtual_memory()
+        memory_usage = meminfo.get(self.interval).data.memory
 
         if memory_usage.percent >= self.alert_percentage:
             color = self.alert_color
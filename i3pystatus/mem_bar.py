@@ -1,8 +1,10 @@
 from i3pystatus import IntervalModule
-from psutil import virtual_memory
+from i3pystatus.core import datasource, procfs
 from i3pystatus.core.color import ColorRangeModule
 from i3pystatus.core.util import make_bar
 
+meminfo = datasource.register("meminfo", procfs.meminfo)
+
 
 class MemBar(IntervalModule, ColorRangeModule):
     """
@@ -12,7 +14,7 @@ class MemBar(IntervalModule, ColorRangeModule):
 
     * {used_mem_bar}
 
-    Requires psutil and colour (from PyPI)
+    Requires colour (from PyPI)
     """
 
     format = "{used_mem_bar}"
@@ -39,7 +41,7 @@ class MemBar(IntervalModule, ColorRangeModule):
     )
 
     def run(self):
-        memory_usage = virtual_memory()
+        memory_usage = meminfo.get(self.interval).data.memory
 
         if self.multi_colors:
             color = self.get_gradient(memory_usage.percent, self.colors)
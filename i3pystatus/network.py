@@ -1,10 +1,14 @@
+import math
+import threading
+import time
 from fnmatch import fnmatch
 
 import netifaces
 
 from i3pystatus import IntervalModule, formatp
+from i3pystatus.core import netlink, procfs, sysfs
 from i3pystatus.core.color import ColorRangeModule
-from i3pystatus.core.util import make_graph, round_dict, make_bar, bytes_info_dict
+from i3pystatus.core.util import GraphBuffer, round_dict, make_bar, bytes_info_dict
 
 
 def count_bits(integer):
@@ -51,13 +55,12 @@ def get_bonded_slaves():
 
 
 def sysfs_interface_up(interface, unknown_up=False):
-    try:
-        with open("/sys/class/net/{}/operstate".format(interface)) as f:
-            status = f.read().strip()
-    except FileNotFoundError:
+    status = sysfs.read("/sys/class/net/{}/operstate".format(interface), None)
+    if status is None:
         # Interface doesn't exist
         return False
 
+    status = status.strip()
     return status == "up" or unknown_up and status == "unknown"
 
 
@@ -75,8 +78,10 @@ class NetworkInfo:
     Retrieve network information.
     """
 
-    def __init__(self, interface, ignore_interfaces, detached_down, unknown_up, freq_divisor, get_wifi_info=False):
-        if interface not in netifaces.interfaces() and not detached_down:
+    def __init__(self, interface, ignore_interfaces, detached_down, unknown_up, freq_divisor, get_wifi_info=False,
+                 monitor=None):
+        self.monitor = monitor
+        if interface not in self.interfaces() and not detached_down:
             raise RuntimeError(
                 "Unknown interface {iface}!".format(iface=interface))
 
@@ -90,21 +95,45 @@ class NetworkInfo:
         else:
             self.freq_divisor = freq_divisor
 
+    def interfaces(self):
+        if self.monitor:
+            return self.monitor.state.interfaces()
+        return netifaces.interfaces()
+
+    def ifaddresses(self, interface):
+        if self.monitor:
+            return self.monitor.state.ifaddresses(interface)
+        return netifaces.ifaddresses(interface)
+
+    def interface_up(self, interface):
+        if self.monitor:
+            status = self.monitor.state.operstate(interface)
+            return status == "up" or self.unknown_up and status == "unknown"
+        return sysfs_interface_up(interface, self.unknown_up)
+
+    def monitor_active_interface(self, default_interface):
+        """ Like :py:func:`detect_active_interface`, using the netlink state. """
+        for af in (netifaces.AF_INET, netifaces.AF_INET6):
+            interface = self.monitor.state.default_interface(af)
+            if interface and interface not in self.ignore_interfaces:
+                return interface
+        return default_interface
+
     def get_info(self, interface):
         format_dict = dict(v4="", v4mask="", v4cidr="", v6="", v6mask="", v6cidr="")
-        iface_up = sysfs_interface_up(interface, self.unknown_up)
+        iface_up = self.interface_up(interface)
         if not iface_up:
             return format_dict
 
-        network_info = netifaces.ifaddresses(interface)
+        network_info = self.ifaddresses(interface)
         slaves = get_bonded_slaves()
         try:
             master = slaves[interface]
         except KeyError:
             pass
         else:
-            if sysfs_interface_up(interface, self.unknown_up):
-                master_info = netifaces.ifaddresses(master)
+            if self.interface_up(interface):
+                master_info = self.ifaddresses(master)
                 for af in (netifaces.AF_INET, netifaces.AF_INET6):
                     try:
                         network_info[af] = master_info[af]
@@ -179,64 +208,90 @@ class NetworkInfo:
 class NetworkTraffic:
     """
     Retrieve network traffic information
+
+    Counters are read from /sys/class/net/<interface>/statistics, so the
+    cost does not depend on the number of interfaces. Rates are per second,
+    optionally smoothed with an exponentially weighted moving average with
+    a time constant of `smoothing` seconds.
     """
 
+    STATISTICS = ("rx_bytes", "rx_packets", "tx_bytes", "tx_packets")
+
     pnic = None
     pnic_before = None
 
-    def __init__(self, unknown_up):
+    def __init__(self, unknown_up, interface_up=None, smoothing=0):
         self.unknown_up = unknown_up
+        self.interface_up = interface_up or (lambda interface: sysfs_interface_up(interface, self.unknown_up))
+        self.smoothing = smoothing
+        self.paths = {}
+        self.clear_counters()
 
     def update_counters(self, interface):
-        import psutil
+        try:
+            paths = self.paths[interface]
+        except KeyError:
+            paths = self.paths[interface] = ["/sys/class/net/{}/statistics/{}".format(interface, name)
+                                             for name in self.STATISTICS]
+        values = sysfs.read_many(paths, None)
+        now = time.monotonic()
 
         self.pnic_before = self.pnic
-        counters = psutil.net_io_counters(pernic=True)
-        self.pnic = counters[interface] if interface in counters else None
+        self.pnic = None if None in values else procfs.NetCounters(*map(int, values))
+        self.elapsed = now - self.sampled_at if self.sampled_at is not None else None
+        self.sampled_at = now
 
     def clear_counters(self):
         self.pnic_before = None
         self.pnic = None
+        self.sampled_at = None
+        self.elapsed = None
+        self.rates = None
+
+    def get_rate(self, counter):
+        if not self.elapsed:
+            return 0.0
+        # counters start over when the interface is recreated
+        return max(getattr(self.pnic, counter) - getattr(self.pnic_before, counter), 0) / self.elapsed
 
     def get_bytes_sent(self):
-        return self.pnic.bytes_sent - self.pnic_before.bytes_sent
+        return self.get_rate("bytes_sent")
 
     def get_bytes_received(self):
-        return self.pnic.bytes_recv - self.pnic_before.bytes_recv
+        return self.get_rate("bytes_recv")
 
     def get_packets_sent(self):
-        return self.pnic.packets_sent - self.pnic_before.packets_sent
+        return self.get_rate("packets_sent")
 
     def get_packets_received(self):
-        return self.pnic.packets_recv - self.pnic_before.packets_recv
+        return self.get_rate("packets_recv")
 
     def get_rx_total(self, interface):
-        try:
-            with open("/sys/class/net/{}/statistics/rx_bytes".format(interface)) as f:
-                return int(f.readline().split('\n')[0])
-        except FileNotFoundError:
-            return False
+        return self.pnic.bytes_recv if self.pnic else False
 
     def get_tx_total(self, interface):
-        try:
-            with open("/sys/class/net/{}/statistics/tx_bytes".format(interface)) as f:
-                return int(f.readline().split('\n')[0])
-        except FileNotFoundError:
-            return False
+        return self.pnic.bytes_sent if self.pnic else False
 
     def get_usage(self, interface):
         self.update_counters(interface)
         usage = dict(bytes_sent=0, bytes_recv=0, packets_sent=0, packets_recv=0, rx_total=0, tx_total=0)
 
-        if not sysfs_interface_up(interface, self.unknown_up) or not self.pnic_before:
+        if not self.interface_up(interface) or not self.pnic_before or not self.pnic:
+            self.rates = None
             return usage
-        else:
-            usage["bytes_sent"] = self.get_bytes_sent()
-            usage["bytes_recv"] = self.get_bytes_received()
-            usage["packets_sent"] = self.get_packets_sent()
-            usage["packets_recv"] = self.get_packets_received()
-            usage["rx_total"] = self.get_rx_total(interface)
-            usage["tx_total"] = self.get_tx_total(interface)
+
+        rates = dict(bytes_sent=self.get_bytes_sent(), bytes_recv=self.get_bytes_received(),
+                     packets_sent=self.get_packets_sent(), packets_recv=self.get_packets_received())
+        if self.smoothing and self.rates:
+            alpha = 1 - math.exp(-self.elapsed / self.smoothing)
+            rates = {key: self.rates[key] + alpha * (rate - self.rates[key]) for key, rate in rates.items()}
+        self.rates = rates
+
+        usage.update(rates)
+        usage["packets_sent"] = round(rates["packets_sent"])
+        usage["packets_recv"] = round(rates["packets_recv"])
+        usage["rx_total"] = self.get_rx_total(interface)
+        usage["tx_total"] = self.get_tx_total(interface)
         return usage
 
 
@@ -246,8 +301,7 @@ class Network(IntervalModule, ColorRangeModule):
     formatp support
     if u wanna display recv/send speed separate in dynamic color mode, please enable pango hint.
 
-    Requires the PyPI packages `colour`, `netifaces`, `psutil` (optional, see below)
-    and `basiciw` (optional, see below).
+    Requires the PyPI packages `colour`, `netifaces` and `basiciw` (optional, see below).
 
     .. rubric:: Available formatters
 
@@ -270,7 +324,7 @@ class Network(IntervalModule, ColorRangeModule):
     * `{quality}` — Link quality in percent
     * `{quality_bar}` —Bar graphically representing link quality
 
-    Network Traffic Formatters (requires PyPI package `psutil`):
+    Network Traffic Formatters:
 
     * `{interface}` — the configured network interface
     * `{network_graph_recv}` – Unicode graph representing incoming network traffic
@@ -317,6 +371,11 @@ class Network(IntervalModule, ColorRangeModule):
         ("next_if_down", "Change to next interface if current one is down"),
         ("detect_active", "Attempt to detect the active interface"),
         ("auto_units", "if true, unit of measurement is switched automatically (KB/MB/GB/...)"),
+        ("traffic_smoothing", "Smooth traffic rates with an exponentially weighted moving average with this "
+                              "time constant in seconds, 0 to disable. Useful with sub-second intervals."),
+        ("netlink", "Get interface, address and route changes pushed from the kernel through rtnetlink "
+                    "instead of polling them (Linux only). Changes are shown immediately, only traffic "
+                    "counters are still polled every interval."),
     )
 
     # Continue processing statistics when i3bar is hidden.
@@ -339,11 +398,13 @@ class Network(IntervalModule, ColorRangeModule):
     separate_color = False
     next_if_down = False
     detect_active = False
+    netlink = False
 
     # Network traffic settings
     divisor = 1024
     round_size = 0
     auto_units = False
+    traffic_smoothing = 0
 
     # Network info settings
     detached_down = True
@@ -365,115 +426,142 @@ class Network(IntervalModule, ColorRangeModule):
         else:
             get_wifi_info = False
 
+        # run() and the netlink monitor's thread both update the interface, counters and output
+        self.update_lock = threading.RLock()
+        monitor = netlink.get_monitor() if self.netlink else None
         self.network_info = NetworkInfo(self.interface, self.ignore_interfaces, self.detached_down, self.unknown_up,
-                                        self.freq_divisor, get_wifi_info)
+                                        self.freq_divisor, get_wifi_info, monitor)
 
-        # Don't require importing psutil unless using the functionality it offers.
+        # Don't read traffic counters unless using the functionality they offer.
         if any(s in self.format_up or s in self.format_down for s in
                ['bytes_sent', 'bytes_recv', 'packets_sent', 'packets_recv', 'network_graph_recv',
                 'network_graph_sent', 'rx_tot_Mbytes', 'tx_tot_Mbytes', 'tx_tot', 'rx_tot']):
-            self.network_traffic = NetworkTraffic(self.unknown_up)
+            self.network_traffic = NetworkTraffic(self.unknown_up, self.network_info.interface_up,
+                                                  self.traffic_smoothing)
         else:
             self.network_traffic = None
+        self.traffic_values = {}
+        self.traffic_color = None
 
         if not self.dynamic_color:
             self.end_color = self.start_color = self.color_up
         self.colors = self.get_hex_color_range(self.start_color, self.end_color, 100)
-        self.kbs_recv_arr = [0.0] * self.graph_width
-        self.kbs_sent_arr = [0.0] * self.graph_width
         self.pango_enabled = self.hints.get("markup", False) and self.hints["markup"] == "pango"
 
         # convert settings from the nominated unit to bytes (backwards compatibility)
         self.sent_limit *= 1024
         self.recv_limit *= 1024
 
+        self.kbs_recv_arr = GraphBuffer(self.graph_width, 0.0, self.recv_limit, self.graph_style)
+        self.kbs_sent_arr = GraphBuffer(self.graph_width, 0.0, self.sent_limit, self.graph_style)
+
         self.graph_direction = self.graph_direction.lower()
         if self.graph_direction not in ('left-to-right', 'right-to-left'):
             raise Exception("Invalid direction '%s'." % self.graph_direction)
 
+        if monitor:
+            monitor.subscribe(self.netlink_changed)
+
     def cycle_interface(self, increment=1):
         """Cycle through available interfaces in `increment` steps. Sign indicates direction."""
-        interfaces = [i for i in netifaces.interfaces() if i not in self.ignore_interfaces]
-        if self.interface in interfaces:
-            next_index = (interfaces.index(self.interface) + increment) % len(interfaces)
-            self.interface = interfaces[next_index]
-        elif len(interfaces) > 0:
-            self.interface = interfaces[0]
-
-        if self.network_traffic:
-            self.network_traffic.clear_counters()
-            self.kbs_arr = [0.0] * self.graph_width
+        with self.update_lock:
+            interfaces = [i for i in self.network_info.interfaces() if i not in self.ignore_interfaces]
+            if self.interface in interfaces:
+                next_index = (interfaces.index(self.interface) + increment) % len(interfaces)
+                self.interface = interfaces[next_index]
+            elif len(interfaces) > 0:
+                self.interface = interfaces[0]
+
+            if self.network_traffic:
+                self.network_traffic.clear_counters()
+                self.kbs_recv_arr.clear()
+                self.kbs_sent_arr.clear()
 
     def get_network_graph_recv(self, kbs, limit):
-        # Cycle array by inserting at the start and chopping off the last element
-        self.kbs_recv_arr.insert(0, kbs)
-        self.kbs_recv_arr = self.kbs_recv_arr[:self.graph_width]
-        graph = make_graph(self.kbs_recv_arr, 0.0, limit, self.graph_style)
+        self.kbs_recv_arr.append(kbs)
+        graph = self.kbs_recv_arr.render()
         if self.graph_direction == 'right-to-left':
             return graph[::-1]
         else:
             return graph
 
     def get_network_graph_sent(self, kbs, limit):
-        # Cycle array by inserting at the start and chopping off the last element
-        self.kbs_sent_arr.insert(0, kbs)
-        self.kbs_sent_arr = self.kbs_sent_arr[:self.graph_width]
-        graph = make_graph(self.kbs_sent_arr, 0.0, limit, self.graph_style)
+        self.kbs_sent_arr.append(kbs)
+        graph = self.kbs_sent_arr.render()
         if self.graph_direction == 'right-to-left':
             return graph[::-1]
         else:
             return graph
 
     def run(self):
+        with self.update_lock:
+            if self.detect_active:
+                self.interface = self.get_active_interface()
+
+            if self.network_traffic:
+                self.update_traffic()
+
+            self.update_output()
+
+    def update_traffic(self):
+        network_usage = self.network_traffic.get_usage(self.interface)
+        traffic_values = dict(network_usage)
+        traffic_values['network_graph_recv'] = self.get_network_graph_recv(network_usage['bytes_recv'], self.recv_limit)
+        traffic_values['network_graph_sent'] = self.get_network_graph_sent(network_usage['bytes_sent'], self.sent_limit)
+
+        traffic_values['tx_tot_Mbytes'] = network_usage['tx_total'] / (1024 * 1024)
+        traffic_values['rx_tot_Mbytes'] = network_usage['rx_total'] / (1024 * 1024)
+
+        traffic_values['rx_tot'] = '{value:.{round}f}{unit}'.format(
+            round=self.round_size, **bytes_info_dict(network_usage['rx_total']))
+        traffic_values['tx_tot'] = '{value:.{round}f}{unit}'.format(
+            round=self.round_size, **bytes_info_dict(network_usage['tx_total']))
+
+        color = None
+        if self.dynamic_color:
+            if self.separate_color and self.pango_enabled:
+                color = self.color_up
+                color_template = "<span color=\"{}\">{}</span>"
+                per_recv = network_usage["bytes_recv"] / self.recv_limit
+                per_sent = network_usage["bytes_sent"] / self.sent_limit
+                c_recv = self.get_gradient(int(per_recv * 100), self.colors, 100)
+                c_sent = self.get_gradient(int(per_sent * 100), self.colors, 100)
+                traffic_values['network_graph_recv'] = color_template.format(c_recv, traffic_values["network_graph_recv"])
+                traffic_values['network_graph_sent'] = color_template.format(c_sent, traffic_values["network_graph_sent"])
+            else:
+                if self.coloring_type == "recv":
+                    color = self.get_gradient(network_usage['bytes_recv'], self.colors, self.recv_limit)
+                elif self.coloring_type == "sent":
+                    color = self.get_gradient(network_usage['bytes_sent'], self.colors, self.sent_limit)
+                else:
+                    raise Exception("coloring_type must be either 'recv' or 'sent'!")
+
+        for metric in ('bytes_recv', 'bytes_sent'):
+            if self.auto_units:
+                traffic_values[metric] = '{value:.{round}f}{unit}'.format(
+                    round=self.round_size, **bytes_info_dict(traffic_values[metric]))
+            else:
+                traffic_values[metric] = '{:.{round}f}'.format(traffic_values[metric] / self.divisor,
+                                                               round=self.round_size)
+        if self.dynamic_color and self.separate_color and self.pango_enabled:
+            traffic_values["bytes_recv"] = color_template.format(c_recv, traffic_values["bytes_recv"])
+            traffic_values["bytes_sent"] = color_template.format(c_sent, traffic_values["bytes_sent"])
+
+        self.traffic_values = traffic_values
+        self.traffic_color = color
+
+    def update_output(self):
         format_values = dict(network_graph_recv="", network_graph_sent="", bytes_sent="", bytes_recv="",
                              packets_sent="", packets_recv="", rx_tot_Mbytes="", tx_tot_Mbytes="",
                              interface="", v4="", v4mask="", v4cidr="", v6="", v6mask="", v6cidr="", mac="",
                              essid="", freq="", quality="", quality_bar="", rx_tot='', tx_tot="")
+        format_values.update(self.traffic_values)
+        color = self.traffic_color
 
-        if self.detect_active:
-            self.interface = detect_active_interface(self.ignore_interfaces, self.interface)
-
-        if self.network_traffic:
-            network_usage = self.network_traffic.get_usage(self.interface)
-            format_values.update(network_usage)
-            format_values['network_graph_recv'] = self.get_network_graph_recv(network_usage['bytes_recv'], self.recv_limit)
-            format_values['network_graph_sent'] = self.get_network_graph_sent(network_usage['bytes_sent'], self.sent_limit)
-
-            format_values['tx_tot_Mbytes'] = network_usage['tx_total'] / (1024 * 1024)
-            format_values['rx_tot_Mbytes'] = network_usage['rx_total'] / (1024 * 1024)
-
-            format_values['rx_tot'] = '{value:.{round}f}{unit}'.format(
-                round=self.round_size, **bytes_info_dict(network_usage['rx_total']))
-            format_values['tx_tot'] = '{value:.{round}f}{unit}'.format(
-                round=self.round_size, **bytes_info_dict(network_usage['tx_total']))
-
-            if self.dynamic_color:
-                if self.separate_color and self.pango_enabled:
-                    color = self.color_up
-                    color_template = "<span color=\"{}\">{}</span>"
-                    per_recv = network_usage["bytes_recv"] / self.recv_limit
-                    per_sent = network_usage["bytes_sent"] / self.sent_limit
-                    c_recv = self.get_gradient(int(per_recv * 100), self.colors, 100)
-                    c_sent = self.get_gradient(int(per_sent * 100), self.colors, 100)
-                    format_values['network_graph_recv'] = color_template.format(c_recv, format_values["network_graph_recv"])
-                    format_values['network_graph_sent'] = color_template.format(c_sent, format_values["network_graph_sent"])
-                else:
-                    if self.coloring_type == "recv":
-                        color = self.get_gradient(network_usage['bytes_recv'], self.colors, self.recv_limit)
-                    elif self.coloring_type == "sent":
-                        color = self.get_gradient(network_usage['bytes_sent'], self.colors, self.sent_limit)
-                    else:
-                        raise Exception("coloring_type must be either 'recv' or 'sent'!")
-            else:
-                color = None
-        else:
-            color = None
-
-        if sysfs_interface_up(self.interface, self.unknown_up):
+        if self.network_info.interface_up(self.interface):
             if not color:
                 color = self.color_up
             format_str = self.format_up
-
             if self.detect_active:
                 for pattern in self.format_active_up:
                     if fnmatch(self.interface, pattern):
@@ -488,20 +576,28 @@ class Network(IntervalModule, ColorRangeModule):
         format_values.update(network_info)
         format_values['interface'] = self.interface
 
-        if self.network_traffic:
-            for metric in ('bytes_recv', 'bytes_sent'):
-                if self.auto_units:
-                    format_values[metric] = '{value:.{round}f}{unit}'.format(
-                        round=self.round_size, **bytes_info_dict(format_values[metric]))
-                else:
-                    format_values[metric] = '{:.{round}f}'.format(format_values[metric] / self.divisor,
-                                                                  round=self.round_size)
-        if self.dynamic_color and self.separate_color and self.pango_enabled:
-            format_values["bytes_recv"] = color_template.format(c_recv, format_values["bytes_recv"])
-            format_values["bytes_sent"] = color_template.format(c_sent, format_values["bytes_sent"])
-
         self.data = format_values
         self.output = {
             "full_text": formatp(format_str, **format_values).strip(),
             'color': color,
         }
+
+    def get_active_interface(self):
+        if self.netlink:
+            return self.network_info.monitor_active_interface(self.interface)
+        return detect_active_interface(self.ignore_interfaces, self.interface)
+
+    def netlink_changed(self):
+        """
+        Called by the netlink monitor, updates everything but the traffic
+        counters and sends the status line right away.
+        """
+        with self.update_lock:
+            if self.detect_active:
+                interface = self.get_active_interface()
+                if interface != self.interface:
+                    self.interface = interface
+                    if self.network_traffic:
+                        self.network_traffic.clear_counters()
+            self.update_output()
+        self.send_output()
@@ -1,4 +1,5 @@
 from i3pystatus import IntervalModule
+from i3pystatus.core import procfs
 
 
 class Openfiles(IntervalModule):
@@ -17,10 +18,7 @@ class Openfiles(IntervalModule):
     format = "open/max: {openfiles}/{maxfiles}"
 
     def run(self):
-
-        cur_filenr = open(self.filenr_path, 'r')
-        openfiles, unused, maxfiles = cur_filenr.readlines()[0].split()
-        cur_filenr.close()
+        openfiles, unused, maxfiles = procfs.file_nr(self.filenr_path)
 
         cdict = {'openfiles': openfiles,
                  'maxfiles': maxfiles}
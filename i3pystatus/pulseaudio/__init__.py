@@ -243,8 +243,8 @@ class PulseAudio(Module, ColorRangeModule):
     def switch_mute(self):
         subprocess.call(['pactl', '--', 'set-sink-mute', self.current_sink, "toggle"])
 
-    def increase_volume(self):
-        subprocess.call(['pactl', '--', 'set-sink-volume', self.current_sink, "+%s%%" % self.step])
+    def increase_volume(self, count=1):
+        subprocess.call(['pactl', '--', 'set-sink-volume', self.current_sink, "+%s%%" % (self.step * count)])
 
-    def decrease_volume(self):
-        subprocess.call(['pactl', '--', 'set-sink-volume', self.current_sink, "-%s%%" % self.step])
+    def decrease_volume(self, count=1):
+        subprocess.call(['pactl', '--', 'set-sink-volume', self.current_sink, "-%s%%" % (self.step * count)])
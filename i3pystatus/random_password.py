@@ -44,12 +44,13 @@ class RandomPassword(Module):
             'length': self.length
         }
 
-        self.output = {
+        output = {
             "full_text": self.format.format(**cdict)
         }
 
         if self.color:
-            self.output["color"] = self.color
+            output["color"] = self.color
+        self.output = output
 
     def _find_cliptool(self):
         if subprocess.call(['which', 'xsel'], stdout=subprocess.PIPE, stderr=subprocess.PIPE) == 0:
@@ -371,7 +371,6 @@ class Scores(Module):
     scroll_arrow = '⬍'
     refresh_icon = '⟳'
 
-    output = {'full_text': ''}
     game_map = {}
     backend_id = 0
 
@@ -383,6 +382,7 @@ class Scores(Module):
     on_doublerightclick = ['reset_backend']
 
     def init(self):
+        self.output = {'full_text': ''}
         if not isinstance(self.backends, list):
             self.backends = [self.backends]
 
@@ -634,8 +634,8 @@ class Scores(Module):
         self.refresh_display()
 
     def show_refresh_icon(self):
-        self.output['full_text'] = \
-            self.refresh_icon + self.output.get('full_text', '')
+        self.output = dict(self.output,
+                           full_text=self.refresh_icon + self.output.get('full_text', ''))
 
     def refresh_display(self):
         if self.current_scroll_index is None:
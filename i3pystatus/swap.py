@@ -1,7 +1,9 @@
 from i3pystatus import IntervalModule
-from psutil import swap_memory
+from .core import datasource, procfs
 from .core.util import round_dict
 
+meminfo = datasource.register("meminfo", procfs.meminfo)
+
 
 class Swap(IntervalModule):
     """
@@ -13,8 +15,6 @@ class Swap(IntervalModule):
     * {percent_used}
     * {used}
     * {total}
-
-    Requires psutil (from PyPI)
     """
 
     format = "{free} MiB"
@@ -51,7 +51,7 @@ class Swap(IntervalModule):
     )
 
     def run(self):
-        swap_usage = swap_memory()
+        swap_usage = meminfo.get(self.interval).data.swap
 
         if self.hide_if_empty and swap_usage.used == 0:
             self.output = {}
@@ -1,4 +1,11 @@
+import collections
+import errno
+import glob
+import os
+import re
+
 from i3pystatus import IntervalModule
+from i3pystatus.core import sysfs, uevent
 from i3pystatus.core.color import ColorRangeModule
 from i3pystatus.core.util import make_vertical_bar
 
@@ -54,6 +61,108 @@ def get_sensors():
     return found_sensors
 
 
+def _index(path):
+    """ Sort key ordering hwmon2 before hwmon10 and temp2_input before temp10_input. """
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", path)]
+
+
+class HwmonSensors:
+    """
+    Temperature sensors of the hwmon sysfs interface
+
+    The sensors are discovered once; afterwards every :py:meth:`read` only
+    re-reads the ``temp*_input`` attributes, through descriptors that are
+    kept open. Thresholds (``temp*_max``, ``temp*_crit``) are read during
+    discovery. Sensors are discovered again when one of them disappears or
+    :py:meth:`invalidate` is called, e.g. on a hwmon uevent.
+
+    Sensors are named after their label. Labels found on several chips are
+    prefixed with the chip's name and its index among the chips of that
+    name, e.g. "coretemp1 Core 0" for the first core of the second CPU.
+
+    :param base_path: Directory containing the hwmon devices
+    :param names: Names or labels of the sensors to read, None for all.
+        Spaces and underscores are interchangeable, like in the formatters.
+    :param default_critical: Critical temperature of sensors reporting
+        neither a critical nor a maximum temperature
+    """
+
+    def __init__(self, base_path="/sys/class/hwmon", names=None, default_critical=90):
+        self.base_path = base_path
+        self.names = None if names is None else {name.replace(' ', '_') for name in names}
+        self.default_critical = default_critical
+        self.sensors = None
+        self.unavailable = []
+
+    def invalidate(self):
+        self.sensors = None
+
+    def discover(self):
+        """ Find all temperature sensors, returns a list of (name, input attribute, maximum, critical). """
+        found = []
+        chips = collections.Counter()
+        for hwmon in sorted(glob.glob(os.path.join(self.base_path, "*")), key=_index):
+            # e.g. coretemp0 and coretemp1 on a machine with two CPUs
+            chip = sysfs.read(os.path.join(hwmon, "name"), os.path.basename(hwmon)).strip()
+            chips[chip] += 1
+            chip = "{}{}".format(chip, chips[chip] - 1)
+            for input_path in sorted(glob.glob(os.path.join(hwmon, "temp*_input")), key=_index):
+                prefix = input_path[:-len("_input")]
+                label = sysfs.read(prefix + "_label", os.path.basename(prefix)).strip()
+                found.append((chip, label, prefix))
+
+        labels = collections.Counter(label for chip, label, prefix in found)
+        sensors = []
+        for chip, label, prefix in found:
+            name = "{} {}".format(chip, label) if labels[label] > 1 else label
+            if self.names is not None and not {name.replace(' ', '_'), label.replace(' ', '_')} & self.names:
+                continue
+            maximum, critical = (self.millidegrees(path) for path in (prefix + "_max", prefix + "_crit"))
+            sensors.append((name, sysfs.get_attribute(prefix + "_input"), maximum,
+                            critical or maximum or self.default_critical))
+        return sensors
+
+    @staticmethod
+    def millidegrees(path):
+        try:
+            return int(sysfs.read(path)) / 1000
+        except (OSError, ValueError):
+            return None
+
+    def read(self):
+        """
+        Return a list of :py:class:`Sensor` with the current temperatures.
+
+        Sensors that can't be read are left out and their names stored in
+        :py:attr:`unavailable`. Some drivers fail reads while their device
+        is down, e.g. iwlwifi with ENODATA, so this doesn't invalidate the
+        sensors; only a sensor that went away does.
+        """
+        for attempt in range(2):
+            # invalidate() may be called from another thread at any time
+            sensors = self.sensors
+            if sensors is None:
+                sensors = self.sensors = self.discover()
+            found, unavailable, gone = [], [], False
+            for name, attribute, maximum, critical in sensors:
+                try:
+                    current = int(attribute.read()) / 1000
+                except OSError as e:
+                    gone = gone or e.errno in (errno.ENODEV, errno.ENOENT)
+                    unavailable.append(name.replace(' ', '_'))
+                    continue
+                except ValueError:
+                    unavailable.append(name.replace(' ', '_'))
+                    continue
+                found.append(Sensor(name=name, current=current, maximum=maximum, critical=critical))
+            if not gone:
+                break
+            # a device went away
+            self.invalidate()
+        self.unavailable = unavailable
+        return found
+
+
 class Temperature(IntervalModule, ColorRangeModule):
     """
     Shows CPU temperature of Intel processors.
@@ -68,6 +177,18 @@ class Temperature(IntervalModule, ColorRangeModule):
         * only the {temp} formatter is available
         * alert_temp is honored
 
+    If hwmon_enabled is set to True, the module operates in hwmon mode. This works like lm_sensors mode, but:
+        * no third party libraries are required, the sensors are read from /sys/class/hwmon directly
+        * sensors without a label are named after their attribute, e.g. temp1
+        * labels found on several chips are prefixed with the chip name and its index, e.g. the first cores of a
+          machine with two CPUs are ``{coretemp0_Core_0}`` and ``{coretemp1_Core_0}``
+        * sensors without a critical or maximum temperature use alert_temp as critical temperature
+        * ``sensors`` limits the sensors that are read, by name or by label (``Core_0`` selects the sensors of
+          all CPUs)
+        * sensors are discovered on startup and again when a sensor disappears. With ``uevent`` set to True,
+          sensors that are plugged in later are picked up as well.
+        * sensors that can't be read at the moment, e.g. of a wifi card that is down, are shown empty
+
     If lm_sensors_enabled is set to True, the module operates in lm_sensors mode. This means that:
         * pysensors must be installed (https://github.com/bastienleonard/pysensors)
         * CPU sensors are discovered dynamically (supporting a sensor per core and multiple CPUs)
@@ -151,6 +272,11 @@ class Temperature(IntervalModule, ColorRangeModule):
          "format string used for output. {temp} is the temperature in degrees celsius"),
         ('display_if', 'snippet that gets evaluated. if true, displays the module output'),
         ('lm_sensors_enabled', 'whether or not lm_sensors should be used for obtaining CPU temperature information'),
+        ('hwmon_enabled', 'whether or not the hwmon sysfs interface should be used for obtaining temperature '
+                          'information, see hwmon mode'),
+        ('hwmon_path', 'directory containing the hwmon devices'),
+        ('sensors', 'list of the names of the sensors to read in hwmon mode, None to read all'),
+        ('uevent', 'discover hwmon sensors again when the kernel reports a new hwmon device (Linux only)'),
         ('urgent_on', 'whether to flag as urgent when temperature exceeds urgent value or critical value '
                       '(requires lm_sensors_enabled)'),
         ('dynamic_color', 'whether to set the color dynamically (overrides alert_color)'),
@@ -167,16 +293,31 @@ class Temperature(IntervalModule, ColorRangeModule):
     display_if = 'True'
 
     lm_sensors_enabled = False
+    hwmon_enabled = False
+    hwmon_path = "/sys/class/hwmon"
+    sensors = None
+    uevent = False
     dynamic_color = False
     urgent_on = 'warning'
 
     def init(self):
         self.pango_enabled = self.hints.get("markup", False) and self.hints["markup"] == "pango"
         self.colors = self.get_hex_color_range(self.start_color, self.end_color, 100)
+        if self.hwmon_enabled:
+            self.hwmon = HwmonSensors(self.hwmon_path, self.sensors, self.alert_temp)
+            if self.uevent:
+                uevent.get_monitor().subscribe("hwmon", self.hwmon_changed)
+
+    def hwmon_changed(self, event):
+        """ Called by the uevent monitor for every hwmon event. """
+        if event.get("ACTION") in ("add", "remove"):
+            self.hwmon.invalidate()
 
     def run(self):
         if eval(self.display_if):
-            if self.lm_sensors_enabled:
+            if self.hwmon_enabled:
+                self.output = self.get_output_hwmon()
+            elif self.lm_sensors_enabled:
                 self.output = self.get_output_sensors()
             else:
                 self.output = self.get_output_original()
@@ -202,15 +343,30 @@ class Temperature(IntervalModule, ColorRangeModule):
         """
         Build the output using lm_sensors. Requires sensors Python module (see docs).
         """
-        data = dict()
         found_sensors = get_sensors()
         if len(found_sensors) == 0:
             raise Exception("No sensors detected! "
                             "Ensure lm-sensors is installed and check the output of the `sensors` command.")
+        return self.format_sensors(found_sensors)
+
+    def get_output_hwmon(self):
+        """
+        Build the output from the hwmon sysfs interface. Requires no third party libraries.
+        """
+        found_sensors = self.hwmon.read()
+        if len(found_sensors) == 0 and len(self.hwmon.unavailable) == 0:
+            raise Exception("No sensors detected! Check the contents of {}.".format(self.hwmon_path))
+        return self.format_sensors(found_sensors, self.hwmon.unavailable)
+
+    def format_sensors(self, found_sensors, unavailable=()):
+        """ Build the output for a list of sensors, sensors that couldn't be read are shown empty. """
+        data = dict()
+        for name in unavailable:
+            data[name] = data["{}_bar".format(name)] = ""
         for sensor in found_sensors:
             data[sensor.name] = self.format_sensor(sensor)
             data["{}_bar".format(sensor.name)] = self.format_sensor_bar(sensor)
-        data['temp'] = max((s.current for s in found_sensors))
+        data['temp'] = max((s.current for s in found_sensors), default="")
         return {
             'full_text': self.format.format(**data),
             'urgent': self.get_urgent(found_sensors),
@@ -1,5 +1,6 @@
 
 from i3pystatus import IntervalModule, formatp
+from i3pystatus.core import procfs
 
 
 class Uptime(IntervalModule):
@@ -31,8 +32,7 @@ class Uptime(IntervalModule):
     color_alert = "#ff0000"
 
     def run(self):
-        with open(self.file, "r") as f:
-            seconds = int(float(f.read().split()[0]))
+        seconds = int(procfs.uptime(self.file))
 
         raw_seconds = seconds
 
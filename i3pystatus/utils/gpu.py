@@ -1,11 +1,18 @@
 import subprocess
+import threading
 from collections import namedtuple
-from typing import Optional
+from typing import List, Optional
+
+from i3pystatus.core import datasource
 
 GPUUsageInfo = namedtuple('GPUUsageInfo', ['total_mem', 'avail_mem', 'used_mem',
                                            'temp', 'percent_fan',
                                            'usage_gpu', 'usage_mem'])
 
+QUERY_PARAMS = ["memory.total", "memory.free", "memory.used",
+                "temperature.gpu", "fan.speed",
+                "utilization.gpu", "utilization.memory"]
+
 
 def _convert_nvidia_smi_value(value) -> Optional[int]:
     value = value.lower()
@@ -16,7 +23,160 @@ def _convert_nvidia_smi_value(value) -> Optional[int]:
     return int(value)
 
 
-def query_nvidia_smi(gpu_number) -> GPUUsageInfo:
+def _parse_nvidia_smi_line(line) -> List[Optional[int]]:
+    return [_convert_nvidia_smi_value(value) for value in line.strip().split(", ")]
+
+
+class NvidiaSmiLoop:
+    """
+    Samples all GPUs with one long-lived ``nvidia-smi --loop-ms`` process
+
+    The process prints the state of all GPUs every `loop_ms` milliseconds.
+    A thread parses its output and keeps the latest complete set of lines,
+    so reading it doesn't spawn any process. The process is started on the
+    first :py:meth:`sample` and started again if it exits.
+
+    :param command: nvidia-smi executable
+    :param loop_ms: Interval of nvidia-smi in milliseconds
+    :param timeout: Seconds to wait for the first output of nvidia-smi
+    """
+
+    def __init__(self, command="nvidia-smi", loop_ms=1000, timeout=5):
+        self.command = command
+        self.loop_ms = loop_ms
+        self.timeout = timeout
+        self.process = None
+        self.gpus = None
+        self.count = None
+        self.updated = threading.Event()
+        self.lock = threading.Lock()
+
+    def start(self):
+        try:
+            self.process = subprocess.Popen([self.command,
+                                             "--query-gpu=index,{}".format(','.join(QUERY_PARAMS)),
+                                             "--format=csv,noheader,nounits",
+                                             "--loop-ms={}".format(self.loop_ms)],
+                                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                            universal_newlines=True)
+        except FileNotFoundError:
+            raise Exception("No nvidia-smi")
+        # a new event, so that the reader of an old process can't wake up callers waiting for this one
+        self.updated = threading.Event()
+        thread = threading.Thread(target=self.read, args=(self.process, self.updated), name="nvidia-smi")
+        thread.daemon = True
+        thread.start()
+
+    def read(self, process, updated):
+        pending = []
+        for line in process.stdout:
+            try:
+                index, *values = _parse_nvidia_smi_line(line)
+                info = GPUUsageInfo(*values)
+            except (ValueError, TypeError):
+                continue
+            # the first GPU starts the next round of output
+            if index == 0 and pending:
+                self.publish(pending, updated)
+                pending = []
+            pending.append(info)
+            if len(pending) == self.count:
+                self.publish(pending, updated)
+                pending = []
+        if pending:
+            self.publish(pending, updated)
+        process.wait()
+        # wake up callers waiting for the first output
+        updated.set()
+
+    def publish(self, gpus, updated):
+        self.gpus = gpus
+        self.count = len(gpus)
+        updated.set()
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            self.process.wait()
+
+    def sample(self) -> List[GPUUsageInfo]:
+        """ Return the latest state of all GPUs, raises exception with readable comment. """
+        with self.lock:
+            if self.process is None or self.process.poll() is not None:
+                self.gpus = None
+                self.start()
+            process, updated = self.process, self.updated
+        if not updated.wait(self.timeout) or self.gpus is None:
+            if process.poll() is not None:
+                raise Exception("nvidia-smi call failed")
+            raise Exception("nvidia-smi didn't report any GPU")
+        return self.gpus
+
+
+class Nvml:
+    """
+    Samples all GPUs through the NVML bindings (pynvml), without any process
+
+    Fields that are not supported by a GPU are None, like with nvidia-smi.
+    """
+
+    def __init__(self):
+        import pynvml
+        self.nvml = pynvml
+        pynvml.nvmlInit()
+        self.handles = [pynvml.nvmlDeviceGetHandleByIndex(i) for i in range(pynvml.nvmlDeviceGetCount())]
+
+    def query(self, function, *args):
+        try:
+            return function(*args)
+        except self.nvml.NVMLError:
+            return None
+
+    def sample(self) -> List[GPUUsageInfo]:
+        nvml = self.nvml
+        gpus = []
+        for handle in self.handles:
+            memory = self.query(nvml.nvmlDeviceGetMemoryInfo, handle)
+            utilization = self.query(nvml.nvmlDeviceGetUtilizationRates, handle)
+            gpus.append(GPUUsageInfo(
+                total_mem=memory.total // 2 ** 20 if memory else None,
+                avail_mem=memory.free // 2 ** 20 if memory else None,
+                used_mem=memory.used // 2 ** 20 if memory else None,
+                temp=self.query(nvml.nvmlDeviceGetTemperature, handle, nvml.NVML_TEMPERATURE_GPU),
+                percent_fan=self.query(nvml.nvmlDeviceGetFanSpeed, handle),
+                usage_gpu=utilization.gpu if utilization else None,
+                usage_mem=utilization.memory if utilization else None,
+            ))
+        return gpus
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def get_sampler():
+    """
+    Return the shared GPU sampler: :py:class:`Nvml` if pynvml is installed
+    and working, :py:class:`NvidiaSmiLoop` otherwise.
+    """
+    global _sampler
+    with _sampler_lock:
+        if _sampler is None:
+            try:
+                _sampler = Nvml()
+            except Exception:
+                _sampler = NvidiaSmiLoop()
+        return _sampler
+
+
+def sample_nvidia() -> List[GPUUsageInfo]:
+    return get_sampler().sample()
+
+
+nvidia = datasource.register("nvidia", sample_nvidia)
+
+
+def query_nvidia_smi(gpu_number, max_age=None) -> GPUUsageInfo:
     """
     :return:
         all memory fields are in megabytes,
@@ -28,25 +188,11 @@ def query_nvidia_smi(gpu_number) -> GPUUsageInfo:
 
         Any field can be None if such information is not supported by nvidia-smi for current GPU
 
-        Returns None if call failed (no nvidia-smi or query format was changed)
+        The result is taken from the shared "nvidia" data source, which is
+        fed by one sampler for all GPUs and GPU modules (see
+        :py:func:`get_sampler`), so no process is spawned per call. It is
+        no older than `max_age` seconds or the period of the source.
 
         Raises exception with readable comment
     """
-    params = ["memory.total", "memory.free", "memory.used",
-              "temperature.gpu", "fan.speed",
-              "utilization.gpu", "utilization.memory"]
-    try:
-        output = subprocess.check_output(["nvidia-smi",
-                                          "--query-gpu={}".format(','.join(params)),
-                                          "--format=csv,noheader,nounits"])
-    except FileNotFoundError:
-        raise Exception("No nvidia-smi")
-    except subprocess.CalledProcessError:
-        raise Exception("nvidia-smi call failed")
-
-    output = output.decode('utf-8').split("\n")[gpu_number].strip()
-    values = output.split(", ")
-
-    values = [_convert_nvidia_smi_value(value) for value in values]
-
-    return GPUUsageInfo(*values)
+    return nvidia.get(max_age).data[gpu_number]
@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 
 import os.path
+from unittest.mock import MagicMock
 
 import pytest
 
@@ -30,3 +31,37 @@ def test_basic(path, status, consumption, remaining):
     battery_test(path, "{status}", status)
     battery_test(path, "{consumption:.3f}", consumption)
     battery_test(path, "{remaining:%hh:%Mm}", remaining)
+
+
+def test_uevent_parser():
+    info = battery.UEventParser.parse("POWER_SUPPLY_NAME=BAT0\n"
+                                      "POWER_SUPPLY_STATUS=Charging\n"
+                                      "POWER_SUPPLY_VOLTAGE_MIN_DESIGN=10800000\n"
+                                      "POWER_SUPPLY_ENERGY_NOW=64300000\n")
+    assert info == {"STATUS": "Charging", "ENERGY_NOW": 64.3}
+
+
+def test_uevent_triggers_refresh(monkeypatch):
+    from i3pystatus.core import uevent
+
+    monitor = uevent.UeventMonitor()
+    monkeypatch.setattr(uevent, "get_monitor", lambda: monitor)
+    bc = battery.BatteryChecker(path=os.path.dirname(__file__) + "/test_battery_basic3", format="{status}",
+                                uevent=True)
+    monkeypatch.setattr(bc, "send_output", MagicMock())
+    monitor.dispatch(b"change@/devices/LNXSYSTM:00/ACPI0003:00/power_supply/AC\0"
+                     b"ACTION=change\0SUBSYSTEM=power_supply\0POWER_SUPPLY_ONLINE=1\0")
+    assert bc.output["full_text"] == "DIS"
+    bc.send_output.assert_called_once_with()
+
+
+def test_uevent_errors_are_shown(monkeypatch):
+    from i3pystatus.core import uevent
+
+    monitor = uevent.UeventMonitor()
+    monkeypatch.setattr(uevent, "get_monitor", lambda: monitor)
+    bc = battery.BatteryChecker(path=os.path.dirname(__file__) + "/test_battery_basic3", format="{missing}",
+                                uevent=True)
+    monitor.dispatch(b"change@/devices/LNXSYSTM:00/ACPI0003:00/power_supply/AC\0"
+                     b"ACTION=change\0SUBSYSTEM=power_supply\0POWER_SUPPLY_ONLINE=1\0")
+    assert bc.output["full_text"].startswith("BatteryChecker: ")
@@ -0,0 +1,27 @@
+from i3pystatus.core.color import ColorRangeModule, get_gradient_table, parse_color
+
+
+def test_parse_color():
+    assert parse_color("#f00") == (1.0, 0.0, 0.0)
+    assert parse_color("#00FF00") == (0.0, 1.0, 0.0)
+    assert parse_color("Red") == (1.0, 0.0, 0.0)
+
+
+def test_gradient_is_interpolated_in_hsl():
+    colors = ColorRangeModule.get_hex_color_range("#00FF00", "red", 5)
+    assert list(colors) == ["#00ff00", "#7fff00", "#ffff00", "#ff7f00", "#ff0000"]
+
+
+def test_gradient_tables_are_shared():
+    colors = ColorRangeModule.get_hex_color_range("#00FF00", "red", 100)
+    assert len(colors) == 100
+    assert colors is get_gradient_table("#00FF00", "red", 100)
+
+
+def test_get_gradient():
+    module = ColorRangeModule()
+    colors = module.get_hex_color_range("#00FF00", "red", 100)
+    assert module.get_gradient(0, colors) == "#00ff00"
+    assert module.get_gradient(150, colors) == "#ff0000"
+    assert module.get_gradient(-5, colors) == "#00ff00"
+    assert module.get_gradient(5, colors, 10) == colors[50]
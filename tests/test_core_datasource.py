@@ -0,0 +1,129 @@
+import threading
+import time
+from array import array
+
+import pytest
+
+from i3pystatus.core import datasource
+from i3pystatus.core.datasource import DataSource
+
+
+class Counter:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.calls
+
+
+def test_sampled_once_per_period():
+    sampler = Counter()
+    source = DataSource("test", sampler, period=10)
+    first = source.get()
+    second = source.get()
+    assert sampler.calls == 1
+    assert first is second
+    assert first.data == 1
+    assert first.timestamp <= time.monotonic()
+
+
+def test_resampled_after_period():
+    sampler = Counter()
+    source = DataSource("test", sampler, period=0.01)
+    source.get()
+    time.sleep(0.02)
+    assert source.get().data == 2
+    assert source.get(max_age=0).data == 3
+    source.invalidate()
+    assert source.get(max_age=10).data == 4
+
+
+def test_errors_are_not_cached():
+    calls = []
+
+    def sampler():
+        calls.append(None)
+        if len(calls) == 1:
+            raise OSError("broken")
+        return "ok"
+
+    source = DataSource("test", sampler, period=10)
+    with pytest.raises(OSError):
+        source.get()
+    assert source.get().data == "ok"
+
+
+def test_concurrent_readers_share_sample():
+    def sampler():
+        time.sleep(0.05)
+        return object()
+
+    source = DataSource("test", sampler, period=10)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(source.get())) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(id(snapshot.data) for snapshot in results)) == 1
+
+
+def test_registry():
+    sampler = Counter()
+    source = datasource.register("test-registry", sampler)
+    assert datasource.register("test-registry", sampler) is source
+    assert datasource.get_source("test-registry") is source
+    assert datasource.sample("test-registry").data == 1
+    with pytest.raises(ValueError):
+        datasource.register("test-registry", Counter())
+    with pytest.raises(KeyError):
+        datasource.get_source("test-missing")
+
+
+def test_cpu_modules_share_procstat(monkeypatch):
+    from i3pystatus.cpu_usage import CpuUsage, procstat
+    from i3pystatus.cpu_usage_bar import CpuUsageBar
+    from i3pystatus.core.procfs import CpuTotals
+
+    readings = iter([
+        CpuTotals(("cpu", "cpu0"), array("q", [100, 100]), array("q", [10, 10])),
+        CpuTotals(("cpu", "cpu0"), array("q", [200, 200]), array("q", [60, 60])),
+    ])
+    monkeypatch.setattr(procstat, "sampler", lambda: next(readings))
+    monkeypatch.setattr(procstat, "period", 10)
+    procstat.invalidate()
+
+    text, bar = CpuUsage(), CpuUsageBar()
+    text.run()
+    bar.run()
+    procstat.invalidate()
+    text.run()
+    bar.run()
+    assert text.data["usage"] == 50
+    assert bar.data["usage"] == 50
+    procstat.invalidate()
+
+
+def test_max_age_shorter_than_period():
+    sampler = Counter()
+    source = DataSource("test", sampler, period=10)
+    source.get()
+    time.sleep(0.02)
+    assert source.get(max_age=0.01).data == 2
+    # a longer max_age doesn't extend the period
+    source.period = 0.01
+    time.sleep(0.02)
+    assert source.get(max_age=10).data == 3
+
+
+def test_configure(monkeypatch):
+    monkeypatch.setattr(datasource, "_default_period", datasource.DEFAULT_PERIOD)
+    monkeypatch.setattr(datasource, "_periods", {})
+    first = datasource.register("test-configure-1", Counter())
+    datasource.configure(period=2, periods={"test-configure-2": 5})
+    second = datasource.register("test-configure-2", Counter())
+    third = datasource.register("test-configure-3", Counter())
+    assert (first.period, second.period, third.period) == (2, 5, 2)
+    datasource.configure(periods={"test-configure-1": 1})
+    assert (first.period, second.period, third.period) == (1, 5, 2)
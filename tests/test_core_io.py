@@ -0,0 +1,78 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+from i3pystatus.core.io import StandaloneIO
+from i3pystatus.core.modules import Module
+
+
+def consume(io, lines):
+    # the time the line was emitted at, unaffected by scheduling of this thread
+    for line in io.read():
+        lines.append(io.last_emit)
+
+
+def start_reader(io):
+    lines = []
+    reader = threading.Thread(target=consume, args=(io, lines))
+    reader.daemon = True
+    reader.start()
+    return lines
+
+
+def test_interval_mode_emits_periodically():
+    io = StandaloneIO(False, [], False, interval=0.02)
+    lines = start_reader(io)
+    time.sleep(0.2)
+    assert len(lines) > 5
+
+
+def test_emit_on_change_only_emits_changes():
+    io = StandaloneIO(False, [], False, emit_on_change=True, min_emit_interval=0.05)
+    lines = start_reader(io)
+    time.sleep(0.1)
+    assert len(lines) == 0
+
+    start = time.perf_counter()
+    for i in range(20):
+        io.output_changed()
+        time.sleep(0.01)
+    time.sleep(0.1)
+    elapsed = time.perf_counter() - start
+    assert 2 <= len(lines) <= elapsed / 0.05 + 1
+    assert all(b - a >= 0.05 for a, b in zip(lines, lines[1:]))
+
+
+def test_emit_on_change_heartbeat():
+    io = StandaloneIO(False, [], False, emit_on_change=True, min_emit_interval=0, heartbeat=0.03)
+    lines = start_reader(io)
+    time.sleep(0.2)
+    assert len(lines) > 3
+
+
+def test_output_changes_are_compared_by_value():
+    status_handler = MagicMock()
+    module = Module()
+    module.registered(status_handler)
+
+    module.output = {"full_text": "a"}
+    module.inject([])
+    module.output = {"full_text": "a"}
+    assert status_handler.io.output_changed.call_count == 1
+    module.output = {"full_text": "b"}
+    assert status_handler.io.output_changed.call_count == 2
+
+
+def test_refresh_requests_are_coalesced():
+    io = StandaloneIO(False, [], False, interval=10, refresh_window=0.5)
+    lines = start_reader(io)
+    time.sleep(0.05)
+
+    requested = time.perf_counter()
+    for i in range(10):
+        io.async_refresh()
+        time.sleep(0.002)
+    time.sleep(1)
+    assert len(lines) == 1
+    # emitted after the window, long before the interval
+    assert 0.5 <= lines[0] - requested < 5
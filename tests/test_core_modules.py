@@ -1,9 +1,16 @@
+import importlib
+import json
+import pkgutil
+import threading
 import time
 from unittest.mock import MagicMock
 
 import pytest
+import i3pystatus
 from i3pystatus import IntervalModule, Status
+from i3pystatus.core import CommandEndpoint
 from i3pystatus.core.exceptions import ConfigMissingError
+from i3pystatus.core.io import StatusLineIO
 from i3pystatus.core.modules import is_method_of, Module
 
 left_click = 1
@@ -226,3 +233,204 @@ def test_required_subclass_overide():
         some_setting = 'foo'
 
     TestSubClass()
+
+
+def test_render_matches_inject():
+    outputs = [
+        {"full_text": "plain", "color": "#FFFFFF"},
+        {"full_text": "a & b", "markup": "pango", "short_text": "&amp;"},
+        {"full_text": "named", "name": "custom", "color": "#FF0000"},
+    ]
+    for output in outputs:
+        module = Module(hints={"markup": "none", "separator": False})
+        module.output = dict(output)
+        injected = []
+        module.inject(injected)
+        assert json.loads(module.render()) == injected[0]
+
+
+def test_render_is_cached_until_output_changes():
+    module = Module()
+    assert module.render() is None
+    module.output = {"full_text": "a"}
+    rendered = module.render()
+    module.output = {"full_text": "a"}
+    assert module.render() is rendered
+    module.output = {"full_text": "b"}
+    assert json.loads(module.render())["full_text"] == "b"
+
+
+def test_status_line_matches_json_line():
+    modules = []
+    for i, position in enumerate((0, 0, -1, 1)):
+        module = Module(hints={})
+        module.output = {"full_text": str(i)}
+        module.position = position
+        modules.append(module)
+
+    expected = []
+    for module in modules:
+        module.inject(expected)
+
+    line = StatusLineIO(MagicMock(), modules, skiplines=0).render()
+    assert json.loads(line) == expected
+
+
+def test_slow_click_does_not_block_other_modules():
+    class Slow(Module):
+        def hang(self):
+            time.sleep(0.5)
+
+        on_leftclick = "hang"
+
+    class Fast(Module):
+        clicked = False
+
+        def click(self):
+            self.clicked = True
+
+        on_leftclick = "click"
+
+    slow, fast = Slow(), Fast()
+    modules = {str(id(slow)): slow, str(id(fast)): fast}
+    clicks = MagicMock()
+    clicks.return_value.read.return_value = [
+        {"instance": str(id(slow)), "button": 1, "x": 0, "y": 0},
+        {"instance": str(id(fast)), "button": 1, "x": 0, "y": 0},
+    ]
+    endpoint = CommandEndpoint(modules, clicks, MagicMock())
+    endpoint.start()
+    time.sleep(0.1)
+    assert fast.clicked
+
+
+def test_clicks_are_handled_while_workers_are_blocked():
+    release = threading.Event()
+    handled = threading.Event()
+
+    class Blocking(Module):
+        def hang(self):
+            release.wait()
+
+        on_leftclick = "hang"
+
+    class Fast(Module):
+        def click(self):
+            handled.set()
+
+        on_leftclick = "click"
+
+    a, b, c = Blocking(), Blocking(), Fast()
+    modules = {str(id(module)): module for module in (a, b, c)}
+    clicks = MagicMock()
+    clicks.return_value.read.return_value = [
+        {"instance": str(id(module)), "button": 1, "x": 0, "y": 0} for module in (a, b, c)
+    ]
+    status = Status(click_workers=3)
+    assert status.command_endpoint.pool.workers == 3
+    endpoint = CommandEndpoint(modules, clicks, MagicMock(), workers=3)
+    endpoint.start()
+    try:
+        assert handled.wait(1)
+    finally:
+        release.set()
+
+
+def test_scroll_events_are_coalesced():
+    class Volume(Module):
+        scroll_coalesce_timeout = 0.05
+        volume = 0
+        calls = 0
+        runs = 0
+
+        def increase(self, count=1):
+            self.calls += 1
+            self.volume += count
+
+        def decrease(self, count=1):
+            self.calls += 1
+            self.volume -= count
+
+        def run(self):
+            self.runs += 1
+
+        on_upscroll = "increase"
+        on_downscroll = "decrease"
+
+    module = Volume()
+    for i in range(10):
+        module.on_click(scroll_up)
+    time.sleep(0.1)
+    assert module.volume == 10
+    assert module.calls == 1
+    assert module.runs == 1
+
+    for i in range(3):
+        module.on_click(scroll_up)
+    for i in range(2):
+        module.on_click(scroll_down)
+    time.sleep(0.1)
+    assert module.volume == 11
+    assert module.calls == 3
+
+
+def test_update_timeout_is_passed_to_the_scheduler(monkeypatch):
+    scheduler = MagicMock()
+    monkeypatch.setattr(IntervalModule, "scheduler", scheduler)
+
+    class HttpModule(IntervalModule):
+        # a setting of the module itself, not a hang timeout
+        timeout = 5
+
+        def run(self):
+            pass
+
+    HttpModule(update_timeout=20).registered(MagicMock())
+    HttpModule().registered(MagicMock())
+    assert [call[0][2] for call in scheduler.append.call_args_list] == [20, None]
+
+
+def test_coalesced_scroll_events_are_dispatched():
+    events = []
+
+    class Volume(Module):
+        scroll_coalesce_timeout = 0.05
+
+        def increase(self, count=1):
+            events.append(("increase", count, threading.current_thread().name))
+
+        def run(self):
+            events.append(("run",))
+
+        on_upscroll = "increase"
+
+    module = Volume()
+    modules = {str(id(module)): module}
+    clicks = MagicMock()
+    clicks.return_value.read.return_value = [
+        {"instance": str(id(module)), "button": scroll_up, "x": 0, "y": 0},
+    ] * 5
+    status_handler = MagicMock()
+    status_handler.io.async_refresh.side_effect = lambda: events.append(("refresh",))
+    endpoint = status_handler.command_endpoint = CommandEndpoint(modules, clicks, status_handler.io)
+    module.registered(status_handler)
+    endpoint.start()
+    deadline = time.monotonic() + 2
+    while len(events) < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.05)
+    # run once, on a click worker, and refresh after the run
+    assert [event[:2] for event in events] == [("increase", 5), ("run",), ("refresh",)]
+    assert events[0][2].startswith("click")
+
+
+def test_no_module_shadows_the_output_property():
+    for info in pkgutil.iter_modules(i3pystatus.__path__):
+        try:
+            module = importlib.import_module("i3pystatus." + info.name)
+        except Exception:
+            # optional dependency missing
+            continue
+        for cls in vars(module).values():
+            if isinstance(cls, type) and issubclass(cls, Module):
+                assert isinstance(getattr(cls, "output"), property), cls
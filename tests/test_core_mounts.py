@@ -0,0 +1,151 @@
+import os
+import threading
+
+import pytest
+
+from i3pystatus.core import mounts
+
+MOUNTINFO = """\
+22 1 254:0 / / rw,relatime shared:1 - ext4 /dev/vda rw
+40 22 0:35 / /home/user/My\\040Drive rw,nosuid shared:20 - fuse.rclone drive: rw,user_id=1000
+41 22 0:36 / /srv/nfs rw master:3 - nfs4 server:/export rw,vers=4.2
+garbage
+"""
+
+
+def test_parse_mountinfo():
+    table = mounts.parse_mountinfo(MOUNTINFO)
+    assert sorted(table) == ["/", "/home/user/My Drive", "/srv/nfs"]
+    assert table["/srv/nfs"] == mounts.Mount("/srv/nfs", "nfs4", "server:/export")
+
+
+def test_find_mount():
+    monitor = mounts.MountMonitor()
+    monitor.mounts = mounts.parse_mountinfo(MOUNTINFO)
+    assert monitor.is_mounted("/srv/nfs/")
+    assert not monitor.is_mounted("/srv")
+    assert monitor.find_mount("/srv/nfs/a/b").fstype == "nfs4"
+    assert monitor.find_mount("/srv").mount_point == "/"
+    assert mounts.is_network_filesystem(monitor.find_mount("/home/user/My Drive/x").fstype)
+    assert not mounts.is_network_filesystem("ext4")
+
+
+def test_max_age(monkeypatch):
+    calls = []
+    monkeypatch.setattr(mounts.os, "statvfs", lambda path: calls.append(path) or len(calls))
+    entry = mounts.CachedStatvfs("/srv")
+    assert entry.get(max_age=60) == 1
+    assert entry.get(max_age=60) == 1
+    assert entry.get() == 2
+
+
+def test_timeout(monkeypatch):
+    release = threading.Event()
+    calls = []
+
+    def statvfs(path):
+        calls.append(path)
+        release.wait()
+        return "result"
+
+    monkeypatch.setattr(mounts.os, "statvfs", statvfs)
+    entry = mounts.CachedStatvfs("/srv/nfs")
+    with pytest.raises(TimeoutError):
+        entry.get(timeout=0.01)
+    with pytest.raises(TimeoutError):
+        entry.get(timeout=0.01)
+    # the hanging call is waited for, not repeated
+    assert calls == ["/srv/nfs"]
+    # once it has hung for the timeout, later calls don't wait again
+    waited = []
+    monkeypatch.setattr(entry.pending, "wait", waited.append)
+    with pytest.raises(TimeoutError):
+        entry.get(timeout=0.01)
+    assert waited == []
+    monkeypatch.undo()
+    release.set()
+    assert entry.get(timeout=1) == "result"
+
+
+def test_errors_are_raised(monkeypatch):
+    def statvfs(path):
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(mounts.os, "statvfs", statvfs)
+    with pytest.raises(FileNotFoundError):
+        mounts.CachedStatvfs("/srv/nfs").get(timeout=1)
+
+
+def test_disk_statvfs_timeout(monkeypatch):
+    from i3pystatus.disk import Disk
+
+    monitor = mounts.MountMonitor()
+    monitor.mounts = mounts.parse_mountinfo(MOUNTINFO)
+    monkeypatch.setattr(mounts, "get_monitor", lambda: monitor)
+    calls = []
+    monkeypatch.setattr(mounts, "statvfs", lambda path, max_age, timeout: calls.append(timeout) or 1 / 0)
+
+    Disk(path="/srv/nfs", statvfs_timeout=7).run()
+    Disk(path="/", statvfs_timeout=7).run()
+    assert calls == [7, None]
+    # not a scheduler hang timeout
+    assert Disk(path="/srv/nfs").update_timeout is None
+
+
+def test_disk_checks_empty_mount_point_after_changes(monkeypatch, tmpdir):
+    from i3pystatus.disk import Disk
+
+    monitor = mounts.MountMonitor()
+    monitor.mounts = mounts.parse_mountinfo(MOUNTINFO)
+    monkeypatch.setattr(mounts, "get_monitor", lambda: monitor)
+    listed = []
+    listdir = mounts.os.listdir
+    monkeypatch.setattr(mounts.os, "listdir", lambda path: listed.append(path) or listdir(path))
+
+    disk = Disk(path=str(tmpdir))
+    assert disk.is_empty_mount_point()
+    assert disk.is_empty_mount_point()
+    assert listed == [str(tmpdir)]
+    monitor.mounts = dict(monitor.mounts, **{str(tmpdir): mounts.Mount(str(tmpdir), "ext4", "/dev/vdb")})
+    assert not disk.is_empty_mount_point()
+    assert listed == [str(tmpdir)]
+
+
+def test_hung_statvfs_survives_mount_changes(monkeypatch):
+    release = threading.Event()
+    calls = []
+
+    def statvfs(path):
+        calls.append(path)
+        release.wait()
+        return "result"
+
+    monkeypatch.setattr(mounts.os, "statvfs", statvfs)
+    monkeypatch.setattr(mounts, "_cache", {})
+    with pytest.raises(TimeoutError):
+        mounts.statvfs("/srv/nfs", timeout=0.01)
+    entry = mounts._cache["/srv/nfs"]
+    waited = []
+    monkeypatch.setattr(entry.pending, "wait", waited.append)
+    for _ in range(3):
+        mounts._invalidate_cache()
+        with pytest.raises(TimeoutError):
+            mounts.statvfs("/srv/nfs", timeout=0.01)
+    # neither started again nor waited for
+    assert calls == ["/srv/nfs"]
+    assert waited == []
+    assert mounts._cache["/srv/nfs"] is entry
+    release.set()
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/mountinfo"), reason="Linux only")
+def test_watched_descriptor_is_not_reopened():
+    monitor = mounts.MountMonitor()
+    monitor.start()
+    poll_fd = monitor.poll_fd
+    # reading the table may reopen its descriptor, the watched one stays open
+    monitor.file.close()
+    monitor.update()
+    assert monitor.poll_fd == poll_fd != monitor.file.fd
+    os.fstat(poll_fd)
+    assert monitor.mounts
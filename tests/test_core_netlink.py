@@ -0,0 +1,194 @@
+import socket
+import struct
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from i3pystatus.core import netlink
+
+
+def attribute(kind, value):
+    length = netlink.RTATTR.size + len(value)
+    return netlink.RTATTR.pack(length, kind) + value + b"\0" * (-length % 4)
+
+
+def message(kind, payload, seq=0):
+    return netlink.NLMSGHDR.pack(netlink.NLMSGHDR.size + len(payload), kind, 0, seq, 0) + payload
+
+
+def link(kind, index, name, operstate, mac=b"\x02\x00\x00\x00\x00\x01", seq=0):
+    return message(kind, netlink.IFINFOMSG.pack(0, 1, index, 0, 0)
+                   + attribute(netlink.IFLA_IFNAME, name.encode() + b"\0")
+                   + attribute(netlink.IFLA_ADDRESS, mac)
+                   + attribute(netlink.IFLA_OPERSTATE, bytes([operstate])), seq)
+
+
+def address(kind, index, family, addr, prefixlen):
+    return message(kind, netlink.IFADDRMSG.pack(family, prefixlen, 0, 0, index)
+                   + attribute(netlink.IFA_LOCAL, socket.inet_pton(family, addr)))
+
+
+def route(kind, family, oif, dst_len=0, table=netlink.RT_TABLE_MAIN, priority=None):
+    attributes = attribute(netlink.RTA_OIF, struct.pack("=i", oif))
+    if priority is not None:
+        attributes += attribute(netlink.RTA_PRIORITY, struct.pack("=I", priority))
+    return message(kind, netlink.RTMSG.pack(family, dst_len, 0, 0, table, 0, 0, netlink.RTN_UNICAST, 0)
+                   + attributes)
+
+
+def apply(state, data):
+    return [state.apply(kind, payload) for kind, seq, payload in netlink.parse_messages(data)]
+
+
+def test_parse_link():
+    [(kind, seq, payload)] = netlink.parse_messages(link(netlink.RTM_NEWLINK, 3, "veth0", 6))
+    assert kind == netlink.RTM_NEWLINK
+    assert payload == netlink.Link(3, "veth0", "up", "02:00:00:00:00:01")
+
+
+def test_parse_several_messages_and_errors():
+    data = (address(netlink.RTM_NEWADDR, 3, socket.AF_INET6, "fd00::2", 64)
+            + message(netlink.NLMSG_ERROR, struct.pack("=i", -1), seq=7)
+            + message(netlink.NLMSG_DONE, struct.pack("=i", 0), seq=8))
+    messages = netlink.parse_messages(data)
+    assert messages == [
+        (netlink.RTM_NEWADDR, 0, netlink.Address(3, socket.AF_INET6, "fd00::2", 64)),
+        (netlink.NLMSG_ERROR, 7, 1),
+        (netlink.NLMSG_DONE, 8, None),
+    ]
+
+
+def test_truncated_data_is_ignored():
+    data = link(netlink.RTM_NEWLINK, 3, "veth0", 6)
+    assert len(netlink.parse_messages(data + data[:10])) == 1
+
+
+def test_only_default_routes_of_main_table():
+    data = (route(netlink.RTM_NEWROUTE, socket.AF_INET, 3, dst_len=24)
+            + route(netlink.RTM_NEWROUTE, socket.AF_INET, 3, table=255)
+            + route(netlink.RTM_NEWROUTE, socket.AF_INET, 3, priority=100))
+    assert [payload for kind, seq, payload in netlink.parse_messages(data)] == [
+        None, None, netlink.Route(socket.AF_INET, 3, 100)]
+
+
+def test_state():
+    state = netlink.NetlinkState()
+    assert apply(state, link(netlink.RTM_NEWLINK, 1, "lo", 0)
+                 + link(netlink.RTM_NEWLINK, 3, "veth0", 2)
+                 + address(netlink.RTM_NEWADDR, 3, socket.AF_INET, "10.0.0.2", 24)
+                 + address(netlink.RTM_NEWADDR, 3, socket.AF_INET6, "fd00::2", 64)
+                 + route(netlink.RTM_NEWROUTE, socket.AF_INET, 3, priority=600)
+                 + route(netlink.RTM_NEWROUTE, socket.AF_INET, 1, priority=100)) == [True] * 6
+
+    assert state.interfaces() == ["lo", "veth0"]
+    assert state.operstate("veth0") == "down"
+    assert state.operstate("eth9") is None
+    assert state.default_interface(socket.AF_INET) == "lo"
+    assert state.default_interface(socket.AF_INET6) is None
+    assert state.ifaddresses("veth0") == {
+        socket.AF_PACKET: [{"addr": "02:00:00:00:00:01"}],
+        socket.AF_INET: [{"addr": "10.0.0.2", "netmask": "255.255.255.0"}],
+        socket.AF_INET6: [{"addr": "fd00::2", "netmask": "ffff:ffff:ffff:ffff::/64"}],
+    }
+
+    # repeated notifications don't count as change
+    assert apply(state, link(netlink.RTM_NEWLINK, 3, "veth0", 2)) == [False]
+    assert apply(state, link(netlink.RTM_NEWLINK, 3, "veth0", 6)) == [True]
+    assert state.operstate("veth0") == "up"
+
+    apply(state, route(netlink.RTM_DELROUTE, socket.AF_INET, 1, priority=100)
+          + address(netlink.RTM_DELADDR, 3, socket.AF_INET, "10.0.0.2", 24))
+    assert state.default_interface(socket.AF_INET) == "veth0"
+    assert socket.AF_INET not in state.ifaddresses("veth0")
+
+    apply(state, link(netlink.RTM_DELLINK, 3, "veth0", 2))
+    assert state.interfaces() == ["lo"]
+    assert state.ifaddresses("veth0") == {}
+
+
+def test_network_module_is_pushed(monkeypatch):
+    pytest.importorskip("netifaces")
+    from i3pystatus import IntervalModule
+    from i3pystatus.network import Network
+
+    monkeypatch.setattr(IntervalModule, "scheduler", MagicMock())
+    monitor = netlink.NetlinkMonitor()
+    monkeypatch.setattr(netlink, "get_monitor", lambda: monitor)
+    apply(monitor.state, link(netlink.RTM_NEWLINK, 3, "veth0", 6)
+          + address(netlink.RTM_NEWADDR, 3, socket.AF_INET, "10.0.0.2", 24))
+
+    module = Network(interface="veth0", netlink=True, format_up="{interface} {v4cidr}", format_down="down")
+    status_handler = MagicMock()
+    module.registered(status_handler)
+    module.run()
+    assert module.output["full_text"] == "veth0 10.0.0.2/24"
+
+    # a notification while run() is updating the module waits for it
+    apply(monitor.state, link(netlink.RTM_NEWLINK, 3, "veth0", 2))
+    with module.update_lock:
+        thread = threading.Thread(target=monitor.notify)
+        thread.start()
+        thread.join(0.05)
+        assert module.output["full_text"] == "veth0 10.0.0.2/24"
+    thread.join()
+    assert module.output["full_text"] == "down"
+    # sent right away instead of with the next regular status line
+    status_handler.io.async_refresh.assert_called_with()
+
+
+class FakeSocket:
+    def __init__(self, replies):
+        self.replies = replies
+        self.drained = threading.Event()
+
+    def send(self, data):
+        pass
+
+    def recv(self, size):
+        if not self.replies:
+            self.drained.set()
+            threading.Event().wait()
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+
+def done(seq):
+    return message(netlink.NLMSG_DONE, b"\0" * 4, seq)
+
+
+def test_monitor_survives_errors(monkeypatch):
+    import errno
+
+    monkeypatch.setattr(netlink, "RETRY_DELAY", 0)
+    monitor = netlink.NetlinkMonitor()
+    apply(monitor.state, link(netlink.RTM_NEWLINK, 3, "veth0", 2))
+    old_state = monitor.state
+    states = []
+    monitor.subscribe(lambda: states.append(monitor.state))
+    monitor.sock = FakeSocket([
+        OSError(errno.EIO, "I/O error"),
+        # the dump requested after the error overflows as well
+        link(netlink.RTM_NEWLINK, 3, "veth0", 6), OSError(errno.ENOBUFS, "No buffer space available"),
+        link(netlink.RTM_NEWLINK, 3, "veth0", 6) + done(2), done(3), done(4),
+    ])
+    monitor.thread.start()
+    assert monitor.sock.drained.wait(1)
+    assert monitor.thread.is_alive()
+    # the old state stays untouched until the new one is complete
+    assert old_state.operstate("veth0") == "down"
+    assert [state.operstate("veth0") for state in states] == ["up"]
+
+
+def test_notifications_during_dump_are_applied_last():
+    monitor = netlink.NetlinkMonitor()
+    monitor.sock = FakeSocket([
+        # veth0 goes up while the kernel answers the link dump with the old state
+        link(netlink.RTM_NEWLINK, 3, "veth0", 6),
+        link(netlink.RTM_NEWLINK, 3, "veth0", 2, seq=1) + done(1),
+        done(2), done(3),
+    ])
+    state = monitor.dump()
+    assert state.operstate("veth0") == "up"
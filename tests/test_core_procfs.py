@@ -0,0 +1,73 @@
+from i3pystatus.core import procfs
+
+STAT = b"""cpu  100 0 50 800 50 0 0 0 0 0
+cpu0 50 0 25 400 25 0 0 0 0 0
+cpu1 50 0 25 400 25 0 0 0 0 0
+intr 148864 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 0 1 1 2 0 0
+ctxt 562295
+"""
+
+MEMINFO = b"""MemTotal:        8000000 kB
+MemFree:         1000000 kB
+MemAvailable:    6000000 kB
+Buffers:          100000 kB
+Cached:          2000000 kB
+SwapCached:            0 kB
+Active:          3000000 kB
+SwapTotal:       2000000 kB
+SwapFree:        1500000 kB
+"""
+
+
+def fixture(tmpdir, name, content):
+    path = tmpdir.join(name)
+    path.write_binary(content)
+    return str(path)
+
+
+def test_cpu_times(tmpdir):
+    times = procfs.cpu_times(fixture(tmpdir, "stat", STAT))
+    assert set(times) == {"cpu", "cpu0", "cpu1"}
+    assert times["cpu"] == (100, 0, 50, 800, 50, 0, 0, 0, 0, 0)
+
+
+def test_cpu_times_grows_buffer(tmpdir):
+    path = fixture(tmpdir, "stat", STAT)
+    file = procfs.get_file(path)
+    file.buffer = bytearray(16)
+    assert procfs.cpu_times(path)["cpu1"] == (50, 0, 25, 400, 25, 0, 0, 0, 0, 0)
+    # only the cpu lines had to fit
+    assert len(file.buffer) < len(STAT)
+
+
+def test_reread_reuses_descriptor(tmpdir):
+    path = fixture(tmpdir, "uptime", b"1626.38 1418.90\n")
+    assert procfs.uptime(path) == 1626.38
+    fd = procfs.get_file(path).fd
+    with open(path, "r+b") as f:
+        f.write(b"9999.99")
+    assert procfs.uptime(path) == 9999.99
+    assert procfs.get_file(path).fd == fd
+
+
+def test_meminfo(tmpdir):
+    memory, swap = procfs.meminfo(fixture(tmpdir, "meminfo", MEMINFO))
+    assert memory.total == 8000000 * 1024
+    assert memory.available == 6000000 * 1024
+    assert memory.used == 2000000 * 1024
+    assert memory.free == 1000000 * 1024
+    assert memory.percent == 25.0
+    assert swap == (2000000 * 1024, 500000 * 1024, 1500000 * 1024, 25.0)
+
+
+def test_meminfo_without_available(tmpdir):
+    content = MEMINFO.replace(b"MemAvailable:    6000000 kB\n", b"").replace(b"SwapTotal:       2000000 kB\n", b"")
+    memory, swap = procfs.meminfo(fixture(tmpdir, "meminfo", content))
+    assert memory.available == 3100000 * 1024
+    assert swap.total == 0
+    assert swap.percent == 0.0
+
+
+def test_small_files(tmpdir):
+    assert procfs.loadavg(fixture(tmpdir, "loadavg", b"0.21 0.20 0.12 2/71 708\n")) == ("0.21", "0.20", "0.12", "2/71")
+    assert procfs.file_nr(fixture(tmpdir, "file-nr", b"289\t0\t613844\n")) == (289, 0, 613844)
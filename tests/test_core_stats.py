@@ -0,0 +1,77 @@
+import json
+import socket
+import time
+
+import pytest
+
+from i3pystatus.core.stats import Histogram, StatsServer, format_stats
+from i3pystatus.core.threading import Scheduler
+
+
+def test_histogram_percentiles():
+    histogram = Histogram()
+    for i in range(95):
+        histogram.add(0.001)
+    for i in range(5):
+        histogram.add(0.5)
+    summary = histogram.summary()
+    assert summary["count"] == 100
+    assert 0.001 <= summary["p50"] < 0.002
+    assert 0.001 <= summary["p95"] < 0.002
+    assert summary["max"] == 0.5
+    assert histogram.percentile(99) == 0.5
+
+
+def test_histogram_is_fixed_size():
+    histogram = Histogram(buckets=8)
+    histogram.add(1000)
+    assert histogram.counts[-1] == 1
+    assert len(histogram.counts) == 8
+
+
+def test_scheduler_stats(tmpdir):
+    class Broken:
+        output = None
+        __name__ = "test.Broken"
+
+        def __call__(self):
+            raise RuntimeError()
+
+    scheduler = Scheduler(workers=1)
+    scheduler.append(lambda: time.sleep(0.02), 0.01)
+    scheduler.append(Broken(), 0.01)
+    scheduler.start()
+    time.sleep(0.2)
+
+    path = str(tmpdir.join("stats.sock"))
+    StatsServer(path, scheduler).start()
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(path)
+    stats = json.loads(sock.makefile().read())
+    sock.close()
+
+    slow, broken = stats
+    assert slow["runs"] > 1
+    assert slow["overruns"] >= slow["runs"] - 1
+    assert slow["duration"]["p50"] >= 0.02
+    assert broken["module"] == "test.Broken"
+    assert broken["errors"] == broken["failures"] > 1
+    assert broken["effective_interval"] > 0.01
+
+    table = format_stats(stats).splitlines()
+    assert len(table) == 2
+    assert table[0].startswith("<lambda> ")
+    assert "backoff=" in table[1]
+
+
+def test_stats_server_only_replaces_sockets(tmpdir):
+    path = tmpdir.join("stats.sock")
+    StatsServer(str(path), Scheduler()).start()
+    # a stale socket of an earlier instance is replaced
+    StatsServer(str(path), Scheduler()).start()
+
+    notes = tmpdir.join("notes")
+    notes.write("keep me")
+    with pytest.raises(FileExistsError):
+        StatsServer(str(notes), Scheduler()).start()
+    assert notes.read() == "keep me"
@@ -0,0 +1,118 @@
+import errno
+import os
+
+import pytest
+
+from i3pystatus.core import sysfs
+
+
+def test_read_keeps_descriptor(tmpdir):
+    path = tmpdir.join("brightness")
+    path.write("10\n")
+    attribute = sysfs.get_attribute(str(path))
+    assert sysfs.read(str(path)) == "10\n"
+    fd = attribute.fd
+    with open(str(path), "r+") as f:
+        f.write("20\n")
+    assert sysfs.read(str(path)) == "20\n"
+    assert attribute.fd == fd
+
+
+def test_descriptor_is_read_with_the_lock_held(tmpdir, monkeypatch):
+    path = tmpdir.join("value")
+    path.write("1")
+    attribute = sysfs.Attribute(str(path))
+    pread = attribute.pread
+
+    def locked_pread(fd):
+        assert attribute.lock.locked()
+        return pread(fd)
+
+    monkeypatch.setattr(attribute, "pread", locked_pread)
+    assert attribute.read() == "1"
+
+
+def test_ordinary_files_are_read_completely(tmpdir):
+    path = tmpdir.join("notes")
+    # a multi-byte character across the page boundary
+    content = "x" * (sysfs.PAGE_SIZE - 1) + "ä" + "y" * 10000
+    path.write_text(content, "utf-8")
+    assert sysfs.read(str(path)) == content
+    path.write_text("short", "utf-8")
+    assert sysfs.read(str(path)) == "short"
+
+
+def test_replaced_file_is_reopened(tmpdir):
+    path = tmpdir.join("value")
+    path.write("old")
+    assert sysfs.read(str(path)) == "old"
+    replacement = tmpdir.join("value.new")
+    replacement.write("new")
+    os.rename(str(replacement), str(path))
+    assert sysfs.read(str(path)) == "new"
+
+
+def test_missing(tmpdir):
+    path = str(tmpdir.join("missing"))
+    with pytest.raises(FileNotFoundError):
+        sysfs.read(path)
+    assert sysfs.read(path, None) is None
+    with open(path, "w") as f:
+        f.write("plugged")
+    assert sysfs.read(path, None) == "plugged"
+
+
+def test_read_many(tmpdir):
+    paths = []
+    for i in range(3):
+        path = tmpdir.join(str(i))
+        path.write(str(i))
+        paths.append(str(path))
+    paths.append(str(tmpdir.join("missing")))
+    assert sysfs.read_many(paths, "") == ["0", "1", "2", ""]
+
+
+def test_reopen_on_enodev(tmpdir, monkeypatch):
+    path = tmpdir.join("operstate")
+    path.write("up\n")
+    attribute = sysfs.Attribute(str(path))
+    attribute.check_replaced = False
+    assert attribute.read() == "up\n"
+    calls = []
+    pread = os.pread
+
+    def gone(fd, size, offset):
+        calls.append(fd)
+        if len(calls) == 1:
+            raise OSError(errno.ENODEV, os.strerror(errno.ENODEV))
+        return pread(fd, size, offset)
+
+    opened = []
+    open_ = os.open
+
+    def reopen(path, flags):
+        opened.append(path)
+        return open_(path, flags)
+
+    monkeypatch.setattr(os, "pread", gone)
+    monkeypatch.setattr(os, "open", reopen)
+    assert attribute.read() == "up\n"
+    assert len(calls) == 2
+    assert opened == [str(path)]
+
+
+def test_removed_device_is_closed_and_dropped(tmpdir):
+    path = tmpdir.join("rx_bytes")
+    path.write("42\n")
+    attribute = sysfs.get_attribute(str(path))
+    assert sysfs.read(str(path)) == "42\n"
+    path.remove()
+    with pytest.raises(FileNotFoundError):
+        sysfs.read(str(path))
+    assert attribute.fd is None
+    assert str(path) not in sysfs._attributes
+
+    # a new device under the same path gets a new attribute
+    path.write("7\n")
+    assert sysfs.read(str(path)) == "7\n"
+    assert sysfs.get_attribute(str(path)) is not attribute
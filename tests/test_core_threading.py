@@ -0,0 +1,196 @@
+import threading
+import time
+
+from i3pystatus.core.threading import Scheduler, SerialDispatcher, WorkerPool, unwrap_workload
+
+
+class Counter:
+    keep_alive = False
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+
+
+def test_scheduler_runs_workloads_on_interval():
+    scheduler = Scheduler(workers=2)
+    fast, slow = Counter(), Counter()
+    scheduler.append(fast, 0.02)
+    scheduler.append(slow, 10)
+    scheduler.start()
+    time.sleep(0.2)
+    assert fast.calls > 3
+    assert slow.calls == 1
+
+
+def test_scheduler_thread_count_is_independent_of_intervals():
+    scheduler = Scheduler(workers=2)
+    before = threading.active_count()
+    for interval in range(1, 20):
+        scheduler.append(Counter(), interval)
+    scheduler.start()
+    assert threading.active_count() - before == 3
+
+
+def test_slow_workload_does_not_delay_siblings():
+    scheduler = Scheduler(workers=2)
+    fast = Counter()
+    scheduler.append(lambda: time.sleep(0.5), 0.01)
+    scheduler.append(fast, 0.02)
+    scheduler.start()
+    time.sleep(0.2)
+    assert fast.calls > 3
+
+
+def test_suspend_only_runs_keep_alive_workloads():
+    scheduler = Scheduler(workers=1)
+    sleeping, alive = Counter(), Counter()
+    alive.keep_alive = True
+    scheduler.suspend()
+    scheduler.append(sleeping, 0.02)
+    job = scheduler.append(alive, 0.02)
+    assert unwrap_workload(job) is alive
+    scheduler.start()
+    time.sleep(0.1)
+    assert sleeping.calls == 0
+    assert alive.calls > 1
+    scheduler.resume()
+    time.sleep(0.1)
+    assert sleeping.calls > 1
+
+
+def test_hanging_workload_is_marked_stale_and_isolated():
+    release = threading.Event()
+
+    class Hang:
+        stale_indicator = " (stale)"
+        calls = 0
+
+        def __init__(self):
+            self._output = {"full_text": "vpn", "color": "#00FF00"}
+            self.setters = []
+
+        @property
+        def output(self):
+            return self._output
+
+        @output.setter
+        def output(self, value):
+            self.setters.append(threading.current_thread().name)
+            self._output = value
+
+        def __call__(self):
+            self.calls += 1
+            release.wait()
+
+    scheduler = Scheduler(workers=1)
+    hang, fast = Hang(), Counter()
+    job = scheduler.append(hang, 0.01, timeout=0.05)
+    scheduler.append(fast, 0.02)
+    scheduler.start()
+    time.sleep(0.3)
+    assert job.stale
+    assert hang.output == {"full_text": "vpn (stale)", "color": "#00FF00"}
+    # output callbacks don't run on the dispatcher, which holds the scheduler lock
+    assert "scheduler" not in hang.setters
+    assert hang.calls == 1
+    assert fast.calls > 3
+
+    release.set()
+    time.sleep(0.1)
+    assert hang.calls > 1
+    assert len(scheduler.pool.threads) == 1
+    # the run returned without new output, so the indicator is removed
+    assert not job.stale
+    assert hang.output == {"full_text": "vpn", "color": "#00FF00"}
+
+
+def test_stale_output_is_kept_when_replaced():
+    release = threading.Event()
+
+    class Hang:
+        stale_indicator = " (stale)"
+        output = None
+
+        def __call__(self):
+            release.wait()
+            self.output = {"full_text": "new"}
+
+    scheduler = Scheduler(workers=1)
+    hang = Hang()
+    job = scheduler.append(hang, 10, timeout=0.05)
+    scheduler.start()
+    time.sleep(0.2)
+    assert hang.output == {"full_text": "Hang (stale)"}
+    release.set()
+    time.sleep(0.1)
+    assert not job.stale
+    assert hang.output == {"full_text": "new"}
+
+
+def test_failing_workload_backs_off_and_recovers():
+    class Flaky:
+        output = None
+        fail = True
+        calls = 0
+
+        def __call__(self):
+            self.calls += 1
+            if self.fail:
+                raise ValueError("broken")
+            self.output = {"full_text": "ok"}
+
+    scheduler = Scheduler(workers=1, max_backoff=0.08)
+    flaky = Flaky()
+    job = scheduler.append(flaky, 0.01)
+    scheduler.start()
+    time.sleep(0.3)
+    assert 3 < flaky.calls < 10
+    assert job.effective_interval == 0.08
+    assert flaky.output["full_text"] == "Flaky: ValueError: broken (retry in 0s)"
+
+    flaky.fail = False
+    time.sleep(0.15)
+    assert job.failures == 0
+    assert job.effective_interval == 0.01
+    assert flaky.output == {"full_text": "ok"}
+
+
+def test_backoff_can_be_disabled():
+    scheduler = Scheduler(max_backoff=60)
+    job = scheduler.append(Counter(), 1, max_backoff=0)
+    job.failures = 5
+    assert job.effective_interval == 1
+    job = scheduler.append(Counter(), 1)
+    job.failures = 3
+    assert job.effective_interval == 8
+    job.failures = 10
+    assert job.effective_interval == 60
+
+
+def test_serial_dispatcher_serializes_per_key():
+    pool = WorkerPool(4)
+    pool.start()
+    dispatcher = SerialDispatcher(pool)
+    log = []
+    active = set()
+
+    def task(key, i):
+        assert key not in active
+        active.add(key)
+        time.sleep(0.01)
+        log.append((key, i))
+        active.remove(key)
+
+    start = time.perf_counter()
+    for i in range(5):
+        dispatcher.submit("a", task, "a", i)
+        dispatcher.submit("b", task, "b", i)
+    while len(log) < 10:
+        time.sleep(0.01)
+    assert time.perf_counter() - start < 0.09
+    assert [i for key, i in log if key == "a"] == list(range(5))
+    assert [i for key, i in log if key == "b"] == list(range(5))
+    assert not dispatcher.pending
@@ -0,0 +1,70 @@
+import errno
+import threading
+
+from i3pystatus.core import uevent
+
+EVENT = (b"change@/devices/LNXSYSTM:00/ACPI0003:00/power_supply/AC\0"
+         b"ACTION=change\0DEVPATH=/devices/LNXSYSTM:00/ACPI0003:00/power_supply/AC\0"
+         b"SUBSYSTEM=power_supply\0POWER_SUPPLY_NAME=AC\0POWER_SUPPLY_ONLINE=0\0SEQNUM=4242\0")
+
+
+def test_parse_message():
+    event = uevent.parse_message(EVENT)
+    assert event["ACTION"] == "change"
+    assert event["SUBSYSTEM"] == "power_supply"
+    assert event["POWER_SUPPLY_ONLINE"] == "0"
+
+
+def test_udev_messages_are_ignored():
+    assert uevent.parse_message(b"libudev\0\xfe\xed\xca\xfe") is None
+    assert uevent.parse_message(b"garbage") is None
+
+
+def test_dispatch_by_subsystem():
+    monitor = uevent.UeventMonitor()
+    power, usb = [], []
+    monitor.subscribe("power_supply", power.append)
+    monitor.subscribe("usb", usb.append)
+    monitor.subscribe("power_supply", lambda event: 1 / 0)
+    monitor.dispatch(EVENT)
+    assert [event["POWER_SUPPLY_NAME"] for event in power] == ["AC"]
+    assert usb == []
+
+
+class FakeSocket:
+    def __init__(self, replies):
+        self.replies = replies
+        self.drained = threading.Event()
+
+    def recv(self, size):
+        if not self.replies:
+            self.drained.set()
+            threading.Event().wait()
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+
+def test_monitor_survives_errors(monkeypatch):
+    monkeypatch.setattr(uevent, "RETRY_DELAY", 0)
+    monitor = uevent.UeventMonitor()
+    power = []
+    monitor.subscribe("power_supply", power.append)
+    parse_message = uevent.parse_message
+
+    def fail_once(data):
+        # the first event fails to dispatch
+        monkeypatch.setattr(uevent, "parse_message", parse_message)
+        raise ValueError(data)
+    monkeypatch.setattr(uevent, "parse_message", fail_once)
+    monitor.sock = FakeSocket([
+        OSError(errno.ENOBUFS, "No buffer space available"),
+        OSError(errno.EIO, "I/O error"),
+        EVENT,
+        EVENT,
+    ])
+    monitor.thread.start()
+    assert monitor.sock.drained.wait(1)
+    assert monitor.thread.is_alive()
+    assert [event["POWER_SUPPLY_NAME"] for event in power] == ["AC"]
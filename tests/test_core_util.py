@@ -116,6 +116,39 @@ class ModuleListTests(unittest.TestCase):
         assert not pymod.some_class.__init__.called
         assert not pymod.some_class.registered.called
 
+    def test_get(self):
+        module = self.ModuleBase()
+        module.registered = MagicMock()
+        self.ml.append(module)
+
+        assert self.ml.get(str(id(module))) is module
+        assert self.ml.get(id(module)) is module
+        assert self.ml.get("1234") is None
+
+        self.ml.remove(module)
+        assert self.ml.get(str(id(module))) is None
+
+    def test_get_nested(self):
+        nested_list = util.ModuleList(self.status_handler, ClassFinder(self.ModuleBase))
+        before, after = self.ModuleBase(), self.ModuleBase()
+        group = self.ModuleBase()
+        for module in (before, after, group):
+            module.registered = MagicMock()
+        group.modules = nested_list
+
+        nested_list.append(before)
+        self.ml.append(group)
+        nested_list.append(after)
+
+        assert self.ml.get(str(id(group))) is group
+        assert self.ml.get(str(id(before))) is before
+        assert self.ml.get(str(id(after))) is after
+
+        nested_list.remove(after)
+        assert self.ml.get(str(id(after))) is None
+        self.ml.remove(group)
+        assert self.ml.get(str(id(before))) is None
+
     def test_ambigious_classdef(self):
         pymod = types.ModuleType("test_mod")
         pymod.some_class = self._create_module_class("some_class")
@@ -232,3 +265,55 @@ class FormatPTests(unittest.TestCase):
         s = "[{a:.3f} m]{obj.attr}"
         assert util.formatp(s, a=3.14123456789, obj=obj) == "3.141 mbar"
         assert util.formatp(s, a=0.0, obj=obj) == "bar"
+
+    def test_compile(self):
+        s = "[[{artist} - ]{album} - ]{title}"
+        template = util.formatp.compile(s)
+        assert template is util.formatp.compile(s)
+        assert template.format(title="Black rose") == "Black rose"
+        assert template.format(artist="SOAD", album="Toxicity", title="Science") == "SOAD - Toxicity - Science"
+        assert template.format(album="Toxicity", title="Science") == "Toxicity - Science"
+
+
+@pytest.mark.parametrize("lower_limit, upper_limit", [
+    (0.0, 100.0),
+    (0.0, 50.0),
+    (None, None),
+])
+def test_graph_buffer_matches_make_graph(lower_limit, upper_limit):
+    buffer = util.GraphBuffer(5, lower_limit, upper_limit)
+    values = [0.0] * 5
+    for value in (10, 90, 30, 70, 120, 0, 55, 55, 100, 20, 40):
+        buffer.append(value)
+        values = [float(value)] + values[:4]
+        assert list(buffer) == values
+        assert buffer.max == max(values)
+        assert buffer.min == min(values)
+        assert buffer.render() == util.make_graph(values, lower_limit, upper_limit)
+
+
+def test_graph_buffer_clear():
+    buffer = util.GraphBuffer(3)
+    buffer.append(100)
+    buffer.clear()
+    assert list(buffer) == [0.0, 0.0, 0.0]
+    assert buffer.render() == "___"
+
+
+@pytest.mark.parametrize("style, values, expected", [
+    ("braille", [0, 40, 70, 100], "⣦"),
+    ("braille", [100] * 4 + [0] * 4, "⣿⠀"),
+    ("braille", [100, 100, 100, 100, 100], "⣿⠉"),
+    ("braille-dots", [100, 0, 0, 0, 0, 0, 0, 100], "⢁"),
+    ("blocks", [100, 0, 0, 100, 0, 100], "▚▝"),
+    ("blocks", [], ""),
+])
+def test_make_heatmap(style, values, expected):
+    assert util.make_heatmap(values, style=style) == expected
+
+
+def test_make_heatmap_limits():
+    assert util.make_heatmap([5, 10], 0, 10, "blocks") == "▀"
+    assert util.make_heatmap([-5, 50], 0, 10, "blocks") == "▝"
+    with pytest.raises(NotImplementedError):
+        util.make_heatmap([1], style="sparkles")
@@ -0,0 +1,124 @@
+"""
+Tests for the per-core usage calculation of the cpu_usage module
+"""
+
+from array import array
+
+import pytest
+
+from i3pystatus import cpu_usage
+from i3pystatus.core.procfs import CpuTotals
+
+
+def totals(names, total, busy):
+    return CpuTotals(tuple(names), array("q", total), array("q", busy))
+
+
+NAMES = ["cpu"] + ["cpu{}".format(i) for i in range(12)]
+
+
+def run(module, *readings):
+    for reading in readings:
+        module.usages = module.calculate_usages(reading)
+    return module.usages
+
+
+def test_usages():
+    module = cpu_usage.CpuUsage()
+    usages = run(
+        module,
+        totals(NAMES, [100] * 13, [0] * 13),
+        totals(NAMES, [200] * 13, list(range(0, 130, 10))),
+    )
+    assert usages == list(range(0, 130, 10))
+    # no time passed
+    assert run(module, totals(NAMES, [200] * 13, [0] * 13)) == [0] * 13
+
+
+def test_format_all_in_core_order():
+    module = cpu_usage.CpuUsage(format_all="{core}:{usage}")
+    usages = run(module, totals(NAMES, [100] * 13, [50] * 13))
+    assert module.gen_format_all(usages) == " ".join("{}:50".format(name) for name in NAMES)
+    module.exclude_average = True
+    assert module.gen_format_all(usages).startswith("cpu0:50 cpu1:50 cpu2:50")
+
+
+def test_format_fragments_are_cached():
+    module = cpu_usage.CpuUsage()
+    usages = run(module, totals(NAMES, [100] * 13, [50] * 13))
+    first = module.gen_format_all(usages)
+    assert module.fragments[5] == {50: "cpu4:50%"}
+    assert module.gen_format_all(usages) == first
+
+
+def test_cpu_hotplug_resets_state():
+    module = cpu_usage.CpuUsage()
+    run(module, totals(NAMES, [100] * 13, [50] * 13))
+    usages = run(module, totals(NAMES[:3], [100] * 3, [25] * 3))
+    assert usages == [25] * 3
+    assert module.keys == ["usage_cpu", "usage_cpu0", "usage_cpu1"]
+
+
+def test_numpy_matches_python(monkeypatch):
+    pytest.importorskip("numpy")
+    names = ["cpu"] + ["cpu{}".format(i) for i in range(64)]
+    readings = [
+        totals(names, [1000 * i + n for n in range(65)], [300 * i + n // 2 for n in range(65)])
+        for i in range(1, 4)
+    ]
+    python = cpu_usage.CpuUsage()
+    monkeypatch.setattr(cpu_usage, "numpy", None)
+    expected = run(python, *readings)
+    monkeypatch.undo()
+    fast = cpu_usage.CpuUsage()
+    assert run(fast, *readings) == expected
+    assert fast.use_numpy
+
+
+def test_heatmap_formatter(monkeypatch):
+    readings = iter([
+        totals(NAMES[:5], [100] * 5, [0] * 5),
+        totals(NAMES[:5], [200] * 5, [50, 100, 0, 0, 100]),
+    ])
+    monkeypatch.setattr(cpu_usage.procstat, "sampler", lambda: next(readings))
+    module = cpu_usage.CpuUsage(format="{usage_heatmap}", heatmap_style="blocks")
+    cpu_usage.procstat.invalidate()
+    module.run()
+    cpu_usage.procstat.invalidate()
+    module.run()
+    cpu_usage.procstat.invalidate()
+    assert module.output["full_text"] == "▚"
+
+
+def test_same_snapshot_keeps_usages(monkeypatch):
+    readings = iter([
+        totals(NAMES[:3], [100] * 3, [0] * 3),
+        totals(NAMES[:3], [200] * 3, [100] * 3),
+    ])
+    monkeypatch.setattr(cpu_usage.procstat, "sampler", lambda: next(readings))
+    cpu_usage.procstat.invalidate()
+    try:
+        module = cpu_usage.CpuUsage(format="{usage}")
+        module.run()
+        cpu_usage.procstat.invalidate()
+        module.run()
+        assert module.output["full_text"] == "100"
+        # runs again within the period of the source, reading the same snapshot
+        module.run()
+        assert module.output["full_text"] == "100"
+    finally:
+        cpu_usage.procstat.invalidate()
+
+
+def test_unused_formatters_are_not_built(monkeypatch):
+    monkeypatch.setattr(cpu_usage.procstat, "sampler", lambda: totals(NAMES[:3], [100] * 3, [0] * 3))
+    monkeypatch.setattr(cpu_usage, "make_heatmap", None)
+    cpu_usage.procstat.invalidate()
+    try:
+        module = cpu_usage.CpuUsage(format="{usage}")
+        monkeypatch.setattr(module, "gen_format_all", None)
+        module.run()
+        assert "usage_all" not in module.data
+        assert "usage_heatmap" not in module.data
+    finally:
+        cpu_usage.procstat.invalidate()
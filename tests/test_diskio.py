@@ -0,0 +1,89 @@
+"""
+Tests for the diskio module
+"""
+
+import pytest
+
+from i3pystatus import diskio
+from i3pystatus.core import procfs
+
+LINE = "{major:4d} {minor:7d} {name} {reads} 0 {sectors_read} {read_ticks} {writes} 0 {sectors_written} " \
+       "{write_ticks} 0 {io_ticks} 0 0 0 0 0 0 0\n"
+
+
+def diskstats(**devices):
+    lines = [LINE.format(major=7, minor=0, name="loop0", reads=5, sectors_read=5, read_ticks=5, writes=0,
+                         sectors_written=0, write_ticks=0, io_ticks=5)]
+    for minor, (name, (reads, sectors_read, read_ticks, writes, sectors_written, write_ticks, io_ticks)) \
+            in enumerate(sorted(devices.items())):
+        lines.append(LINE.format(major=259, minor=minor, name=name, reads=reads, sectors_read=sectors_read,
+                                 read_ticks=read_ticks, writes=writes, sectors_written=sectors_written,
+                                 write_ticks=write_ticks, io_ticks=io_ticks))
+        lines.append(LINE.format(major=259, minor=minor + 100, name=name + "p1", reads=1, sectors_read=1,
+                                 read_ticks=1, writes=1, sectors_written=1, write_ticks=1, io_ticks=1))
+    return "".join(lines)
+
+
+class Clock:
+    now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def sample(tmpdir, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(diskio.time, "monotonic", clock)
+    path = tmpdir.join("diskstats")
+
+    def sample(module, seconds, **devices):
+        # write in place, like procfs
+        with open(str(path), "a+") as f:
+            f.truncate(0)
+            f.write(diskstats(**devices))
+        clock.now += seconds
+        module.file = str(path)
+        module.run()
+        return module.data
+
+    return sample
+
+
+def test_pattern_matches_whole_names(tmpdir):
+    path = tmpdir.join("diskstats")
+    path.write(diskstats(nvme0n1=(1, 2, 3, 4, 5, 6, 7), sda=(0,) * 7))
+    stats = procfs.diskstats(procfs.diskstats_pattern(diskio.DiskIO.devices), path=str(path))
+    assert stats.names == ("nvme0n1", "sda")
+    assert list(stats.counters[:7]) == [1, 2, 3, 4, 5, 6, 7]
+    reused = procfs.diskstats(procfs.diskstats_pattern(r"nvme\d+n\d+"), stats.counters, str(path))
+    assert reused.counters is not stats.counters
+    assert procfs.diskstats(procfs.diskstats_pattern(r"nvme\d+n\d+"), reused.counters, str(path)).counters \
+        is reused.counters
+
+
+def test_rates(sample):
+    module = diskio.DiskIO(format="{read} {write} {read_iops} {write_iops}")
+    assert sample(module, 0, nvme0n1=(0,) * 7, sda=(0,) * 7)["read"] == 0
+    data = sample(module, 2,
+                  nvme0n1=(100, 2048, 300, 10, 4096, 100, 1000),
+                  sda=(0, 0, 0, 10, 8, 100, 2000))
+    assert data["read_nvme0n1"] == 2048 * 512 / 2
+    assert data["write"] == (4096 + 8) * 512 / 2
+    assert data["read_iops"] == 50
+    assert data["write_iops_sda"] == 5
+    assert data["await_nvme0n1"] == 400 / 110
+    assert data["await"] == 500 / 120
+    assert data["util_nvme0n1"] == 50
+    assert data["util"] == 100
+    assert module.output["full_text"] == "512.0KB 1.0MB 50.0 10.0"
+    assert module.output["urgent"]
+
+
+def test_device_changes_reset(sample):
+    module = diskio.DiskIO()
+    sample(module, 0, sda=(0,) * 7)
+    data = sample(module, 1, sda=(10,) * 7, sdb=(10,) * 7)
+    assert data["read"] == 0
+    assert module.output["full_text"] == "R 0.0B W 0.0B"
+    assert sample(module, 1, sda=(20,) * 7, sdb=(10,) * 7)["read_iops"] == 10
@@ -0,0 +1,85 @@
+"""
+Tests for the GPU sampler using a fake nvidia-smi
+"""
+
+import os
+import sys
+import textwrap
+
+import pytest
+
+from i3pystatus.utils import gpu
+
+FAKE_NVIDIA_SMI = """\
+#!{python}
+import sys, time
+assert "--format=csv,noheader,nounits" in sys.argv
+assert sys.argv[1].startswith("--query-gpu=index,")
+for round in range({rounds}):
+    print("0, 8192, 4096, 4096, {{}}, 30, 12, 3".format(40 + round))
+    print("1, 4096, 1024, 3072, 50, [Not Supported], 99, 40")
+    sys.stdout.flush()
+    time.sleep(0.05)
+{tail}
+"""
+
+
+@pytest.fixture
+def fake_nvidia_smi(tmpdir):
+    def make(rounds=1000, tail=""):
+        path = tmpdir.join("nvidia-smi")
+        path.write(FAKE_NVIDIA_SMI.format(python=sys.executable, rounds=rounds, tail=textwrap.dedent(tail)))
+        os.chmod(str(path), 0o755)
+        return str(path)
+    return make
+
+
+def test_streaming(fake_nvidia_smi):
+    sampler = gpu.NvidiaSmiLoop(fake_nvidia_smi(), loop_ms=50)
+    try:
+        first, second = sampler.sample()
+        assert first == gpu.GPUUsageInfo(8192, 4096, 4096, first.temp, 30, 12, 3)
+        assert second.percent_fan is None
+        assert second.usage_gpu == 99
+        process = sampler.process
+        sampler.updated.clear()
+        sampler.updated.wait(1)
+        assert sampler.sample()[0].temp > first.temp
+        # one process for all samples
+        assert sampler.process is process
+    finally:
+        sampler.stop()
+
+
+def test_restart_after_exit(fake_nvidia_smi):
+    sampler = gpu.NvidiaSmiLoop(fake_nvidia_smi(rounds=1))
+    assert len(sampler.sample()) == 2
+    sampler.process.wait()
+    assert sampler.sample()[0].temp == 40
+
+
+def test_failing_nvidia_smi(fake_nvidia_smi):
+    sampler = gpu.NvidiaSmiLoop(fake_nvidia_smi(rounds=0, tail="sys.exit(9)"))
+    with pytest.raises(Exception, match="nvidia-smi call failed"):
+        sampler.sample()
+    with pytest.raises(Exception, match="No nvidia-smi"):
+        gpu.NvidiaSmiLoop("/nonexistent/nvidia-smi").sample()
+
+
+def test_modules_share_the_sampler(fake_nvidia_smi, monkeypatch):
+    from i3pystatus.gpu_mem import GPUMemory
+    from i3pystatus.gpu_temp import GPUTemperature
+
+    sampler = gpu.NvidiaSmiLoop(fake_nvidia_smi(), loop_ms=50)
+    monkeypatch.setattr(gpu, "_sampler", sampler)
+    gpu.nvidia.invalidate()
+    try:
+        temp = GPUTemperature(gpu_number=1)
+        mem = GPUMemory(gpu_number=1, format="{used_mem}")
+        temp.run()
+        mem.run()
+        assert temp.output["full_text"] == "50 °C"
+        assert mem.output["full_text"] == "3072.0"
+    finally:
+        gpu.nvidia.invalidate()
+        sampler.stop()
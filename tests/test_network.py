@@ -0,0 +1,74 @@
+"""
+Tests for the traffic counters of the network module
+"""
+
+import pytest
+
+netifaces = pytest.importorskip("netifaces")
+
+from i3pystatus import network  # noqa: E402
+
+
+class Clock:
+    now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def traffic(tmpdir, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(network.time, "monotonic", clock)
+
+    def make(smoothing=0):
+        traffic = network.NetworkTraffic(False, lambda interface: True, smoothing)
+        traffic.paths["veth0"] = [str(tmpdir.join(name)) for name in traffic.STATISTICS]
+        return traffic
+
+    def sample(traffic, seconds, rx_bytes, rx_packets, tx_bytes, tx_packets):
+        for name, value in zip(network.NetworkTraffic.STATISTICS, (rx_bytes, rx_packets, tx_bytes, tx_packets)):
+            # write in place, like sysfs
+            with open(str(tmpdir.join(name)), "a+") as f:
+                f.truncate(0)
+                f.write("{}\n".format(value))
+        clock.now += seconds
+        return traffic.get_usage("veth0")
+
+    return make, sample
+
+
+def test_rates_are_per_second(traffic):
+    make, sample = traffic
+    counters = make()
+    assert sample(counters, 0, 1000, 10, 500, 5)["bytes_recv"] == 0
+    usage = sample(counters, 0.5, 3000, 20, 1500, 15)
+    assert usage["bytes_recv"] == 4000
+    assert usage["bytes_sent"] == 2000
+    assert usage["packets_recv"] == 20
+    assert usage["packets_sent"] == 20
+    assert usage["rx_total"] == 3000
+    assert usage["tx_total"] == 1500
+
+
+def test_counter_reset(traffic):
+    make, sample = traffic
+    counters = make()
+    sample(counters, 0, 5000, 10, 5000, 10)
+    assert sample(counters, 1, 100, 1, 100, 1)["bytes_recv"] == 0
+
+
+def test_smoothing(traffic):
+    make, sample = traffic
+    counters = make(smoothing=1)
+    sample(counters, 0, 0, 0, 0, 0)
+    assert sample(counters, 1, 1000, 0, 0, 0)["bytes_recv"] == 1000
+    smoothed = sample(counters, 1, 1000, 0, 0, 0)["bytes_recv"]
+    assert smoothed == pytest.approx(1000 * 0.36788, rel=1e-3)
+
+
+def test_missing_interface(traffic):
+    counters = network.NetworkTraffic(False, lambda interface: True)
+    counters.paths["veth0"] = ["/nonexistent/rx_bytes"] * 4
+    counters.get_usage("veth0")
+    assert counters.get_usage("veth0")["bytes_recv"] == 0
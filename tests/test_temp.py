@@ -0,0 +1,117 @@
+"""
+Tests for the hwmon mode of the temp module
+"""
+
+import errno
+import os
+
+import pytest
+
+from i3pystatus import temp
+
+
+def write(path, value):
+    # write in place, like sysfs
+    with open(str(path), "a+") as f:
+        f.truncate(0)
+        f.write("{}\n".format(value))
+
+
+@pytest.fixture
+def hwmon(tmpdir):
+    coretemp = tmpdir.mkdir("hwmon10")
+    write(coretemp.join("temp1_input"), 48000)
+    write(coretemp.join("temp1_label"), "Package id 0")
+    write(coretemp.join("temp1_max"), 80000)
+    write(coretemp.join("temp1_crit"), 100000)
+    write(coretemp.join("temp2_input"), 46000)
+    write(coretemp.join("temp2_label"), "Core 0")
+    write(coretemp.join("temp2_crit"), 100000)
+    acpitz = tmpdir.mkdir("hwmon2")
+    write(acpitz.join("temp1_input"), 27800)
+    return tmpdir
+
+
+def test_discovery(hwmon):
+    sensors = temp.HwmonSensors(str(hwmon), default_critical=90).read()
+    assert [(s.name, s.current, s.maximum, s.critical) for s in sensors] == [
+        ("temp1", 27, 90, 90),
+        ("Package_id_0", 48, 80, 100),
+        ("Core_0", 46, 100, 100),
+    ]
+
+
+def test_sensors_are_discovered_once(hwmon, monkeypatch):
+    sensors = temp.HwmonSensors(str(hwmon), names=["Core 0"])
+    assert [s.name for s in sensors.read()] == ["Core_0"]
+    monkeypatch.setattr(temp.glob, "glob", None)
+    write(hwmon.join("hwmon10", "temp2_input"), 71000)
+    assert [s.current for s in sensors.read()] == [71]
+
+
+def test_sensor_names_with_underscores(hwmon):
+    sensors = temp.HwmonSensors(str(hwmon), names=["Core_0", "Package id 0"])
+    assert [s.name for s in sensors.read()] == ["Package_id_0", "Core_0"]
+
+
+def test_labels_of_several_chips_are_qualified(tmpdir):
+    for index, temperature in enumerate((41000, 52000)):
+        coretemp = tmpdir.mkdir("hwmon{}".format(index + 1))
+        write(coretemp.join("name"), "coretemp")
+        write(coretemp.join("temp1_input"), temperature)
+        write(coretemp.join("temp1_label"), "Package id {}".format(index))
+        write(coretemp.join("temp2_input"), temperature)
+        write(coretemp.join("temp2_label"), "Core 0")
+    sensors = temp.HwmonSensors(str(tmpdir)).read()
+    assert [(s.name, s.current) for s in sensors] == [
+        ("Package_id_0", 41), ("coretemp0_Core_0", 41), ("Package_id_1", 52), ("coretemp1_Core_0", 52)]
+
+    # by label for the sensors of all chips, or by name for a single one
+    sensors = temp.HwmonSensors(str(tmpdir), names=["Core_0"]).read()
+    assert [s.name for s in sensors] == ["coretemp0_Core_0", "coretemp1_Core_0"]
+    sensors = temp.HwmonSensors(str(tmpdir), names=["coretemp1 Core 0"]).read()
+    assert [s.name for s in sensors] == ["coretemp1_Core_0"]
+
+    module = temp.Temperature(hwmon_enabled=True, hwmon_path=str(tmpdir),
+                              format="{coretemp0_Core_0} {coretemp1_Core_0}")
+    module.run()
+    assert module.output["full_text"] == "41 52"
+
+
+def test_removed_sensor(hwmon):
+    sensors = temp.HwmonSensors(str(hwmon))
+    assert len(sensors.read()) == 3
+    os.remove(str(hwmon.join("hwmon2", "temp1_input")))
+    assert [s.name for s in sensors.read()] == ["Package_id_0", "Core_0"]
+
+
+def test_output(hwmon):
+    module = temp.Temperature(hwmon_enabled=True, hwmon_path=str(hwmon), sensors=["Core 0", "Package id 0"],
+                              format="{temp} {Core_0}")
+    module.run()
+    assert module.output["full_text"] == "48 46"
+    assert not module.output["urgent"]
+    write(hwmon.join("hwmon10", "temp1_input"), 85000)
+    module.run()
+    assert module.output["urgent"]
+
+
+def test_unreadable_sensor(hwmon, monkeypatch):
+    sensors = temp.HwmonSensors(str(hwmon))
+    sensors.read()
+    attribute = sensors.sensors[0][1]
+    discover = sensors.discover
+
+    def fail():
+        raise OSError(errno.ENODATA, "No data available")
+    monkeypatch.setattr(attribute, "read", fail)
+    monkeypatch.setattr(sensors, "discover", None)
+    assert [s.name for s in sensors.read()] == ["Package_id_0", "Core_0"]
+    assert sensors.unavailable == ["temp1"]
+    assert sensors.sensors is not None
+
+    monkeypatch.setattr(sensors, "discover", discover)
+    module = temp.Temperature(hwmon_enabled=True, hwmon_path=str(hwmon), format="{temp} {temp1}|{temp1_bar}|")
+    module.hwmon = sensors
+    module.run()
+    assert module.output["full_text"] == "48 ||"